@@ -5,6 +5,35 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database - Using SQLite for development (no credentials needed)
     DATABASE_URL: str = "sqlite+aiosqlite:///./cnt_db.sqlite"
+    DATABASE_PROFILE: str = "auto"  # sqlite, postgres, default or auto (from DATABASE_URL)
+    DATABASE_ECHO: bool = False  # Log every SQL statement
+    
+    # Read replicas (comma-separated URLs) for GET requests
+    DATABASE_REPLICA_URLS: str = ""
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0  # Reads stay on the primary this long after a client writes
+    DB_REPLICA_MAX_LAG_SECONDS: float = 2.0  # Replicas lagging more than this are skipped
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    
+    # SQL instrumentation (Server-Timing header, slow-query log, N+1 warnings)
+    SQL_INSTRUMENTATION: bool = True
+    SQL_SLOW_QUERY_MS: float = 200.0
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10  # Warn when one request repeats a statement shape more often
+    
+    # List endpoints (cursor pagination)
+    PAGINATION_TOTAL_TTL: int = 60  # Seconds an X-Total-Count is reused
+    
+    # Postgres pool (postgres profile)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_STATEMENT_TIMEOUT_MS: int = 15000  # 0 = no limit
+    
+    # SQLite (sqlite profile: WAL, one writer connection plus a reader pool)
+    SQLITE_READER_POOL_SIZE: int = 8
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for the database lock
+    SQLITE_MMAP_SIZE: int = 256 * 1024 ** 2  # 256 MB
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024  # 64 MB page cache per connection
     
     # Jitsi Meet
     JITSI_APP_ID: str = "my-app-id"
@@ -21,10 +50,43 @@ class Settings(BaseSettings):
     # Media Storage
     MEDIA_STORAGE_PATH: str = "./media"
     
+    # Upload limits (bytes); uploads are streamed to disk in UPLOAD_CHUNK_SIZE chunks
+    MAX_AUDIO_UPLOAD_BYTES: int = 500 * 1024 ** 2  # 500 MB
+    MAX_VIDEO_UPLOAD_BYTES: int = 4 * 1024 ** 3  # 4 GB
+    MAX_IMAGE_UPLOAD_BYTES: int = 20 * 1024 ** 2  # 20 MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MB
+    
+    # Media processing scheduler (0 = size from CPU count)
+    MEDIA_VIDEO_CONCURRENCY: int = 0
+    MEDIA_AUDIO_CONCURRENCY: int = 0
+    MEDIA_THUMBNAIL_CONCURRENCY: int = 0
+    MEDIA_QUEUE_SIZE: int = 32  # Queued operations per class before answering 429
+    MEDIA_BATCH_QUEUE_SIZE: int = 16  # Of those, at most this many background operations
+    
+    # Media Jobs (background FFmpeg processing)
+    MEDIA_JOB_HISTORY: int = 500  # Finished jobs kept for status lookups
+    MEDIA_JOB_DRAIN_TIMEOUT: int = 300  # Seconds to wait for running jobs on shutdown
+    
+    # Edit output cache (identical edits return the existing file)
+    EDIT_CACHE_ENABLED: bool = True
+    # Outputs the index remembers (5 GB); not a disk limit, see MEDIA_DISK_BUDGET_BYTES
+    EDIT_CACHE_MAX_BYTES: int = 5 * 1024 ** 3
+    
+    # Resized image derivatives (/images/resize)
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 ** 2  # 512 MB
+    
+    # Storage janitor (garbage collection of temp files, orphans and old edit outputs)
+    MEDIA_DISK_BUDGET_BYTES: int = 50 * 1024 ** 3  # 50 GB; unreferenced outputs are evicted beyond it
+    MEDIA_JANITOR_INTERVAL: int = 3600  # Seconds between sweeps (0 = only on demand)
+    MEDIA_TEMP_MAX_AGE: int = 6 * 3600  # Scratch files older than this are abandoned
+    MEDIA_UPLOAD_EXPIRY: int = 24 * 3600  # Resumable uploads idle this long are discarded
+    MEDIA_ORPHAN_GRACE: int = 7 * 24 * 3600  # Unreferenced files unused this long are deleted
+    
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ADMIN_API_TOKEN: str = ""  # X-Admin-Token for /admin (stats, storage sweep); empty disables them
     
     # API Settings
     API_V1_PREFIX: str = "/api/v1"
@@ -1,4 +1,11 @@
-from .connection import get_db, engine, Base
+from .base import Base
 
 __all__ = ["get_db", "engine", "Base"]
 
+
+def __getattr__(name):
+    # The engines are created on first use, not when the models are imported
+    if name in ("get_db", "engine"):
+        from . import connection
+        return getattr(connection, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
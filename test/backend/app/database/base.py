@@ -0,0 +1,7 @@
+from sqlalchemy.ext.declarative import declarative_base
+from app.database.instrumentation import sql_instrumentation
+
+# Declarative base of the models; kept apart from the engines so that
+# importing the models (migrations, scripts, tests) connects to nothing
+Base = declarative_base()
+sql_instrumentation.instrument_models(Base)
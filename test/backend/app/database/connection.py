@@ -1,33 +1,273 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from contextlib import asynccontextmanager
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import hashlib
+import itertools
+import time
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.expression import TextClause, UpdateBase
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
+from typing import Any, Dict, List, Optional
 
 from app.config import settings
+from app.database.instrumentation import sql_instrumentation
+
+
+def _profile_name(url) -> str:
+    """Engine profile from DATABASE_PROFILE, or from the database URL when "auto" """
+    profile = settings.DATABASE_PROFILE.lower()
+    if profile != "auto":
+        return profile
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        return "sqlite"
+    if url.get_backend_name() == "postgresql":
+        return "postgres"
+    return "default"
+
+
+def _sqlite_engine(url, readonly: bool) -> AsyncEngine:
+    """
+    SQLite engine tuned for concurrent readers and one writer
+
+    WAL lets readers run while a write is in progress; busy_timeout makes a
+    blocked connection wait for the lock instead of failing with "database
+    is locked".
+    """
+    if readonly:
+        pool_size = settings.SQLITE_READER_POOL_SIZE
+    else:
+        # One connection: writes from this process are queued by the pool
+        # instead of racing for the database lock
+        pool_size = 1
+    engine = create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # Negative cache_size is in KiB
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if readonly:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return engine
+
+
+def _postgres_engine(url) -> AsyncEngine:
+    """Pooled Postgres engine with liveness checks and a statement timeout"""
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        # psycopg2 has no asyncio support; psycopg 3 does
+        url = url.set(drivername="postgresql+psycopg")
+
+    timeout_ms = int(settings.DB_STATEMENT_TIMEOUT_MS)
+    connect_args: Dict[str, Any] = {}
+    if timeout_ms:
+        if url.drivername == "postgresql+asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+
+    return create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+
+_url = make_url(settings.DATABASE_URL)
+DATABASE_PROFILE = _profile_name(_url)
+
+# Engine for writes (and schema changes in init_db); reads may use reader_engine
+reader_engine: Optional[AsyncEngine] = None
+if DATABASE_PROFILE == "sqlite":
+    engine = _sqlite_engine(_url, readonly=False)
+    reader_engine = _sqlite_engine(_url, readonly=True)
+elif DATABASE_PROFILE == "postgres":
+    engine = _postgres_engine(_url)
+else:
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=settings.DATABASE_ECHO,
+        future=True
+    )
+
+sql_instrumentation.instrument(engine)
+if reader_engine is not None:
+    sql_instrumentation.instrument(reader_engine)
+
+
+class RoutingSession(Session):
+    """
+    Sends plain reads to the reader pool and everything else to the writer
+
+    Once a transaction has written, its remaining statements stay on the
+    writer so they see their own uncommitted changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            reader_engine is None
+            or self.info.get("wrote")
+            or self._flushing
+            or isinstance(clause, (UpdateBase, TextClause))
+        ):
+            if reader_engine is not None:
+                self.info["wrote"] = True
+            return engine.sync_engine
+        return reader_engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
 
-# Create async engine (SQLite for development)
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True
-)
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
-    engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False
 )
 
-Base = declarative_base()
 
+# Replication lag queries per backend; backends without one are assumed current
+LAG_QUERIES = {
+    "postgresql": text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReplicaRouter:
+    """
+    Routes read-only requests to read replicas (DATABASE_REPLICA_URLS)
+
+    GET/HEAD handlers get a session on a healthy replica, picked round-robin.
+    A client that made a write request within DB_READ_YOUR_WRITES_SECONDS
+    reads from the primary so it sees its own changes; clients are told
+    apart by Authorization header, or address when anonymous. Replicas whose
+    measured lag exceeds DB_REPLICA_MAX_LAG_SECONDS (or that can't be
+    reached) are skipped until they catch up, and with no healthy replica
+    reads go to the primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines: List[AsyncEngine] = [self._engine(url) for url in urls]
+        for engine in self.engines:
+            sql_instrumentation.instrument(engine)
+        self.sessions = [
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            for engine in self.engines
+        ]
+        self.lag: List[Optional[float]] = [None] * len(self.engines)  # Unknown until first checked
+        self._next = itertools.count()
+        self._sticky: Dict[str, float] = {}
+
+    @staticmethod
+    def _engine(url: str) -> AsyncEngine:
+        replica_url = make_url(url)
+        profile = _profile_name(replica_url)
+        if profile == "sqlite":
+            return _sqlite_engine(replica_url, readonly=True)
+        if profile == "postgres":
+            return _postgres_engine(replica_url)
+        return create_async_engine(replica_url, echo=settings.DATABASE_ECHO)
+
+    def session_factory(self, request: Request):
+        """Session factory for a request: a healthy replica for reads, else the primary"""
+        if not self.engines or request.method not in READ_METHODS:
+            return AsyncSessionLocal
+        if self._sticky.get(self._client_key(request), 0) > time.monotonic():
+            return AsyncSessionLocal
+
+        max_lag = settings.DB_REPLICA_MAX_LAG_SECONDS
+        healthy = [i for i, lag in enumerate(self.lag) if lag is not None and lag <= max_lag]
+        if not healthy:
+            return AsyncSessionLocal
+        return self.sessions[healthy[next(self._next) % len(healthy)]]
 
-# Dependency for getting database session
-async def get_db():
-    async with AsyncSessionLocal() as session:
+    def mark_write(self, request: Request):
+        """Pin the client to the primary for the read-your-writes window"""
+        if not self.engines or request.method in READ_METHODS:
+            return
+        now = time.monotonic()
+        self._sticky[self._client_key(request)] = now + settings.DB_READ_YOUR_WRITES_SECONDS
+        if len(self._sticky) > 10000:
+            self._sticky = {key: until for key, until in self._sticky.items() if until > now}
+
+    async def check_lag(self):
+        """Measure the replication lag (seconds) of every replica; None when unreachable"""
+        for index, engine in enumerate(self.engines):
+            query = LAG_QUERIES.get(engine.url.get_backend_name())
+            try:
+                async with engine.connect() as conn:
+                    if query is None:
+                        await conn.execute(text("SELECT 1"))
+                        self.lag[index] = 0.0
+                    else:
+                        lag = (await conn.execute(query)).scalar()
+                        self.lag[index] = float(lag or 0.0)
+            except Exception as e:
+                print(f"Error checking replica {index}: {e}")
+                self.lag[index] = None
+
+    async def run_lag_monitor(self):
+        """Re-check replica lag every DB_REPLICA_LAG_CHECK_INTERVAL seconds until cancelled"""
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(settings.DB_REPLICA_LAG_CHECK_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replicas": len(self.engines),
+            "lag": list(self.lag),
+            "sticky_clients": sum(1 for until in self._sticky.values() if until > time.monotonic()),
+        }
+
+    @staticmethod
+    def _client_key(request: Request) -> str:
+        authorization = request.headers.get("authorization")
+        if authorization:
+            return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+        return request.client.host if request.client else ""
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+)
+
+
+# Dependency for getting database session (read-only requests may use a replica)
+async def get_db(request: Request):
+    replica_router.mark_write(request)
+    async with replica_router.session_factory(request)() as session:
         try:
             yield session
         finally:
             await session.close()
-
+            # The window starts when the write is done
+            replica_router.mark_write(request)
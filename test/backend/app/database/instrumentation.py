@@ -0,0 +1,183 @@
+import re
+import time
+import threading
+from collections import Counter, deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.config import settings
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+    Statement shape: literals and bind parameters become ?, IN lists collapse
+
+    Values never appear in the result, so it is safe to log.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestStats:
+    """SQL totals for one request"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.queries = 0
+        self.duration_ms = 0.0
+        self.rows = 0  # ORM rows loaded
+        self.rows_affected = 0  # Rows changed by INSERT/UPDATE/DELETE
+        self.shapes: Counter = Counter()
+
+    def server_timing(self) -> str:
+        desc = f"{self.queries} queries, {self.rows} rows"
+        if self.rows_affected:
+            desc += f", {self.rows_affected} changed"
+        return f'db;dur={self.duration_ms:.1f};desc="{desc}"'
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("sql_request_stats", default=None)
+
+
+class SQLInstrumentation:
+    """
+    Per-statement timing, per-request totals, a slow-query log and an N+1 detector
+
+    Cursor events on every engine time each statement. Inside a request
+    (see start_request) the totals go to Server-Timing, and a statement
+    shape repeated more than SQL_N_PLUS_ONE_THRESHOLD times is reported once
+    as a likely N+1. Statements slower than SQL_SLOW_QUERY_MS are printed and
+    kept (normalized, without parameter values) for /admin/db/stats.
+    """
+
+    RECENT = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.slow_queries: deque = deque(maxlen=self.RECENT)
+        self.n_plus_one: deque = deque(maxlen=self.RECENT)
+
+    def instrument(self, engine: AsyncEngine):
+        if not settings.SQL_INSTRUMENTATION:
+            return
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def instrument_models(self, base):
+        """Count ORM rows loaded (propagates to every mapped class)"""
+        if settings.SQL_INSTRUMENTATION:
+            event.listen(base, "load", self._on_load, propagate=True)
+
+    def start_request(self, endpoint: str):
+        """Start collecting for the current request; returns a token for end_request"""
+        return _current.set(RequestStats(endpoint))
+
+    def current(self) -> Optional[RequestStats]:
+        return _current.get()
+
+    def end_request(self, token):
+        _current.reset(token)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "slow_query_ms": settings.SQL_SLOW_QUERY_MS,
+                "slow_queries": list(self.slow_queries),
+                "n_plus_one": list(self.n_plus_one),
+            }
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.queries += 1
+
+        stats = _current.get()
+        shape = None
+        if stats is not None:
+            stats.queries += 1
+            stats.duration_ms += elapsed_ms
+            if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+                stats.rows_affected += max(cursor.rowcount, 0)
+            shape = normalize_statement(statement)
+            stats.shapes[shape] += 1
+            if stats.shapes[shape] == settings.SQL_N_PLUS_ONE_THRESHOLD + 1:
+                print(f"Possible N+1 in {stats.endpoint}: statement repeated more than "
+                      f"{settings.SQL_N_PLUS_ONE_THRESHOLD} times: {shape}")
+                with self._lock:
+                    self.n_plus_one.append({"endpoint": stats.endpoint, "statement": shape, "at": time.time()})
+
+        if elapsed_ms >= settings.SQL_SLOW_QUERY_MS:
+            shape = shape or normalize_statement(statement)
+            endpoint = stats.endpoint if stats is not None else None
+            count = len(parameters) if isinstance(parameters, (list, tuple, dict)) else 0
+            print(f"Slow query ({elapsed_ms:.1f} ms) in {endpoint or 'background'}: {shape} "
+                  f"[{count} parameters redacted]")
+            with self._lock:
+                self.slow_queries.append({
+                    "endpoint": endpoint,
+                    "duration_ms": round(elapsed_ms, 1),
+                    "statement": shape,
+                    "at": time.time(),
+                })
+
+    def _on_load(self, target, context):
+        stats = _current.get()
+        if stats is not None:
+            stats.rows += 1
+
+
+class SQLServerTimingMiddleware:
+    """
+    Attach the request's SQL query count and time as Server-Timing
+
+    Plain ASGI rather than BaseHTTPMiddleware, which would re-wrap every
+    response body (dropping the zerocopysend extension of the media file
+    sends and buffering the SSE streams): the header goes on the response
+    start message and counts the queries run until then.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_INSTRUMENTATION:
+            await self.app(scope, receive, send)
+            return
+
+        token = sql_instrumentation.start_request(f"{scope['method']} {scope['path']}")
+        stats = sql_instrumentation.current()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and stats.queries:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            sql_instrumentation.end_request(token)
+
+
+# Shared instance installed on every engine in connection.py
+sql_instrumentation = SQLInstrumentation()
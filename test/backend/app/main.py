@@ -1,11 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from socketio import ASGIApp, AsyncServer
 from app.routes import api_router
+from app.routes.media_files import router as media_router
 from app.config import settings
 from app.websocket.socket_io_handler import SocketIOHandler
-import os
+from app.services.job_service import job_service
+from app.services.edit_cache import edit_cache
+from app.services.probe_cache import probe_cache
+from app.services.storage_janitor import storage_janitor
+from app.database.connection import replica_router
+from app.database.instrumentation import SQLServerTimingMiddleware
+import asyncio
 
 # Create FastAPI app
 app = FastAPI(
@@ -21,11 +27,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "Location", "Upload-Offset", "Upload-Length",  # Resumable uploads
+        "Content-Range", "Accept-Ranges", "ETag",  # Media serving
+        "Server-Timing",  # SQL time per request
+        "X-Next-Cursor", "X-Total-Count",  # List pagination
+        "X-Peaks-Level", "X-Peaks-Per-Second", "X-Peaks-Start", "X-Audio-Duration",  # Binary waveform peaks
+    ],
 )
 
-# Mount static files for media
-if os.path.exists(settings.MEDIA_STORAGE_PATH):
-    app.mount("/media", StaticFiles(directory=settings.MEDIA_STORAGE_PATH), name="media")
+
+# SQL query count and time per request, as Server-Timing
+app.add_middleware(SQLServerTimingMiddleware)
+
+# Serve media files (byte ranges, ETags, immutable caching for stored content)
+app.include_router(media_router, prefix="/media")
 
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
@@ -40,6 +56,33 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+
+_background_tasks = set()
+
+
+@app.on_event("startup")
+async def start_storage_janitor():
+    """Periodically collect temp files, orphans and old edit outputs"""
+    if settings.MEDIA_JANITOR_INTERVAL > 0:
+        _background_tasks.add(asyncio.create_task(storage_janitor.run_periodically()))
+
+
+@app.on_event("startup")
+async def start_replica_lag_monitor():
+    """Keep replica lag current so lagging replicas are skipped"""
+    if replica_router.engines:
+        _background_tasks.add(asyncio.create_task(replica_router.run_lag_monitor()))
+
+
+@app.on_event("shutdown")
+async def drain_media_jobs():
+    """Let running FFmpeg jobs finish (up to the drain timeout) before exiting"""
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.get_running_loop().run_in_executor(None, job_service.shutdown)
+    edit_cache.flush()
+    probe_cache.flush()
+
 # Setup Socket.io
 sio = AsyncServer(cors_allowed_origins="*", async_mode='asgi')
 socketio_app = ASGIApp(sio, app)
@@ -47,6 +90,9 @@ socketio_app = ASGIApp(sio, app)
 # Setup Socket.io handlers
 SocketIOHandler(sio)
 
+# Push media job progress to clients over Socket.io
+job_service.attach_socketio(sio)
+
 # Wrap app with Socket.io
 app = socketio_app
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -15,12 +15,18 @@ class PostCategory(enum.Enum):
 
 class CommunityPost(Base):
     __tablename__ = "community_posts"
+    __table_args__ = (
+        # Feed, newest first, filtered by category
+        Index("ix_community_posts_category", "category", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     image_url = Column(String, nullable=True)  # Photo/image URL for Instagram-like posts
+    image_blurhash = Column(String, nullable=True)  # Placeholder shown while image_url loads
+    image_color = Column(String, nullable=True)  # Dominant color, #rrggbb
     category = Column(String, nullable=False)  # testimony, prayer_request, question, etc.
     likes_count = Column(Integer, default=0)
     comments_count = Column(Integer, default=0)
@@ -34,6 +40,9 @@ class CommunityPost(Base):
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_id_created_at", "post_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("community_posts.id"), nullable=False)
@@ -48,6 +57,9 @@ class Comment(Base):
 
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        Index("ix_likes_post_id_user_id", "post_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("community_posts.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum as SQLEnum, Index
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -12,6 +12,9 @@ class StreamStatus(enum.Enum):
 
 class LiveStream(Base):
     __tablename__ = "live_streams"
+    __table_args__ = (
+        Index("ix_live_streams_status", "status", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     host_id = Column(Integer, ForeignKey("users.id"), nullable=False)
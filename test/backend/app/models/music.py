@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 
 class MusicTrack(Base):
     __tablename__ = "music_tracks"
+    __table_args__ = (
+        Index("ix_music_tracks_genre", "genre", "id"),
+        Index("ix_music_tracks_artist", "artist", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -13,6 +17,8 @@ class MusicTrack(Base):
     genre = Column(String, nullable=True)
     audio_url = Column(String, nullable=False)
     cover_image = Column(String, nullable=True)
+    cover_blurhash = Column(String, nullable=True)  # Placeholder shown while cover_image loads
+    cover_color = Column(String, nullable=True)  # Dominant color, #rrggbb
     duration = Column(Integer, nullable=True)
     lyrics = Column(Text, nullable=True)
     is_featured = Column(Boolean, default=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -21,6 +21,9 @@ class Playlist(Base):
 
 class PlaylistItem(Base):
     __tablename__ = "playlist_items"
+    __table_args__ = (
+        Index("ix_playlist_items_playlist_id", "playlist_id", "position"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     playlist_id = Column(Integer, ForeignKey("playlists.id"), nullable=False)
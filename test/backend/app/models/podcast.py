@@ -12,7 +12,11 @@ class Podcast(Base):
     description = Column(Text, nullable=True)
     audio_url = Column(String, nullable=True)
     video_url = Column(String, nullable=True)
+    hls_url = Column(String, nullable=True)  # HLS master playlist (adaptive streaming)
+    preview_vtt_url = Column(String, nullable=True)  # WebVTT index of the scrub sprite sheets
     cover_image = Column(String, nullable=True)
+    cover_blurhash = Column(String, nullable=True)  # Placeholder shown while cover_image loads
+    cover_color = Column(String, nullable=True)  # Dominant color, #rrggbb
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     duration = Column(Integer, nullable=True)  # Duration in seconds
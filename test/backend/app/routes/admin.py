@@ -0,0 +1,76 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from app.config import settings
+from app.services.edit_cache import edit_cache
+from app.services.image_service import image_service
+from app.services.media_scheduler import media_scheduler
+from app.services.media_store import media_store
+from app.services.probe_cache import probe_cache
+from app.services.storage_janitor import storage_janitor
+from app.database.connection import replica_router
+from app.database.instrumentation import sql_instrumentation
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow the request only with the X-Admin-Token set in ADMIN_API_TOKEN (disabled when unset)"""
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/cache/stats")
+async def edit_cache_stats():
+    """Hit/miss and size metrics for the edit output cache"""
+    return edit_cache.stats()
+
+
+@router.get("/images/stats")
+async def image_cache_stats():
+    """Entries and size of the resized image cache"""
+    return image_service.stats()
+
+
+@router.get("/scheduler/stats")
+async def scheduler_stats():
+    """Concurrency, queue depth and rejections per media operation class"""
+    return media_scheduler.stats()
+
+
+@router.get("/store/stats")
+async def store_stats():
+    """Blob count and bytes saved by content-addressed deduplication"""
+    return media_store.stats()
+
+
+@router.get("/probe/stats")
+async def probe_cache_stats():
+    """Entries and hit/miss counts of the shared ffprobe cache"""
+    return probe_cache.stats()
+
+
+@router.get("/storage/stats")
+async def storage_stats():
+    """Disk budget and the report of the last storage sweep"""
+    return storage_janitor.stats()
+
+
+@router.get("/db/stats")
+async def db_stats():
+    """Query totals, recent slow queries and N+1 warnings, and replica lag"""
+    return {**sql_instrumentation.stats(), "replicas": replica_router.stats()}
+
+
+@router.post("/storage/sweep")
+async def sweep_storage(dry_run: bool = True):
+    """
+    Delete abandoned temp files, stale uploads and unreferenced media, and
+    evict old edit outputs beyond the disk budget. Returns reclaimed bytes.
+
+    Only reports what would be deleted unless dry_run=false is passed.
+    """
+    return await storage_janitor.sweep(dry_run=dry_run)
@@ -1,217 +1,243 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request, Response
 from typing import Optional
-import os
-from pathlib import Path
 from app.services.audio_editing_service import AudioEditingService
-from app.config import settings
+from app.services.media_scheduler import SchedulerBusy, SchedulerClosed
+from app.services.waveform_service import WaveformDecodeError, waveform_service
+from app.routes.editing_utils import media_service, resolve_input, remove_files, run_edit_job
 
 router = APIRouter()
 audio_editing_service = AudioEditingService()
 
+# Every endpoint takes either an uploaded audio_file or an audio_path that
+# references stored media (e.g. "/media/audio/x.mp3"), read in place.
+
 @router.post("/trim")
 async def trim_audio(
-    audio_file: UploadFile = File(...),
+    audio_file: Optional[UploadFile] = File(None),
+    audio_path: Optional[str] = Form(None),
     start_time: float = Form(...),
     end_time: float = Form(...),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Trim audio from start_time to end_time"""
+    temp_files = []
     try:
-        audio_dir = Path(settings.MEDIA_STORAGE_PATH) / "audio"
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_input = audio_dir / f"temp_{os.urandom(8).hex()}.mp3"
-        with open(temp_input, "wb") as f:
-            content = await audio_file.read()
-            f.write(content)
-        
-        try:
-            output_path = audio_editing_service.trim_audio(
-                str(temp_input),
-                start_time,
-                end_time
-            )
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to trim audio")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_input.exists():
-                temp_input.unlink()
-                
+        input_path = await resolve_input(audio_file, audio_path, "audio", temp_files, suffix=".mp3")
+
+        return await run_edit_job(
+            "trim_audio",
+            audio_editing_service.trim_audio,
+            str(input_path),
+            start_time,
+            end_time,
+            temp_files=temp_files,
+            error_detail="Failed to trim audio",
+            background=background,
+            sid=sid,
+            op_class="audio",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/merge")
 async def merge_audio(
     request: Request,
 ):
-    """Merge multiple audio files into one"""
+    """
+    Merge multiple audio files into one (uploaded audio_files and/or stored audio_paths)
+
+    Compatible MP3s are joined without re-encoding; an optional `crossfade`
+    (seconds) blends consecutive files in a single encode.
+    """
+    temp_inputs = []
     try:
         form = await request.form()
         audio_files = form.getlist("audio_files")  # Get list of files with field name "audio_files"
-        
-        if not audio_files or len(audio_files) < 2:
-            raise HTTPException(status_code=400, detail="At least 2 audio files required")
-        
-        audio_dir = Path(settings.MEDIA_STORAGE_PATH) / "audio"
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_inputs = []
+        audio_paths = form.getlist("audio_paths")  # References to stored audio, merged first
+        background = str(form.get("background", "false")).lower() in ("1", "true", "yes", "on")
+        sid = form.get("sid")
         try:
-            for audio_file in audio_files:
-                if isinstance(audio_file, UploadFile):
-                    temp_input = audio_dir / f"temp_{os.urandom(8).hex()}.mp3"
-                    with open(temp_input, "wb") as f:
-                        content = await audio_file.read()
-                        f.write(content)
-                    temp_inputs.append(str(temp_input))
-            
-            if len(temp_inputs) < 2:
-                raise HTTPException(status_code=400, detail="At least 2 audio files required")
-            
-            output_path = audio_editing_service.merge_audio_files(temp_inputs)
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to merge audio")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            for temp_input in temp_inputs:
-                if os.path.exists(temp_input):
-                    os.unlink(temp_input)
-                
+            crossfade = float(form.get("crossfade") or 0)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="crossfade must be a number")
+        if crossfade < 0:
+            raise HTTPException(status_code=400, detail="crossfade must not be negative")
+
+        if len(audio_files) + len(audio_paths) < 2:
+            raise HTTPException(status_code=400, detail="At least 2 audio files required")
+
+        inputs = []
+        for audio_path in audio_paths:
+            inputs.append(str(await resolve_input(None, str(audio_path), "audio", temp_inputs)))
+        for audio_file in audio_files:
+            if isinstance(audio_file, UploadFile):
+                inputs.append(str(await resolve_input(audio_file, None, "audio", temp_inputs, suffix=".mp3")))
+
+        if len(inputs) < 2:
+            raise HTTPException(status_code=400, detail="At least 2 audio files required")
+
+        return await run_edit_job(
+            "merge_audio_files",
+            audio_editing_service.merge_audio_files,
+            inputs,
+            crossfade,
+            temp_files=temp_inputs,
+            error_detail="Failed to merge audio",
+            background=background,
+            sid=sid,
+            op_class="audio",
+        )
     except HTTPException:
+        remove_files(temp_inputs)
         raise
     except Exception as e:
+        remove_files(temp_inputs)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/fade-in")
 async def fade_in_audio(
-    audio_file: UploadFile = File(...),
+    audio_file: Optional[UploadFile] = File(None),
+    audio_path: Optional[str] = Form(None),
     fade_duration: float = Form(...),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Apply fade in effect to audio"""
+    temp_files = []
     try:
-        audio_dir = Path(settings.MEDIA_STORAGE_PATH) / "audio"
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_input = audio_dir / f"temp_{os.urandom(8).hex()}.mp3"
-        with open(temp_input, "wb") as f:
-            content = await audio_file.read()
-            f.write(content)
-        
-        try:
-            output_path = audio_editing_service.apply_fade_in(str(temp_input), fade_duration)
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to apply fade in")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_input.exists():
-                temp_input.unlink()
-                
+        input_path = await resolve_input(audio_file, audio_path, "audio", temp_files, suffix=".mp3")
+
+        return await run_edit_job(
+            "apply_fade_in",
+            audio_editing_service.apply_fade_in,
+            str(input_path),
+            fade_duration,
+            temp_files=temp_files,
+            error_detail="Failed to apply fade in",
+            background=background,
+            sid=sid,
+            op_class="audio",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/fade-out")
 async def fade_out_audio(
-    audio_file: UploadFile = File(...),
+    audio_file: Optional[UploadFile] = File(None),
+    audio_path: Optional[str] = Form(None),
     fade_duration: float = Form(...),
     audio_duration: Optional[float] = Form(None),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Apply fade out effect to audio"""
+    temp_files = []
     try:
-        audio_dir = Path(settings.MEDIA_STORAGE_PATH) / "audio"
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_input = audio_dir / f"temp_{os.urandom(8).hex()}.mp3"
-        with open(temp_input, "wb") as f:
-            content = await audio_file.read()
-            f.write(content)
-        
-        try:
-            output_path = audio_editing_service.apply_fade_out(
-                str(temp_input),
-                fade_duration,
-                audio_duration
-            )
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to apply fade out")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_input.exists():
-                temp_input.unlink()
-                
+        input_path = await resolve_input(audio_file, audio_path, "audio", temp_files, suffix=".mp3")
+
+        return await run_edit_job(
+            "apply_fade_out",
+            audio_editing_service.apply_fade_out,
+            str(input_path),
+            fade_duration,
+            audio_duration,
+            temp_files=temp_files,
+            error_detail="Failed to apply fade out",
+            background=background,
+            sid=sid,
+            op_class="audio",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/fade-in-out")
 async def fade_in_out_audio(
-    audio_file: UploadFile = File(...),
+    audio_file: Optional[UploadFile] = File(None),
+    audio_path: Optional[str] = Form(None),
     fade_in_duration: float = Form(...),
     fade_out_duration: float = Form(...),
     audio_duration: Optional[float] = Form(None),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Apply fade in and fade out effects to audio"""
+    temp_files = []
     try:
-        audio_dir = Path(settings.MEDIA_STORAGE_PATH) / "audio"
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_input = audio_dir / f"temp_{os.urandom(8).hex()}.mp3"
-        with open(temp_input, "wb") as f:
-            content = await audio_file.read()
-            f.write(content)
-        
-        try:
-            output_path = audio_editing_service.apply_fade_in_out(
-                str(temp_input),
-                fade_in_duration,
-                fade_out_duration,
-                audio_duration
-            )
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to apply fade in/out")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_input.exists():
-                temp_input.unlink()
-                
+        input_path = await resolve_input(audio_file, audio_path, "audio", temp_files, suffix=".mp3")
+
+        return await run_edit_job(
+            "apply_fade_in_out",
+            audio_editing_service.apply_fade_in_out,
+            str(input_path),
+            fade_in_duration,
+            fade_out_duration,
+            audio_duration,
+            temp_files=temp_files,
+            error_detail="Failed to apply fade in/out",
+            background=background,
+            sid=sid,
+            op_class="audio",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/peaks")
+async def waveform_peaks(
+    audio_path: str = Query(..., description="Stored audio, e.g. /media/audio/x.mp3"),
+    start: float = Query(0.0, ge=0, description="Range start in seconds"),
+    end: Optional[float] = Query(None, ge=0, description="Range end in seconds (default: end of file)"),
+    width: int = Query(1000, ge=1, le=20000, description="Pixels to draw; at least this many peaks are returned"),
+    format: str = Query("json", description="json, or binary for raw interleaved int8 min/max pairs"),
+):
+    """
+    Waveform min/max peaks of stored audio at the zoom level for [start, end) and width
+
+    Peaks are precomputed when audio is uploaded or produced by an edit, so
+    this is normally a slice of a cached file. Values are int8 (-128..127).
+    """
+    if format not in ("json", "binary"):
+        raise HTTPException(status_code=400, detail="format must be json or binary")
+    path = media_service.resolve_media_path(audio_path, "audio")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Media not found: {audio_path}")
+
+    try:
+        result = await waveform_service.get(path, start, end, width)
+    except SchedulerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except SchedulerClosed as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except WaveformDecodeError:
+        raise HTTPException(status_code=415, detail="Source is not readable audio")
+
+    peaks = result.pop("peaks")
+    if format == "binary":
+        return Response(
+            content=peaks.tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Peaks-Level": str(result["level"]),
+                "X-Peaks-Per-Second": str(result["peaks_per_second"]),
+                "X-Peaks-Start": str(result["start"]),
+                "X-Audio-Duration": str(result["duration"]),
+            },
+        )
+    result["peaks"] = peaks.tolist()
+    return result
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models import BibleStory
+from app.routes.pagination import paginate
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -25,15 +26,19 @@ router = APIRouter()
 
 @router.get("/", response_model=List[BibleStoryResponse])
 async def list_bible_stories(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """List all bible stories"""
     from sqlalchemy import select
-    result = await db.execute(select(BibleStory).offset(skip).limit(limit))
-    stories = result.scalars().all()
-    return stories
+    return await paginate(
+        db, select(BibleStory), response, [BibleStory.id],
+        cursor=cursor, skip=skip, limit=limit, include_total=include_total
+    )
 
 
 @router.get("/{story_id}", response_model=BibleStoryResponse)
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.database import get_db
 from app.models import CommunityPost, User, Like, Comment
+from app.services.media_service import MediaService
+from app.services.placeholder_service import placeholder_service
+from app.routes.pagination import paginate
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -15,6 +18,8 @@ class CommunityPostResponse(BaseModel):
     title: str
     content: str
     image_url: Optional[str] = None
+    image_blurhash: Optional[str] = None
+    image_color: Optional[str] = None
     category: str
     likes_count: int
     comments_count: int
@@ -33,17 +38,21 @@ class CommunityPostCreate(BaseModel):
 
 
 router = APIRouter()
+media_service = MediaService()
 
 
 @router.get("/posts", response_model=List[CommunityPostResponse])
 async def list_posts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = None,
     current_user_id: int = 1,  # TODO: get from auth
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """List all community posts with user info and like status"""
+    """List community posts, newest first, with user info and like status"""
     try:
         from sqlalchemy import select, and_
         from sqlalchemy.orm import selectinload
@@ -54,9 +63,12 @@ async def list_posts(
         if category:
             query = query.where(CommunityPost.category == category)
         
-        query = query.order_by(CommunityPost.created_at.desc()).offset(skip).limit(limit)
-        result = await db.execute(query)
-        posts = result.scalars().all()
+        # Newest first by id: ids follow created_at (set to now() on insert) and,
+        # unlike the stored timestamp text, compare exactly against a cursor
+        posts = await paginate(
+            db, query, response, [CommunityPost.id], descending=True,
+            cursor=cursor, skip=skip, limit=limit, include_total=include_total
+        )
         
         # Build response with user info and like status
         response_posts = []
@@ -88,6 +100,8 @@ async def list_posts(
                     title=post.title,
                     content=post.content,
                     image_url=post.image_url,
+                    image_blurhash=post.image_blurhash,
+                    image_color=post.image_color,
                     category=post.category,
                     likes_count=post.likes_count,
                     comments_count=post.comments_count,
@@ -106,6 +120,8 @@ async def list_posts(
                     title=post.title,
                     content=post.content,
                     image_url=post.image_url,
+                    image_blurhash=post.image_blurhash,
+                    image_color=post.image_color,
                     category=post.category,
                     likes_count=post.likes_count,
                     comments_count=post.comments_count,
@@ -114,6 +130,8 @@ async def list_posts(
                 ))
         
         return response_posts
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in list_posts: {e}")
         import traceback
@@ -130,6 +148,14 @@ async def create_post(
     from sqlalchemy.orm import selectinload
     
     db_post = CommunityPost(user_id=1, **post.model_dump())  # TODO: get from auth
+    if post.image_url:
+        # Computed at upload; copied onto the post so the feed needs no lookups
+        image_path = media_service.resolve_media_path(post.image_url, "images")
+        if image_path is not None:
+            placeholders = await placeholder_service.get(f"/media/images/{image_path.name}", image_path)
+            if placeholders:
+                db_post.image_blurhash = placeholders["blurhash"]
+                db_post.image_color = placeholders["color"]
     db.add(db_post)
     await db.commit()
     await db.refresh(db_post)
@@ -146,6 +172,8 @@ async def create_post(
         title=db_post.title,
         content=db_post.content,
         image_url=db_post.image_url,
+        image_blurhash=db_post.image_blurhash,
+        image_color=db_post.image_color,
         category=db_post.category,
         likes_count=db_post.likes_count,
         comments_count=db_post.comments_count,
@@ -0,0 +1,146 @@
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+import os
+from app.config import settings
+from app.services.job_service import job_service, JobServiceClosed, JobStatus
+from app.services.media_scheduler import Priority, SchedulerBusy
+from app.services.edit_cache import edit_cache, media_url_to_path
+from app.services.faststart_service import faststart_service
+from app.services.media_store import media_store
+from app.services.storage_janitor import storage_janitor
+from app.services.waveform_service import waveform_service
+from app.services.media_service import MediaService, UploadTooLarge, UPLOAD_LIMITS, stream_upload
+
+media_service = MediaService()
+
+
+async def save_temp_upload(upload: UploadFile, kind: str, prefix: str = "temp", suffix: str = ".mp4") -> Path:
+    """Stream an uploaded file to a temp file under media/<kind>"""
+    temp_path = Path(settings.MEDIA_STORAGE_PATH) / kind / f"{prefix}_{os.urandom(8).hex()}{suffix}"
+    try:
+        _, sha256 = await stream_upload(upload, temp_path, UPLOAD_LIMITS[kind]())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    # Hashed during the copy, so the edit cache doesn't read the file again
+    edit_cache.remember_hash(str(temp_path), sha256)
+    return temp_path
+
+
+async def resolve_input(
+    upload: Optional[UploadFile],
+    media_path: Optional[str],
+    kind: str,
+    temp_files: List[Path],
+    prefix: str = "temp",
+    suffix: str = ".mp4"
+) -> Path:
+    """
+    Get a local path for an edit input
+
+    Stored media referenced by media_path (e.g. /media/video/x.mp4 from an
+    earlier upload or edit) is read in place. Otherwise the upload is written
+    to a temp file, which is appended to temp_files.
+    """
+    if media_path:
+        path = media_service.resolve_media_path(media_path, kind)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"Media not found: {media_path}")
+        storage_janitor.touch(path)
+        return path
+
+    if upload is None:
+        raise HTTPException(status_code=400, detail=f"Provide either a {kind} file or a {kind}_path")
+
+    temp_path = await save_temp_upload(upload, kind, prefix, suffix)
+    temp_files.append(temp_path)
+    return temp_path
+
+
+def edit_result(output_path: Optional[str]) -> Optional[dict]:
+    """Build the response body for an editing service output path"""
+    if not output_path:
+        return None
+    return {
+        "url": output_path,
+        "filename": Path(output_path).name,
+        "path": output_path
+    }
+
+
+def remove_files(paths: Iterable[Any]):
+    for path in paths:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+async def run_edit_job(
+    operation: str,
+    func: Callable[..., Optional[str]],
+    *args,
+    temp_files: Iterable[Any] = (),
+    error_detail: str = "Edit failed",
+    background: bool = False,
+    sid: Optional[str] = None,
+    op_class: str = "video"
+):
+    """
+    Run an editing service call through the media scheduler
+
+    With background=True the job is only queued and a 202 with the job status
+    is returned; the client polls /jobs/{job_id}. Otherwise the request waits
+    for the job without blocking the event loop and returns the same body the
+    synchronous endpoints have always returned. Temp files are removed when
+    the job finishes. Progress is pushed over socket.io to `sid` (and to
+    anyone subscribed to the job) and is available as SSE on
+    /jobs/{job_id}/events.
+
+    Waiting requests run in the interactive lane, background jobs in the
+    batch lane. A full queue is answered with 429 and Retry-After.
+    """
+    temp_files = [str(path) for path in temp_files]
+
+    def task():
+        # Identical outputs share one blob in the media store
+        url = media_store.adopt(func(*args))
+        if url and url.startswith("/media/"):
+            # Cached outputs handed out again count as used for the janitor
+            storage_janitor.touch(media_url_to_path(url))
+        if url and url.startswith("/media/video/"):
+            faststart_service.schedule(url)
+        elif url and url.startswith("/media/audio/"):
+            # The editor redraws the new output from its peaks
+            output_path = media_service.resolve_media_path(url, "audio")
+            if output_path is not None:
+                waveform_service.schedule(url, output_path)
+        return edit_result(url)
+
+    try:
+        job = job_service.submit(
+            operation,
+            task,
+            cleanup=temp_files,
+            error_detail=error_detail,
+            sid=sid,
+            op_class=op_class,
+            priority=Priority.BATCH if background else Priority.INTERACTIVE
+        )
+    except SchedulerBusy as e:
+        remove_files(temp_files)
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except JobServiceClosed as e:
+        remove_files(temp_files)
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if background:
+        return JSONResponse(status_code=202, content=job.to_dict())
+
+    await job_service.wait(job)
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=500, detail=job.error or error_detail)
+    return job.result
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.services.image_service import image_service
+from app.services.media_scheduler import SchedulerBusy
+from app.services.media_server import media_response
+from app.services.media_service import MediaService
+
+router = APIRouter()
+media_service = MediaService()
+
+
+@router.get("/resize")
+async def resize_image(
+    request: Request,
+    src: str = Query(..., description="Stored image, e.g. /media/images/cover.jpg"),
+    w: int = Query(..., ge=1, le=4096, description="Display width in pixels (snapped up to a bucket)"),
+    format: str = Query("auto", description="webp, jpeg or auto (WebP when the client accepts it)"),
+):
+    """Resized derivative of a stored image (cover images, avatars, post photos)"""
+    vary_accept = format == "auto"
+    if vary_accept:
+        format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    if format not in image_service.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be webp, jpeg or auto")
+
+    source = media_service.resolve_media_path(src, "images")
+    if source is None:
+        raise HTTPException(status_code=404, detail=f"Image not found: {src}")
+
+    try:
+        path = await image_service.get(source, w, format)
+    except SchedulerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except OSError:
+        raise HTTPException(status_code=415, detail="Source is not a readable image")
+
+    response = media_response(request, path, "")
+    if vary_accept:
+        response.headers["Vary"] = "Accept"
+    return response
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.database import get_db
 from app.models import LiveStream
+from app.routes.pagination import paginate
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -47,19 +48,25 @@ jitsi_service = JitsiService()
 
 @router.get("/streams", response_model=List[LiveStreamResponse])
 async def list_streams(
+    response: Response,
     status: str = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """List all live streams"""
+    """List live streams, newest first"""
     from sqlalchemy import select
     query = select(LiveStream)
     
     if status:
         query = query.where(LiveStream.status == status)
     
-    result = await db.execute(query)
-    streams = result.scalars().all()
-    return streams
+    return await paginate(
+        db, query, response, [LiveStream.id], descending=True,
+        cursor=cursor, skip=skip, limit=limit, include_total=include_total
+    )
 
 
 @router.post("/streams", response_model=LiveStreamResponse)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Request
+from pathlib import Path
+from app.config import settings
+from app.services.media_server import media_response
+from app.services.storage_janitor import storage_janitor
+
+router = APIRouter()
+
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_media(file_path: str, request: Request):
+    """Serve stored media with Range, ETag and Cache-Control support (replaces StaticFiles)"""
+    parts = Path(file_path).parts
+    # Blobs, hidden state (.cache, .uploads, .part files) and traversal are never served
+    if not parts or parts[0] == "blobs" or any(part.startswith(".") for part in parts):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    media_root = Path(settings.MEDIA_STORAGE_PATH).resolve()
+    path = (media_root / file_path).resolve()
+    if media_root not in path.parents or not path.is_file():
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    storage_janitor.touch(path)
+    return media_response(request, path, f"/media/{file_path}")
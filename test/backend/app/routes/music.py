@@ -1,19 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models import MusicTrack
 from app.schemas.music import MusicTrackCreate, MusicTrackResponse
+from app.routes.pagination import paginate
+from app.services.media_service import MediaService
+from app.services.placeholder_service import placeholder_service
 
 router = APIRouter()
+media_service = MediaService()
 
 
 @router.get("/tracks", response_model=List[MusicTrackResponse])
 async def list_music_tracks(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     genre: str = None,
     artist: str = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """List all music tracks with optional filtering"""
@@ -25,10 +32,10 @@ async def list_music_tracks(
     if artist:
         query = query.where(MusicTrack.artist == artist)
     
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    tracks = result.scalars().all()
-    return tracks
+    return await paginate(
+        db, query, response, [MusicTrack.id],
+        cursor=cursor, skip=skip, limit=limit, include_total=include_total
+    )
 
 
 @router.get("/tracks/{track_id}", response_model=MusicTrackResponse)
@@ -49,6 +56,14 @@ async def create_music_track(
 ):
     """Create a new music track"""
     db_track = MusicTrack(**track.model_dump())
+    if track.cover_image:
+        # Computed at upload; copied onto the track so the catalog needs no lookups
+        cover_path = media_service.resolve_media_path(track.cover_image, "images")
+        if cover_path is not None:
+            placeholders = await placeholder_service.get(f"/media/images/{cover_path.name}", cover_path)
+            if placeholders:
+                db_track.cover_blurhash = placeholders["blurhash"]
+                db_track.cover_color = placeholders["color"]
     db.add(db_track)
     await db.commit()
     await db.refresh(db_track)
@@ -0,0 +1,102 @@
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, Select, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+
+# Cached totals: (statement, parameters) -> (expires at, count)
+_totals: Dict[Tuple[str, Tuple], Tuple[float, int]] = {}
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort key of the last row of a page"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return encoded.decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Sort key values from a cursor made by encode_cursor for the same columns
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong number of values")
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    response: Response,
+    order_by: Sequence[Any],
+    descending: bool = False,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    include_total: bool = False,
+) -> List[Any]:
+    """
+    One page of a list query, by cursor (keyset) or by offset
+
+    Rows are ordered by order_by, which must be unique together (end with
+    the primary key) so the order is stable. Avoid timestamp columns: SQLite
+    keeps them as text (CURRENT_TIMESTAMP has no fraction, bound values
+    do), so rows tied with the cursor would compare as before it. With a
+    cursor the page starts right after the row it points at, so deep pages
+    cost the same as the first one; skip is still honoured without a cursor
+    for older clients.
+    When there are more rows the cursor for the next page is returned in
+    the X-Next-Cursor header. include_total adds X-Total-Count, an
+    approximate total cached for PAGINATION_TOTAL_TTL seconds.
+    """
+    if include_total:
+        response.headers["X-Total-Count"] = str(await approximate_count(db, query))
+
+    if cursor:
+        values = decode_cursor(cursor, order_by)
+        if len(order_by) == 1:
+            key, bound = order_by[0], values[0]
+        else:
+            key = tuple_(*order_by)
+            bound = tuple_(*[literal(value, type_=column.type) for column, value in zip(order_by, values)])
+        query = query.where(key < bound if descending else key > bound)
+    elif skip:
+        query = query.offset(skip)
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in order_by])
+    rows = list((await db.execute(query.limit(limit + 1))).scalars().all())
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor([getattr(rows[-1], column.key) for column in order_by])
+    return rows
+
+
+async def approximate_count(db: AsyncSession, query: Select) -> int:
+    """Row count of a list query, cached briefly (totals need not be exact)"""
+    compiled = query.compile()
+    key = (str(compiled), tuple(sorted((name, repr(value)) for name, value in compiled.params.items())))
+    now = time.monotonic()
+    cached = _totals.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    count = (await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))).scalar_one()
+    if len(_totals) > 1000:
+        for stale in [k for k, (expires, _) in _totals.items() if expires <= now]:
+            del _totals[stale]
+    _totals[key] = (now + settings.PAGINATION_TOTAL_TTL, count)
+    return count
@@ -1,24 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models import Playlist, PlaylistItem
 from app.schemas.playlist import PlaylistCreate, PlaylistResponse
+from app.routes.pagination import paginate
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[PlaylistResponse])
 async def list_playlists(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """List all playlists"""
     from sqlalchemy import select
-    result = await db.execute(select(Playlist).offset(skip).limit(limit))
-    playlists = result.scalars().all()
-    return playlists
+    return await paginate(
+        db, select(Playlist), response, [Playlist.id],
+        cursor=cursor, skip=skip, limit=limit, include_total=include_total
+    )
 
 
 @router.get("/{playlist_id}", response_model=PlaylistResponse)
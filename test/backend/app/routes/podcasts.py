@@ -1,24 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Form, HTTPException, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Set, Tuple
+import asyncio
 from app.database import get_db
+from app.database.connection import AsyncSessionLocal
 from app.models import Podcast
+from app.routes.pagination import paginate
 from app.schemas.podcast import PodcastCreate, PodcastResponse
+from app.services.hls_service import hls_service
+from app.services.job_service import job_service, Job, JobServiceClosed, JobStatus
+from app.services.media_scheduler import Priority, SchedulerBusy
+from app.services.media_service import MediaService
+from app.services.media_store import media_store
+from app.services.placeholder_service import placeholder_service
+from app.services.preview_service import preview_service
 
 router = APIRouter()
+media_service = MediaService()
+
+# Keeps the tasks that save finished job results alive until they complete
+_job_tasks: Set[asyncio.Task] = set()
 
 
 @router.get("/", response_model=List[PodcastResponse])
 async def list_podcasts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """List all podcasts"""
+    """List all podcasts (pass X-Next-Cursor back as cursor for the next page)"""
     from sqlalchemy import select
-    result = await db.execute(select(Podcast).offset(skip).limit(limit))
-    podcasts = result.scalars().all()
-    return podcasts
+    return await paginate(
+        db, select(Podcast), response, [Podcast.id],
+        cursor=cursor, skip=skip, limit=limit, include_total=include_total
+    )
 
 
 @router.get("/{podcast_id}", response_model=PodcastResponse)
@@ -37,14 +57,231 @@ async def create_podcast(
     podcast: PodcastCreate,
     db: AsyncSession = Depends(get_db)
 ):
-    """Create a new podcast"""
+    """
+    Create a new podcast
+
+    Media processed at ingest is linked right away: the HLS master playlist,
+    the scrub sprite index and the poster (as cover image if there is none)
+    are copied from the media store. Whatever ingest has not produced yet
+    is generated in background jobs (outputs are keyed by content hash, so
+    nothing is encoded twice once it exists).
+    """
     db_podcast = Podcast(**podcast.model_dump())
+    media = _podcast_source(db_podcast)
+    if media is not None:
+        kind, source = media
+        flags = media_store.flags(f"/media/{kind}/{source.name}")
+        db_podcast.hls_url = flags.get("hls")
+        if kind == "video" and flags.get("preview_vtt") and flags.get("poster"):
+            apply_previews(db_podcast, {"preview_vtt": flags["preview_vtt"], "poster": flags["poster"]})
+    if db_podcast.cover_image and not db_podcast.cover_blurhash:
+        # Computed at upload; copied onto the podcast so the catalog needs no lookups
+        cover_path = media_service.resolve_media_path(db_podcast.cover_image, "images")
+        if cover_path is not None:
+            placeholders = await placeholder_service.get(f"/media/images/{cover_path.name}", cover_path)
+            if placeholders:
+                db_podcast.cover_blurhash = placeholders["blurhash"]
+                db_podcast.cover_color = placeholders["color"]
     db.add(db_podcast)
     await db.commit()
     await db.refresh(db_podcast)
+
+    if media is not None and db_podcast.hls_url is None:
+        _queue_ingest_fallback(
+            db_podcast.id,
+            "package_hls",
+            hls_service.package,
+            str(media[1]),
+            error_detail="Failed to package HLS",
+            apply=apply_hls
+        )
+    if media is not None and media[0] == "video" and db_podcast.preview_vtt_url is None:
+        _queue_ingest_fallback(
+            db_podcast.id,
+            "generate_previews",
+            preview_service.generate,
+            f"/media/video/{media[1].name}",
+            str(media[1]),
+            error_detail="Failed to generate previews",
+            apply=apply_previews
+        )
     return db_podcast
 
 
+@router.post("/{podcast_id}/hls")
+async def package_podcast_hls(
+    podcast_id: int,
+    sid: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Package the podcast's video (or audio) as HLS in a background job
+
+    Returns 202 with the job status; follow it on /jobs/{job_id}. When the
+    job completes, the master playlist URL is stored in hls_url. Podcasts
+    get hls_url when they are created, so this is only needed to re-package
+    (for uploads it just links the package that already exists).
+    """
+    from sqlalchemy import select
+    result = await db.execute(select(Podcast).where(Podcast.id == podcast_id))
+    podcast = result.scalar_one_or_none()
+    if not podcast:
+        raise HTTPException(status_code=404, detail="Podcast not found")
+    if not podcast.video_url and not podcast.audio_url:
+        raise HTTPException(status_code=400, detail="Podcast has no media to package")
+
+    media = _podcast_source(podcast)
+    if media is None:
+        raise HTTPException(status_code=404, detail="Podcast media file not found")
+
+    return _submit_podcast_job(
+        podcast_id,
+        "package_hls",
+        hls_service.package,
+        str(media[1]),
+        error_detail="Failed to package HLS",
+        sid=sid,
+        apply=apply_hls
+    )
+
+
+@router.post("/{podcast_id}/previews")
+async def generate_podcast_previews(
+    podcast_id: int,
+    sid: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Generate the poster frame and scrub sprites of the podcast's video
+
+    Returns 202 with the job status. When the job completes, preview_vtt_url
+    is stored and the poster becomes the cover image if there is none yet.
+    Podcasts get their previews when they are created, so this is only
+    needed to regenerate them.
+    """
+    from sqlalchemy import select
+    result = await db.execute(select(Podcast).where(Podcast.id == podcast_id))
+    podcast = result.scalar_one_or_none()
+    if not podcast:
+        raise HTTPException(status_code=404, detail="Podcast not found")
+    if not podcast.video_url:
+        raise HTTPException(status_code=400, detail="Podcast has no video")
+
+    source = media_service.resolve_media_path(podcast.video_url, "video")
+    if source is None:
+        raise HTTPException(status_code=404, detail="Podcast media file not found")
+
+    return _submit_podcast_job(
+        podcast_id,
+        "generate_previews",
+        preview_service.generate,
+        f"/media/video/{source.name}",
+        str(source),
+        error_detail="Failed to generate previews",
+        sid=sid,
+        apply=apply_previews
+    )
+
+
+def apply_hls(podcast: Podcast, master_url: Optional[str]):
+    """Store a packaged master playlist on a podcast"""
+    if master_url:
+        podcast.hls_url = master_url
+
+
+def apply_previews(podcast: Podcast, previews: Optional[dict]):
+    """Copy generated previews onto a podcast (keeps an existing cover image)"""
+    if not previews:
+        return
+    podcast.preview_vtt_url = previews["preview_vtt"]
+    if not podcast.cover_image:
+        podcast.cover_image = previews["poster"]
+        podcast.cover_blurhash = previews.get("blurhash")
+        podcast.cover_color = previews.get("color")
+
+
+def _podcast_source(podcast: Podcast) -> Optional[Tuple[str, Path]]:
+    """(kind, path) of the podcast's video, or its audio, if the file exists"""
+    if podcast.video_url:
+        source = media_service.resolve_media_path(podcast.video_url, "video")
+        return ("video", source) if source is not None else None
+    if podcast.audio_url:
+        source = media_service.resolve_media_path(podcast.audio_url, "audio")
+        return ("audio", source) if source is not None else None
+    return None
+
+
+def _submit_podcast_job(
+    podcast_id: int,
+    operation: str,
+    func: Callable,
+    *args,
+    error_detail: str,
+    sid: Optional[str],
+    apply: Callable[[Podcast, Any], None]
+) -> JSONResponse:
+    """Queue a batch media job for a podcast and answer 202 with its status"""
+    try:
+        job = _queue_podcast_job(podcast_id, operation, func, *args, error_detail=error_detail, sid=sid, apply=apply)
+    except SchedulerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except JobServiceClosed as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+
+def _queue_ingest_fallback(
+    podcast_id: int,
+    operation: str,
+    func: Callable,
+    *args,
+    error_detail: str,
+    apply: Callable[[Podcast, Any], None]
+):
+    """Queue a job for an ingest result a new podcast is missing; skipped when the scheduler is busy"""
+    try:
+        _queue_podcast_job(podcast_id, operation, func, *args, error_detail=error_detail, sid=None, apply=apply)
+    except (SchedulerBusy, JobServiceClosed) as e:
+        print(f"Deferring {operation} for podcast {podcast_id}: {e}")
+
+
+def _queue_podcast_job(
+    podcast_id: int,
+    operation: str,
+    func: Callable,
+    *args,
+    error_detail: str,
+    sid: Optional[str],
+    apply: Callable[[Podcast, Any], None]
+) -> Job:
+    """Queue a batch media job for a podcast; apply(podcast, result) is saved when it completes"""
+    job = job_service.submit(
+        operation,
+        func,
+        *args,
+        error_detail=error_detail,
+        sid=sid,
+        op_class="video",
+        priority=Priority.BATCH
+    )
+    task = asyncio.create_task(_apply_job_result(job, podcast_id, apply))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return job
+
+
+async def _apply_job_result(job: Job, podcast_id: int, apply: Callable[[Podcast, Any], None]):
+    """Save a podcast job's result once it has finished"""
+    await job_service.wait(job)
+    if job.status != JobStatus.COMPLETED:
+        return
+    async with AsyncSessionLocal() as db:
+        podcast = await db.get(Podcast, podcast_id)
+        if podcast is not None:
+            apply(podcast, job.result)
+            await db.commit()
+
+
 @router.delete("/{podcast_id}")
 async def delete_podcast(podcast_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a podcast"""
@@ -0,0 +1,168 @@
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from pathlib import Path
+from typing import Dict, Optional
+import base64
+import binascii
+import uuid
+from app.services.media_service import UploadTooLarge
+from app.services.resumable_upload_service import (
+    resumable_upload_service,
+    UploadNotFound,
+    UploadOffsetMismatch,
+    UploadInProgress,
+)
+
+router = APIRouter()
+
+# Resumable uploads (tus-style):
+#   POST   /upload/resumable/{kind}   Upload-Length, optional Upload-Metadata -> 201 + Location
+#   HEAD   /upload/resumable/{id}     -> Upload-Offset / Upload-Length
+#   PATCH  /upload/resumable/{id}     Upload-Offset, body = next bytes -> new Upload-Offset
+#   DELETE /upload/resumable/{id}     abort
+# After a dropped connection the client asks HEAD for the offset and PATCHes
+# from there. The PATCH that delivers the last byte returns the stored file.
+
+KINDS = {
+    "audio": ("audio", "audio/"),
+    "video": ("video", "video/"),
+    "image": ("images", "image/"),
+}
+
+OFFSET_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+def _parse_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Decode a tus Upload-Metadata header ("key base64value,key2 base64value")"""
+    metadata = {}
+    if not header:
+        return metadata
+    for pair in header.split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            value = base64.b64decode(parts[1]).decode("utf-8") if len(parts) > 1 else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail=f"Invalid Upload-Metadata value for {parts[0]}")
+        metadata[parts[0]] = value
+    return metadata
+
+
+def _offset_headers(meta: dict) -> Dict[str, str]:
+    return {
+        "Upload-Offset": str(meta["offset"]),
+        "Upload-Length": str(meta["length"]),
+        "Cache-Control": "no-store",
+    }
+
+
+def _get_upload(upload_id: str) -> dict:
+    try:
+        return resumable_upload_service.get(upload_id)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+@router.post("/{kind}", status_code=201)
+async def create_upload(
+    kind: str,
+    request: Request,
+    upload_length: int = Header(..., alias="Upload-Length"),
+    upload_metadata: Optional[str] = Header(None, alias="Upload-Metadata"),
+):
+    """Start a resumable upload; the file is sent with PATCH requests"""
+    if kind not in KINDS:
+        raise HTTPException(status_code=404, detail="Unknown upload type")
+    if upload_length <= 0:
+        raise HTTPException(status_code=400, detail="Upload-Length must be positive")
+    media_kind, type_prefix = KINDS[kind]
+
+    metadata = _parse_metadata(upload_metadata)
+    content_type = metadata.get("filetype")
+    if content_type and not content_type.startswith(type_prefix):
+        raise HTTPException(status_code=400, detail=f"File must be an {kind} file")
+
+    # Generate unique filename
+    file_extension = Path(metadata.get("filename", "")).suffix
+    filename = f"{uuid.uuid4()}{file_extension}"
+
+    try:
+        meta = resumable_upload_service.create(media_kind, upload_length, filename, content_type)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    location = str(request.url_for("upload_status", upload_id=meta["id"]))
+    return Response(
+        status_code=201,
+        headers={"Location": location, **_offset_headers(meta)}
+    )
+
+
+@router.head("/{upload_id}")
+async def upload_offset(upload_id: str):
+    """Current offset of an upload, for resuming"""
+    meta = _get_upload(upload_id)
+    return Response(status_code=200, headers=_offset_headers(meta))
+
+
+@router.get("/{upload_id}", name="upload_status")
+async def upload_status(upload_id: str):
+    """Upload progress as JSON"""
+    meta = _get_upload(upload_id)
+    return {
+        "id": meta["id"],
+        "filename": meta["filename"],
+        "offset": meta["offset"],
+        "length": meta["length"],
+    }
+
+
+@router.patch("/{upload_id}")
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    content_type: Optional[str] = Header(None),
+):
+    """Append the request body at Upload-Offset"""
+    if content_type != OFFSET_CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be {OFFSET_CONTENT_TYPE}")
+
+    try:
+        meta = await resumable_upload_service.append(upload_id, upload_offset, request.stream())
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except UploadInProgress:
+        raise HTTPException(status_code=423, detail="Upload is already receiving data")
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Chunk exceeds Upload-Length")
+
+    stored = meta.get("result")
+    if stored is None:
+        return Response(status_code=204, headers=_offset_headers(meta))
+
+    # Same body as the direct /upload endpoints
+    return JSONResponse(
+        headers=_offset_headers(meta),
+        content={
+            "filename": meta["filename"],
+            "url": stored["url"],
+            "content_type": meta["content_type"],
+            "size": stored["size"],
+            "sha256": stored["sha256"],
+        },
+    )
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str):
+    """Discard a partial upload"""
+    try:
+        resumable_upload_service.abort(upload_id)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return Response(status_code=204)
+
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pathlib import Path
 import uuid
-from app.services.media_service import MediaService
+from app.services.media_service import MediaService, UploadTooLarge
 
 router = APIRouter()
 media_service = MediaService()
@@ -20,13 +20,18 @@ async def upload_audio(
     file_extension = Path(file.filename).suffix
     filename = f"{uuid.uuid4()}{file_extension}"
     
-    # Save file
-    relative_path = await media_service.save_audio_file(file, filename)
+    # Stream file to disk
+    try:
+        stored = await media_service.save_upload(file, "audio", filename)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     
     return {
         "filename": filename,
-        "url": relative_path,
-        "content_type": file.content_type
+        "url": stored["url"],
+        "content_type": file.content_type,
+        "size": stored["size"],
+        "sha256": stored["sha256"]
     }
 
 
@@ -43,13 +48,18 @@ async def upload_video(
     file_extension = Path(file.filename).suffix
     filename = f"{uuid.uuid4()}{file_extension}"
     
-    # Save file
-    relative_path = await media_service.save_video_file(file, filename)
+    # Stream file to disk
+    try:
+        stored = await media_service.save_upload(file, "video", filename)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     
     return {
         "filename": filename,
-        "url": relative_path,
-        "content_type": file.content_type
+        "url": stored["url"],
+        "content_type": file.content_type,
+        "size": stored["size"],
+        "sha256": stored["sha256"]
     }
 
 
@@ -66,12 +76,17 @@ async def upload_image(
     file_extension = Path(file.filename).suffix
     filename = f"{uuid.uuid4()}{file_extension}"
     
-    # Save file
-    relative_path = await media_service.save_image_file(file, filename)
+    # Stream file to disk
+    try:
+        stored = await media_service.save_upload(file, "images", filename)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     
     return {
         "filename": filename,
-        "url": relative_path,
-        "content_type": file.content_type
+        "url": stored["url"],
+        "content_type": file.content_type,
+        "size": stored["size"],
+        "sha256": stored["sha256"]
     }
 
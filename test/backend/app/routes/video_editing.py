@@ -1,233 +1,279 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse
 from typing import Optional, List
-import tempfile
-import os
-from pathlib import Path
+import asyncio
+import json
 from app.services.video_editing_service import VideoEditingService
-from app.config import settings
+from app.services.probe_cache import probe_cache
+from app.routes.editing_utils import resolve_input, remove_files, run_edit_job
 
 router = APIRouter()
 video_editing_service = VideoEditingService()
 
+# Every endpoint takes either an uploaded file (video_file/audio_file) or a
+# reference to stored media (video_path/audio_path, e.g. "/media/video/x.mp4"),
+# which is read in place instead of being uploaded again.
+
 @router.post("/trim")
 async def trim_video(
-    video_file: UploadFile = File(...),
+    video_file: Optional[UploadFile] = File(None),
+    video_path: Optional[str] = Form(None),
     start_time: float = Form(...),
     end_time: float = Form(...),
+    mode: str = Form("copy"),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
-    """Trim video from start_time to end_time"""
+    """
+    Trim video from start_time to end_time
+
+    mode: "copy" (keyframe-aligned stream copy), "accurate" (full re-encode)
+    or "smart" (frame-accurate, re-encodes only the partial GOPs at the cuts)
+    """
+    if mode not in VideoEditingService.TRIM_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(VideoEditingService.TRIM_MODES)}")
+
+    temp_files = []
     try:
-        # Save uploaded file temporarily
-        media_dir = Path(settings.MEDIA_STORAGE_PATH) / "video"
-        media_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_input = media_dir / f"temp_{os.urandom(8).hex()}.mp4"
-        with open(temp_input, "wb") as f:
-            content = await video_file.read()
-            f.write(content)
-        
-        try:
-            output_path = video_editing_service.trim_video(
-                str(temp_input),
-                start_time,
-                end_time
-            )
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to trim video")
-            
-            # Return full path to file
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            # Clean up temp file
-            if temp_input.exists():
-                temp_input.unlink()
-                
+        input_path = await resolve_input(video_file, video_path, "video", temp_files)
+
+        return await run_edit_job(
+            "trim_video",
+            video_editing_service.trim_video,
+            str(input_path),
+            start_time,
+            end_time,
+            mode,
+            temp_files=temp_files,
+            error_detail="Failed to trim video",
+            background=background,
+            sid=sid,
+            op_class="video",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/remove-audio")
 async def remove_audio(
-    video_file: UploadFile = File(...),
+    video_file: Optional[UploadFile] = File(None),
+    video_path: Optional[str] = Form(None),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Remove audio track from video"""
+    temp_files = []
     try:
-        media_dir = Path(settings.MEDIA_STORAGE_PATH) / "video"
-        media_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_input = media_dir / f"temp_{os.urandom(8).hex()}.mp4"
-        with open(temp_input, "wb") as f:
-            content = await video_file.read()
-            f.write(content)
-        
-        try:
-            output_path = video_editing_service.remove_audio_track(str(temp_input))
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to remove audio")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_input.exists():
-                temp_input.unlink()
-                
+        input_path = await resolve_input(video_file, video_path, "video", temp_files)
+
+        return await run_edit_job(
+            "remove_audio_track",
+            video_editing_service.remove_audio_track,
+            str(input_path),
+            temp_files=temp_files,
+            error_detail="Failed to remove audio",
+            background=background,
+            sid=sid,
+            op_class="video",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/add-audio")
 async def add_audio(
-    video_file: UploadFile = File(...),
-    audio_file: UploadFile = File(...),
+    video_file: Optional[UploadFile] = File(None),
+    audio_file: Optional[UploadFile] = File(None),
+    video_path: Optional[str] = Form(None),
+    audio_path: Optional[str] = Form(None),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Add audio track to video"""
+    temp_files = []
     try:
-        media_dir = Path(settings.MEDIA_STORAGE_PATH) / "video"
-        audio_dir = Path(settings.MEDIA_STORAGE_PATH) / "audio"
-        media_dir.mkdir(parents=True, exist_ok=True)
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_video = media_dir / f"temp_video_{os.urandom(8).hex()}.mp4"
-        temp_audio = audio_dir / f"temp_audio_{os.urandom(8).hex()}.mp3"
-        
-        with open(temp_video, "wb") as f:
-            content = await video_file.read()
-            f.write(content)
-        
-        with open(temp_audio, "wb") as f:
-            content = await audio_file.read()
-            f.write(content)
-        
-        try:
-            output_path = video_editing_service.add_audio_track(
-                str(temp_video),
-                str(temp_audio)
-            )
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to add audio")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_video.exists():
-                temp_video.unlink()
-            if temp_audio.exists():
-                temp_audio.unlink()
-                
+        input_video = await resolve_input(video_file, video_path, "video", temp_files, prefix="temp_video")
+        input_audio = await resolve_input(audio_file, audio_path, "audio", temp_files, prefix="temp_audio", suffix=".mp3")
+
+        return await run_edit_job(
+            "add_audio_track",
+            video_editing_service.add_audio_track,
+            str(input_video),
+            str(input_audio),
+            temp_files=temp_files,
+            error_detail="Failed to add audio",
+            background=background,
+            sid=sid,
+            op_class="video",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/replace-audio")
 async def replace_audio(
-    video_file: UploadFile = File(...),
-    audio_file: UploadFile = File(...),
+    video_file: Optional[UploadFile] = File(None),
+    audio_file: Optional[UploadFile] = File(None),
+    video_path: Optional[str] = Form(None),
+    audio_path: Optional[str] = Form(None),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Replace audio track in video"""
+    temp_files = []
     try:
-        media_dir = Path(settings.MEDIA_STORAGE_PATH) / "video"
-        audio_dir = Path(settings.MEDIA_STORAGE_PATH) / "audio"
-        media_dir.mkdir(parents=True, exist_ok=True)
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_video = media_dir / f"temp_video_{os.urandom(8).hex()}.mp4"
-        temp_audio = audio_dir / f"temp_audio_{os.urandom(8).hex()}.mp3"
-        
-        with open(temp_video, "wb") as f:
-            content = await video_file.read()
-            f.write(content)
-        
-        with open(temp_audio, "wb") as f:
-            content = await audio_file.read()
-            f.write(content)
-        
-        try:
-            output_path = video_editing_service.replace_audio_track(
-                str(temp_video),
-                str(temp_audio)
-            )
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to replace audio")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_video.exists():
-                temp_video.unlink()
-            if temp_audio.exists():
-                temp_audio.unlink()
-                
+        input_video = await resolve_input(video_file, video_path, "video", temp_files, prefix="temp_video")
+        input_audio = await resolve_input(audio_file, audio_path, "audio", temp_files, prefix="temp_audio", suffix=".mp3")
+
+        return await run_edit_job(
+            "replace_audio_track",
+            video_editing_service.replace_audio_track,
+            str(input_video),
+            str(input_audio),
+            temp_files=temp_files,
+            error_detail="Failed to replace audio",
+            background=background,
+            sid=sid,
+            op_class="video",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/apply-filters")
 async def apply_filters(
-    video_file: UploadFile = File(...),
+    video_file: Optional[UploadFile] = File(None),
+    video_path: Optional[str] = Form(None),
     brightness: Optional[float] = Form(None),
     contrast: Optional[float] = Form(None),
     saturation: Optional[float] = Form(None),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
 ):
     """Apply filters to video"""
+    filters = {}
+    if brightness is not None:
+        filters['brightness'] = brightness
+    if contrast is not None:
+        filters['contrast'] = contrast
+    if saturation is not None:
+        filters['saturation'] = saturation
+
+    if not filters:
+        raise HTTPException(status_code=400, detail="No filters provided")
+
+    temp_files = []
     try:
-        media_dir = Path(settings.MEDIA_STORAGE_PATH) / "video"
-        media_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_input = media_dir / f"temp_{os.urandom(8).hex()}.mp4"
-        with open(temp_input, "wb") as f:
-            content = await video_file.read()
-            f.write(content)
-        
-        try:
-            filters = {}
-            if brightness is not None:
-                filters['brightness'] = brightness
-            if contrast is not None:
-                filters['contrast'] = contrast
-            if saturation is not None:
-                filters['saturation'] = saturation
-            
-            if not filters:
-                raise HTTPException(status_code=400, detail="No filters provided")
-            
-            output_path = video_editing_service.apply_filters(str(temp_input), filters)
-            
-            if not output_path:
-                raise HTTPException(status_code=500, detail="Failed to apply filters")
-            
-            full_path = Path(settings.MEDIA_STORAGE_PATH) / output_path.lstrip("/media/")
-            
-            return {
-                "url": output_path,
-                "filename": full_path.name,
-                "path": output_path
-            }
-        finally:
-            if temp_input.exists():
-                temp_input.unlink()
-                
+        input_path = await resolve_input(video_file, video_path, "video", temp_files)
+
+        return await run_edit_job(
+            "apply_filters",
+            video_editing_service.apply_filters,
+            str(input_path),
+            filters,
+            temp_files=temp_files,
+            error_detail="Failed to apply filters",
+            background=background,
+            sid=sid,
+            op_class="video",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
     except Exception as e:
+        remove_files(temp_files)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/render")
+async def render_edit_list(
+    operations: str = Form(...),
+    video_file: Optional[UploadFile] = File(None),
+    video_path: Optional[str] = Form(None),
+    audio_file: Optional[UploadFile] = File(None),
+    audio_path: Optional[str] = Form(None),
+    merge_files: Optional[List[UploadFile]] = File(None),
+    merge_paths: Optional[List[str]] = Form(None),
+    background: bool = Form(False),
+    sid: Optional[str] = Form(None),
+):
+    """
+    Render an ordered edit decision list in a single FFmpeg pass
+
+    `operations` is a JSON array such as
+    [{"type": "trim", "start": 2, "end": 30}, {"type": "eq", "brightness": 0.1},
+     {"type": "fade_in", "duration": 1}, {"type": "replace_audio"}]
+    """
+    try:
+        edit_list = json.loads(operations)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="operations must be a JSON array")
+    if not isinstance(edit_list, list):
+        raise HTTPException(status_code=400, detail="operations must be a JSON array")
+
+    merge_files = merge_files or []
+    merge_paths = merge_paths or []
+    try:
+        video_editing_service.validate_edit_list(
+            edit_list,
+            has_audio_file=audio_file is not None or bool(audio_path),
+            merge_count=len(merge_files) + len(merge_paths)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    temp_files = []
+    try:
+        input_video = await resolve_input(video_file, video_path, "video", temp_files, prefix="temp_video")
+
+        # Check the trims against the real duration now that the input is known
+        duration = await asyncio.get_running_loop().run_in_executor(None, probe_cache.duration, str(input_video))
+        try:
+            video_editing_service.validate_edit_list(
+                edit_list,
+                has_audio_file=audio_file is not None or bool(audio_path),
+                merge_count=len(merge_files) + len(merge_paths),
+                duration=duration
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        input_audio = None
+        if audio_file is not None or audio_path:
+            input_audio = await resolve_input(audio_file, audio_path, "audio", temp_files, prefix="temp_audio", suffix=".mp3")
+
+        merge_inputs = []
+        for merge_path in merge_paths:
+            merge_inputs.append(str(await resolve_input(None, merge_path, "video", temp_files)))
+        for merge_file in merge_files:
+            merge_inputs.append(str(await resolve_input(merge_file, None, "video", temp_files, prefix="temp_merge")))
+
+        return await run_edit_job(
+            "render_edit_list",
+            video_editing_service.render_edit_list,
+            str(input_video),
+            edit_list,
+            str(input_audio) if input_audio else None,
+            merge_inputs,
+            temp_files=temp_files,
+            error_detail="Failed to render edit list",
+            background=background,
+            sid=sid,
+            op_class="video",
+        )
+    except HTTPException:
+        remove_files(temp_files)
+        raise
+    except Exception as e:
+        remove_files(temp_files)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -6,6 +6,8 @@ from datetime import datetime
 class MusicTrackCreate(BaseModel):
     title: str
     artist: str
+    audio_url: str
+    cover_image: Optional[str] = None
     album: Optional[str] = None
     genre: Optional[str] = None
     lyrics: Optional[str] = None
@@ -19,6 +21,8 @@ class MusicTrackResponse(BaseModel):
     genre: Optional[str]
     audio_url: Optional[str]
     cover_image: Optional[str]
+    cover_blurhash: Optional[str] = None
+    cover_color: Optional[str] = None
     duration: Optional[int]
     lyrics: Optional[str]
     is_featured: bool
@@ -6,6 +6,9 @@ from datetime import datetime
 class PodcastCreate(BaseModel):
     title: str
     description: Optional[str] = None
+    audio_url: Optional[str] = None
+    video_url: Optional[str] = None
+    cover_image: Optional[str] = None
     category_id: Optional[int] = None
 
 
@@ -15,7 +18,11 @@ class PodcastResponse(BaseModel):
     description: Optional[str]
     audio_url: Optional[str]
     video_url: Optional[str]
+    hls_url: Optional[str] = None
+    preview_vtt_url: Optional[str] = None
     cover_image: Optional[str]
+    cover_blurhash: Optional[str] = None
+    cover_color: Optional[str] = None
     creator_id: Optional[int]
     category_id: Optional[int]
     duration: Optional[int]
@@ -2,8 +2,11 @@ import ffmpeg
 import os
 import uuid
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
 from app.config import settings
+from app.services.job_service import run_ffmpeg
+from app.services.edit_cache import edit_cache
+from app.services.probe_cache import probe_cache
 
 
 class AudioEditingService:
@@ -14,6 +17,7 @@ class AudioEditingService:
         self.audio_dir = self.media_dir / "audio"
         self.audio_dir.mkdir(parents=True, exist_ok=True)
     
+    @edit_cache.memoize("trim_audio", path_args=("input_path",))
     def trim_audio(self, input_path: str, start_time: float, end_time: float) -> Optional[str]:
         """
         Trim audio from start_time to end_time
@@ -35,7 +39,7 @@ class AudioEditingService:
             output_path = self.audio_dir / filename
             
             # FFmpeg command: -ss START -i INPUT -t DURATION -c:a libmp3lame OUTPUT
-            (
+            run_ffmpeg(
                 ffmpeg
                 .input(str(input_path), ss=start_time)
                 .output(
@@ -44,7 +48,6 @@ class AudioEditingService:
                     acodec='libmp3lame'
                 )
                 .overwrite_output()
-                .run(quiet=True, capture_stdout=True, capture_stderr=True)
             )
             
             if output_path.exists():
@@ -54,12 +57,18 @@ class AudioEditingService:
             print(f"Error trimming audio: {e}")
             return None
     
-    def merge_audio_files(self, input_paths: List[str]) -> Optional[str]:
+    @edit_cache.memoize("merge_audio_files", path_args=("input_paths",))
+    def merge_audio_files(self, input_paths: List[str], crossfade: float = 0.0) -> Optional[str]:
         """
         Merge multiple audio files into one
         
+        MP3 inputs that share sample rate and channel layout are joined with
+        the concat demuxer without re-encoding. Anything else (or a crossfade)
+        is rendered in a single filter-graph pass.
+        
         Args:
             input_paths: List of paths to input audio files
+            crossfade: Crossfade duration in seconds between consecutive files
             
         Returns:
             Path to output audio file or None on error
@@ -71,28 +80,13 @@ class AudioEditingService:
             filename = f"merged_{uuid.uuid4().hex[:8]}.mp3"
             output_path = self.audio_dir / filename
             
-            # Create file list for concat filter
-            concat_file = self.audio_dir / f"concat_{uuid.uuid4().hex[:8]}.txt"
-            with open(concat_file, 'w') as f:
-                for path in input_paths:
-                    f.write(f"file '{os.path.abspath(path)}'\n")
-            
-            try:
-                # FFmpeg command: -f concat -safe 0 -i LIST_FILE -c:a copy OUTPUT
-                (
-                    ffmpeg
-                    .input(str(concat_file), format='concat', safe=0)
-                    .output(
-                        str(output_path),
-                        acodec='libmp3lame'
-                    )
-                    .overwrite_output()
-                    .run(quiet=True, capture_stdout=True, capture_stderr=True)
-                )
-            finally:
-                # Clean up concat file
-                if concat_file.exists():
-                    concat_file.unlink()
+            streams = [self._audio_stream_info(path) for path in input_paths]
+            total_duration = sum(info['duration'] for info in streams)
+            
+            if crossfade <= 0 and self._can_stream_copy(streams):
+                self._concat_copy(input_paths, output_path, total_duration)
+            else:
+                self._merge_filter_graph(input_paths, streams, output_path, crossfade)
             
             if output_path.exists():
                 return f"/media/audio/{filename}"
@@ -101,6 +95,91 @@ class AudioEditingService:
             print(f"Error merging audio: {e}")
             return None
     
+    def _audio_stream_info(self, path: str) -> Dict:
+        """Codec, sample rate, channel layout and duration of a file's audio stream"""
+        probe = probe_cache.probe(path)
+        stream = next(s for s in probe['streams'] if s.get('codec_type') == 'audio')
+        return {
+            'codec_name': stream.get('codec_name'),
+            'sample_rate': int(stream.get('sample_rate', 44100)),
+            'channels': int(stream.get('channels', 2)),
+            'channel_layout': stream.get('channel_layout'),
+            'duration': float(probe['format'].get('duration', 0)),
+        }
+    
+    @staticmethod
+    def _can_stream_copy(streams: List[Dict]) -> bool:
+        first = streams[0]
+        return all(
+            info['codec_name'] == 'mp3'
+            and info['sample_rate'] == first['sample_rate']
+            and info['channels'] == first['channels']
+            and info['channel_layout'] == first['channel_layout']
+            for info in streams
+        )
+    
+    def _concat_copy(self, input_paths: List[str], output_path: Path, total_duration: float):
+        """Join compatible MP3 files without re-encoding"""
+        concat_file = self.audio_dir / f"concat_{uuid.uuid4().hex[:8]}.txt"
+        with open(concat_file, 'w') as f:
+            for path in input_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        
+        try:
+            # FFmpeg command: -f concat -safe 0 -i LIST_FILE -c:a copy OUTPUT
+            run_ffmpeg(
+                ffmpeg
+                .input(str(concat_file), format='concat', safe=0)
+                .output(str(output_path), acodec='copy')
+                .overwrite_output(),
+                duration=total_duration
+            )
+        finally:
+            # Clean up concat file
+            if concat_file.exists():
+                concat_file.unlink()
+    
+    def _merge_filter_graph(
+        self,
+        input_paths: List[str],
+        streams: List[Dict],
+        output_path: Path,
+        crossfade: float
+    ):
+        """Resample every input to a common format and join (or crossfade) in one pass"""
+        sample_rate = streams[0]['sample_rate']
+        channel_layout = 'mono' if streams[0]['channels'] == 1 else 'stereo'
+        inputs = [
+            ffmpeg.input(str(path)).audio.filter(
+                'aformat',
+                sample_fmts='fltp',
+                sample_rates=sample_rate,
+                channel_layouts=channel_layout
+            )
+            for path in input_paths
+        ]
+        
+        total_duration = sum(info['duration'] for info in streams)
+        if crossfade > 0:
+            # acrossfade needs both sides to be longer than the fade
+            shortest = min(info['duration'] for info in streams)
+            fade = min(crossfade, shortest / 2)
+            merged = inputs[0]
+            for next_input in inputs[1:]:
+                merged = ffmpeg.filter([merged, next_input], 'acrossfade', d=fade)
+            total_duration -= fade * (len(inputs) - 1)
+        else:
+            merged = ffmpeg.concat(*inputs, v=0, a=1)
+        
+        # FFmpeg command: -i IN1 -i IN2 ... -filter_complex GRAPH -c:a libmp3lame OUTPUT
+        run_ffmpeg(
+            ffmpeg
+            .output(merged, str(output_path), acodec='libmp3lame')
+            .overwrite_output(),
+            duration=total_duration
+        )
+    
+    @edit_cache.memoize("apply_fade_in", path_args=("input_path",))
     def apply_fade_in(self, input_path: str, fade_duration: float) -> Optional[str]:
         """
         Apply fade in effect to audio
@@ -117,7 +196,7 @@ class AudioEditingService:
             output_path = self.audio_dir / filename
             
             # FFmpeg command: -i INPUT -af "afade=t=in:ss=0:d=DURATION" OUTPUT
-            (
+            run_ffmpeg(
                 ffmpeg
                 .input(str(input_path))
                 .output(
@@ -126,7 +205,6 @@ class AudioEditingService:
                     acodec='libmp3lame'
                 )
                 .overwrite_output()
-                .run(quiet=True, capture_stdout=True, capture_stderr=True)
             )
             
             if output_path.exists():
@@ -136,6 +214,7 @@ class AudioEditingService:
             print(f"Error applying fade in: {e}")
             return None
     
+    @edit_cache.memoize("apply_fade_out", path_args=("input_path",))
     def apply_fade_out(
         self,
         input_path: str,
@@ -156,8 +235,7 @@ class AudioEditingService:
         try:
             # Get audio duration if not provided
             if audio_duration is None:
-                probe = ffmpeg.probe(str(input_path))
-                audio_duration = float(probe['format']['duration'])
+                audio_duration = probe_cache.duration(input_path)
             
             fade_start = audio_duration - fade_duration
             if fade_start < 0:
@@ -167,7 +245,7 @@ class AudioEditingService:
             output_path = self.audio_dir / filename
             
             # FFmpeg command: -i INPUT -af "afade=t=out:st=START:d=DURATION" OUTPUT
-            (
+            run_ffmpeg(
                 ffmpeg
                 .input(str(input_path))
                 .output(
@@ -176,7 +254,6 @@ class AudioEditingService:
                     acodec='libmp3lame'
                 )
                 .overwrite_output()
-                .run(quiet=True, capture_stdout=True, capture_stderr=True)
             )
             
             if output_path.exists():
@@ -186,6 +263,7 @@ class AudioEditingService:
             print(f"Error applying fade out: {e}")
             return None
     
+    @edit_cache.memoize("apply_fade_in_out", path_args=("input_path",))
     def apply_fade_in_out(
         self,
         input_path: str,
@@ -208,8 +286,7 @@ class AudioEditingService:
         try:
             # Get audio duration if not provided
             if audio_duration is None:
-                probe = ffmpeg.probe(str(input_path))
-                audio_duration = float(probe['format']['duration'])
+                audio_duration = probe_cache.duration(input_path)
             
             fade_out_start = audio_duration - fade_out_duration
             if fade_out_start < 0:
@@ -222,7 +299,7 @@ class AudioEditingService:
             fade_filter = f"afade=t=in:ss=0:d={fade_in_duration},afade=t=out:st={fade_out_start}:d={fade_out_duration}"
             
             # FFmpeg command: -i INPUT -af "FADE_FILTER" OUTPUT
-            (
+            run_ffmpeg(
                 ffmpeg
                 .input(str(input_path))
                 .output(
@@ -231,7 +308,6 @@ class AudioEditingService:
                     acodec='libmp3lame'
                 )
                 .overwrite_output()
-                .run(quiet=True, capture_stdout=True, capture_stderr=True)
             )
             
             if output_path.exists():
@@ -0,0 +1,256 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from app.config import settings
+from app.services.media_store import media_store
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def media_url_to_path(url: str) -> Path:
+    """Map a public /media/... URL to its file under MEDIA_STORAGE_PATH"""
+    return Path(settings.MEDIA_STORAGE_PATH) / url[len("/media/"):]
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize operation parameters so equivalent requests share a key"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 3)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return str(value)
+
+
+class EditCache:
+    """
+    Memoizes editing service outputs by input content hash and parameters
+
+    Entries map a key (SHA-256 of the operation name, the SHA-256 of every
+    input file and the normalized parameters) to the output media URL. The
+    index is persisted as JSON; once the outputs it tracks exceed
+    EDIT_CACHE_MAX_BYTES the least recently used entries are forgotten.
+
+    EDIT_CACHE_MAX_BYTES bounds the index, not the disk. The outputs are
+    public /media/... URLs that clients may have saved (a cache hit hands
+    the same URL to every requester), so the cache never deletes them.
+    Unreferenced outputs are left to the storage janitor, which checks the
+    database first and enforces the disk limit, MEDIA_DISK_BUDGET_BYTES.
+    """
+
+    # Seconds between index writes caused only by lookups (LRU order)
+    SAVE_INTERVAL = 30
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.enabled = settings.EDIT_CACHE_ENABLED
+        self.max_bytes = max_bytes or settings.EDIT_CACHE_MAX_BYTES
+        self.cache_dir = Path(settings.MEDIA_STORAGE_PATH) / ".cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "edit_cache.json"
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load()
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of a file, memoized by (path, size, mtime)"""
+        stat = os.stat(path)
+        identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(identity)
+        if cached:
+            return cached
+        # Files in the media store are already hashed
+        stored = media_store.sha256_for_path(Path(path))
+        if stored:
+            return stored
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        with self._lock:
+            self._hashes[identity] = sha256
+        return sha256
+
+    def remember_hash(self, path: str, sha256: str):
+        """Record a hash computed elsewhere (e.g. during upload) for a file"""
+        stat = os.stat(path)
+        with self._lock:
+            self._hashes[(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)] = sha256
+
+    def make_key(self, operation: str, arguments: Dict[str, Any], path_args: Iterable[str]) -> str:
+        """Build the cache key for an operation call"""
+        path_args = set(path_args)
+        material: Dict[str, Any] = {"operation": operation, "inputs": {}, "params": {}}
+        for name, value in arguments.items():
+            if name in path_args:
+                if value is None:
+                    material["inputs"][name] = None
+                elif isinstance(value, (list, tuple)):
+                    material["inputs"][name] = [self.file_hash(str(v)) for v in value]
+                else:
+                    material["inputs"][name] = self.file_hash(str(value))
+            else:
+                material["params"][name] = _normalize(value)
+        encoded = json.dumps(material, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the cached output URL for a key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not media_url_to_path(entry["url"]).exists():
+                # Collected by the storage janitor
+                self._drop(key)
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["last_access"] = time.time()
+            self._entries.move_to_end(key)
+            # Access order only matters for eviction; don't rewrite the index per hit
+            self._dirty = True
+            if time.monotonic() - self._saved_at > self.SAVE_INTERVAL:
+                self._save()
+            return entry["url"]
+
+    def store(self, key: str, url: str):
+        """Record an output and evict old entries beyond the size budget"""
+        if not url.startswith("/media/"):
+            return
+        path = media_url_to_path(url)
+        if not path.exists():
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            size = path.stat().st_size
+            self._entries[key] = {"url": url, "size": size, "last_access": time.time()}
+            self.total_bytes += size
+            self._evict()
+            self._save()
+
+    def flush(self):
+        """Write the index if lookups changed it since the last save"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def memoize(self, operation: str, path_args: Iterable[str]) -> Callable:
+        """
+        Decorator for editing service methods returning a /media/... URL
+
+        Args:
+            operation: Name used in the cache key
+            path_args: Names of parameters holding input file paths (or lists
+                of paths); they are keyed by content hash instead of value
+        """
+        path_args = tuple(path_args)
+
+        def decorator(func: Callable[..., Optional[str]]) -> Callable[..., Optional[str]]:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                arguments.pop("self", None)
+                try:
+                    key = self.make_key(operation, arguments, path_args)
+                except OSError as e:
+                    print(f"Error hashing inputs for {operation}: {e}")
+                    return func(*args, **kwargs)
+
+                cached = self.lookup(key)
+                if cached:
+                    return cached
+
+                result = func(*args, **kwargs)
+                if result:
+                    self.store(key, result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry["size"]
+        return entry
+
+    def _evict(self):
+        # Only the index entry goes; the file may be in use under its URL
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading edit cache index: {e}")
+            return
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]["last_access"]):
+            if media_url_to_path(entry["url"]).exists():
+                self._entries[key] = entry
+                self.total_bytes += entry["size"]
+
+    def _save(self):
+        temp_path = self.index_path.with_suffix(".tmp")
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.index_path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        except OSError as e:
+            print(f"Error saving edit cache index: {e}")
+
+
+# Shared instance used to decorate the editing services
+edit_cache = EditCache()
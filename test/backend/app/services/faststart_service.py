@@ -0,0 +1,168 @@
+import ffmpeg
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+from app.config import settings
+from app.services.job_service import run_ffmpeg
+from app.services.media_scheduler import media_scheduler, Priority, SchedulerBusy
+from app.services.media_store import media_store
+
+
+# ISO base media containers that can carry the moov atom at either end
+FASTSTART_SUFFIXES = {".mp4", ".mov", ".m4v"}
+
+
+def moov_position(path: Path) -> Optional[str]:
+    """
+    Walk the top-level atoms of an MP4/MOV file (headers only)
+
+    Returns:
+        "front" if moov comes before mdat, "end" if it comes after, or None
+        if the file is not a recognizable MP4/MOV
+    """
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            header = f.read(8)
+            size, atom = struct.unpack(">I4s", header)
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0]
+            elif size == 0:
+                size = file_size - offset
+            if size < 8:
+                return None
+            if atom == b"moov":
+                return "front"
+            if atom == b"mdat":
+                return "end"
+            offset += size
+    return None
+
+
+class FaststartService:
+    """
+    Moves the moov atom of stored MP4/MOV files to the front (stream copy)
+
+    Without it progressive playback can only start once the whole file has
+    downloaded. The remux runs in the background on the media scheduler and
+    the result is recorded as the "faststart" flag in the media store
+    (False while pending, True when done, None if the file can't be remuxed).
+    Files that could not be queued stay pending and are queued again by
+    retry_deferred, which the storage janitor calls on every sweep.
+    """
+
+    def __init__(self):
+        self.media_dir = Path(settings.MEDIA_STORAGE_PATH)
+        self._lock = threading.Lock()
+        self._queued: Set[str] = set()
+        self._deferred: Dict[str, Optional[Callable[[str], Any]]] = {}
+
+    def schedule(self, url: Optional[str], then: Optional[Callable[[str], Any]] = None):
+        """
+        Queue a faststart check/remux for a /media/... video URL
+
+        then(url) runs in the same background task once the file is final,
+        for ingest stages that read the finished file.
+        """
+        if not url:
+            return
+        needs_check = (
+            Path(url).suffix.lower() in FASTSTART_SUFFIXES
+            and not media_store.flags(url).get("faststart")
+        )
+        if not needs_check and then is None:
+            return
+        if needs_check:
+            media_store.set_flag(url, "faststart", False)
+        with self._lock:
+            self._queued.add(url)
+            self._deferred.pop(url, None)
+        try:
+            media_scheduler.submit("video", self._process, url, needs_check, then, priority=Priority.BATCH)
+        except (SchedulerBusy, RuntimeError) as e:
+            # Still pending (so not cached as immutable); retried by the janitor
+            print(f"Deferring faststart for {url}: {e}")
+            with self._lock:
+                self._queued.discard(url)
+                self._deferred[url] = then
+
+    def retry_deferred(self) -> int:
+        """
+        Queue again the files whose faststart could not be queued, including
+        ones left pending by a restart. Returns the number of files retried.
+        """
+        with self._lock:
+            deferred, self._deferred = self._deferred, {}
+            queued = set(self._queued)
+        for url in media_store.urls_with_flag("faststart", False):
+            if url not in queued:
+                deferred.setdefault(url, None)
+
+        retried = 0
+        for url, then in deferred.items():
+            if not (self.media_dir / url[len("/media/"):]).exists():
+                continue
+            self.schedule(url, then=then)
+            retried += 1
+        return retried
+
+    def _process(self, url: str, needs_check: bool, then: Optional[Callable[[str], Any]]):
+        try:
+            if needs_check:
+                self.ensure_faststart(url)
+            if then is not None:
+                then(url)
+        finally:
+            with self._lock:
+                self._queued.discard(url)
+
+    def ensure_faststart(self, url: str) -> bool:
+        """
+        Remux the file in place if its moov atom is at the end
+
+        Returns:
+            True once the file is faststart
+        """
+        path = self.media_dir / url[len("/media/"):]
+        try:
+            position = moov_position(path)
+            if position is None:
+                media_store.set_flag(url, "faststart", None)
+                return False
+            if position == "end":
+                self._remux(url, path)
+            media_store.set_flag(url, "faststart", True)
+            return True
+        except Exception as e:
+            print(f"Error remuxing {url} to faststart: {e}")
+            # The file was left unchanged
+            media_store.set_flag(url, "faststart", None)
+            return False
+
+    def _remux(self, url: str, path: Path):
+        temp_path = path.with_name(f".{path.stem}.faststart{path.suffix}")
+        try:
+            # FFmpeg command: -i INPUT -map 0 -c copy -movflags +faststart OUTPUT
+            run_ffmpeg(
+                ffmpeg
+                .input(str(path))
+                .output(str(temp_path), map=0, c='copy', movflags='+faststart')
+                .overwrite_output()
+            )
+            if media_store.sha256_for(url):
+                # Content changed: relink the public name to the new blob
+                kind, filename = url[len("/media/"):].split("/", 1)
+                media_store.ingest(temp_path, kind, filename)
+            else:
+                os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+
+# Shared instance used by the upload and editing paths
+faststart_service = FaststartService()
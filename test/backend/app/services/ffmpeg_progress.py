@@ -0,0 +1,100 @@
+import time
+from typing import Dict, List, Optional
+from app.services.probe_cache import probe_cache
+
+
+def expected_duration(args: List[str]) -> Optional[float]:
+    """
+    Work out how many seconds of media an FFmpeg command will produce
+
+    Uses the output `-t` option when present, otherwise probes the first input
+    (through the shared probe cache).
+
+    Args:
+        args: Compiled FFmpeg command line
+
+    Returns:
+        Duration in seconds or None if it cannot be determined
+    """
+    try:
+        if '-t' in args:
+            return float(args[args.index('-t') + 1])
+        if '-i' in args:
+            return probe_cache.duration(args[args.index('-i') + 1])
+    except Exception:
+        pass
+    return None
+
+
+def _parse_speed(value: str) -> Optional[float]:
+    try:
+        return float(value.rstrip('x'))
+    except (AttributeError, ValueError):
+        return None
+
+
+class ProgressParser:
+    """Parses FFmpeg `-progress` key=value output into progress snapshots"""
+
+    def __init__(self, total_duration: Optional[float] = None):
+        self.total_duration = total_duration
+        self.started = time.monotonic()
+        self._block: Dict[str, str] = {}
+
+    def feed(self, line: str) -> Optional[Dict[str, Optional[float]]]:
+        """
+        Feed one line of progress output
+
+        Returns:
+            A snapshot dict (percent, fps, speed, out_time, eta) at the end of
+            each progress block, otherwise None
+        """
+        line = line.strip()
+        if '=' not in line:
+            return None
+        key, value = line.split('=', 1)
+        self._block[key] = value
+        if key != 'progress':
+            return None
+
+        block, self._block = self._block, {}
+        return self._snapshot(block, finished=(value == 'end'))
+
+    def _snapshot(self, block: Dict[str, str], finished: bool) -> Dict[str, Optional[float]]:
+        out_time = None
+        # out_time_ms is (despite its name) in microseconds, like out_time_us
+        for key in ('out_time_us', 'out_time_ms'):
+            try:
+                out_time = int(block[key]) / 1_000_000
+                break
+            except (KeyError, ValueError):
+                continue
+
+        try:
+            fps = float(block.get('fps', ''))
+        except ValueError:
+            fps = None
+        speed = _parse_speed(block.get('speed'))
+
+        percent = None
+        eta = None
+        total = self.total_duration
+        if finished:
+            percent = 100.0
+            eta = 0.0
+        elif total and out_time is not None and out_time >= 0:
+            percent = round(min(out_time / total, 1.0) * 100, 1)
+            remaining = max(total - out_time, 0.0)
+            if speed:
+                eta = round(remaining / speed, 1)
+            elif out_time > 0:
+                elapsed = time.monotonic() - self.started
+                eta = round(elapsed * remaining / out_time, 1)
+
+        return {
+            "percent": percent,
+            "fps": fps,
+            "speed": speed,
+            "out_time": out_time,
+            "eta": eta,
+        }
@@ -0,0 +1,184 @@
+import ffmpeg
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.config import settings
+from app.services.job_service import run_ffmpeg
+from app.services.media_scheduler import media_scheduler, Priority, SchedulerBusy
+from app.services.media_store import media_store, sha256_file
+from app.services.probe_cache import probe_cache
+
+
+class HLSService:
+    """Packages uploaded media as HLS (segmented playlists with a bitrate ladder)"""
+
+    SEGMENT_SECONDS = 6
+
+    # (height, video bitrate, audio bitrate); rungs above the source height are skipped
+    VIDEO_LADDER = [
+        (1080, 5000, '160k'),
+        (720, 2800, '128k'),
+        (480, 1400, '96k'),
+        (360, 800, '64k'),
+    ]
+
+    # AAC renditions for audio-only media
+    AUDIO_BITRATES = ['128k', '64k']
+
+    def __init__(self):
+        self.media_dir = Path(settings.MEDIA_STORAGE_PATH)
+        self.hls_dir = self.media_dir / "hls"
+        self.hls_dir.mkdir(parents=True, exist_ok=True)
+
+    def schedule(self, url: str, input_path: Optional[str] = None):
+        """Package a newly stored audio file in the background"""
+        try:
+            media_scheduler.submit("audio", self.ingest, url, input_path, priority=Priority.BATCH)
+        except (SchedulerBusy, RuntimeError) as e:
+            # Packaged later through POST /podcasts/{id}/hls
+            print(f"Deferring HLS packaging for {url}: {e}")
+
+    def ingest(self, url: str, input_path: Optional[str] = None) -> Optional[str]:
+        """
+        Package a stored /media/... file and record the master playlist as
+        its "hls" flag in the media store (ingest stage, blocking)
+        """
+        source = input_path or str(self.media_dir / url[len("/media/"):])
+        master_url = self.package(source)
+        if master_url:
+            media_store.set_flag(url, "hls", master_url)
+        return master_url
+
+    def package(self, input_path: str) -> Optional[str]:
+        """
+        Package a video or audio file as HLS
+
+        Output goes to media/hls/<content sha256>/, so identical media is only
+        packaged once. Playlists are written to a hidden work directory and
+        renamed into place when complete.
+
+        Args:
+            input_path: Path to the source media file
+
+        Returns:
+            URL of the master playlist or None on error
+        """
+        try:
+            source = Path(input_path)
+            key = media_store.sha256_for_path(source) or sha256_file(source)
+            final_dir = self.hls_dir / key
+            url = f"/media/hls/{key}/master.m3u8"
+            if (final_dir / "master.m3u8").exists():
+                return url
+
+            probe = probe_cache.probe(input_path)
+            video_stream = next(
+                (s for s in probe['streams']
+                 if s.get('codec_type') == 'video' and not s.get('disposition', {}).get('attached_pic')),
+                None
+            )
+            has_audio = any(s.get('codec_type') == 'audio' for s in probe['streams'])
+            duration = float(probe['format']['duration'])
+
+            work_dir = self.hls_dir / f".{key}.{uuid.uuid4().hex[:8]}"
+            work_dir.mkdir(parents=True)
+            try:
+                if video_stream is not None:
+                    self._package_video(input_path, video_stream, has_audio, duration, work_dir)
+                elif has_audio:
+                    self._package_audio(input_path, duration, work_dir)
+                else:
+                    return None
+
+                if not (work_dir / "master.m3u8").exists():
+                    return None
+                try:
+                    os.replace(work_dir, final_dir)
+                except OSError:
+                    # A concurrent job packaged the same content first
+                    if not (final_dir / "master.m3u8").exists():
+                        raise
+                return url
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        except Exception as e:
+            print(f"Error packaging HLS: {e}")
+            return None
+
+    def _package_video(self, input_path: str, video_stream: Dict, has_audio: bool, duration: float, work_dir: Path):
+        """One decode, split into every ladder rung, encoded and segmented in a single FFmpeg pass"""
+        height = int(video_stream.get('height') or 0)
+        rungs = [rung for rung in self.VIDEO_LADDER if rung[0] <= height] or self.VIDEO_LADDER[-1:]
+
+        source = ffmpeg.input(input_path)
+        split = source.video.filter_multi_output('split', len(rungs))
+
+        streams = []
+        variants: List[str] = []
+        rate_args = {}
+        for index, (rung_height, video_kbps, audio_bitrate) in enumerate(rungs):
+            streams.append(split[index].filter('scale', -2, rung_height))
+            rate_args[f'b:v:{index}'] = f'{video_kbps}k'
+            rate_args[f'maxrate:v:{index}'] = f'{int(video_kbps * 1.07)}k'
+            rate_args[f'bufsize:v:{index}'] = f'{video_kbps * 2}k'
+            if has_audio:
+                streams.append(source.audio)
+                rate_args[f'b:a:{index}'] = audio_bitrate
+                variants.append(f'v:{index},a:{index}')
+            else:
+                variants.append(f'v:{index}')
+
+        # Keyframes forced on segment boundaries so every rendition switches cleanly
+        run_ffmpeg(
+            ffmpeg
+            .output(
+                *streams,
+                str(work_dir / 'v%v' / 'index.m3u8'),
+                vcodec='libx264',
+                preset='veryfast',
+                pix_fmt='yuv420p',
+                acodec='aac',
+                sc_threshold=0,
+                force_key_frames=f'expr:gte(t,n_forced*{self.SEGMENT_SECONDS})',
+                **self._hls_args(work_dir, variants),
+                **rate_args
+            )
+            .overwrite_output(),
+            duration=duration
+        )
+
+    def _package_audio(self, input_path: str, duration: float, work_dir: Path):
+        """AAC renditions of an audio file in a single FFmpeg pass"""
+        source = ffmpeg.input(input_path)
+        streams = [source.audio for _ in self.AUDIO_BITRATES]
+        rate_args = {f'b:a:{index}': bitrate for index, bitrate in enumerate(self.AUDIO_BITRATES)}
+        variants = [f'a:{index}' for index in range(len(self.AUDIO_BITRATES))]
+
+        run_ffmpeg(
+            ffmpeg
+            .output(
+                *streams,
+                str(work_dir / 'v%v' / 'index.m3u8'),
+                acodec='aac',
+                **self._hls_args(work_dir, variants),
+                **rate_args
+            )
+            .overwrite_output(),
+            duration=duration
+        )
+
+    def _hls_args(self, work_dir: Path, variants: List[str]) -> Dict:
+        return {
+            'f': 'hls',
+            'hls_time': self.SEGMENT_SECONDS,
+            'hls_playlist_type': 'vod',
+            'hls_segment_filename': str(work_dir / 'v%v' / 'segment_%05d.ts'),
+            'master_pl_name': 'master.m3u8',
+            'var_stream_map': ' '.join(variants),
+        }
+
+
+# Shared instance for the ingest path and the podcast routes
+hls_service = HLSService()
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict
+from PIL import Image, ImageOps
+from app.config import settings
+from app.services.media_scheduler import media_scheduler, Priority
+from app.services.media_store import media_store
+
+
+class ImageDerivativeService:
+    """
+    Resized WebP/JPEG derivatives of stored images, cached on disk
+
+    Requested widths snap up to a fixed bucket so a handful of sizes cover
+    every screen. Derivatives live in media/.cache/images and are evicted
+    least recently used first beyond IMAGE_CACHE_MAX_BYTES. Concurrent misses
+    for the same derivative share one render, and rendering runs in the
+    media scheduler's thumbnail class, off the event loop.
+    """
+
+    WIDTH_BUCKETS = (64, 128, 256, 512, 768, 1024, 1600)
+
+    # format -> (Pillow format, content type, file extension)
+    FORMATS = {
+        "webp": ("WEBP", "image/webp", ".webp"),
+        "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    }
+
+    QUALITY = 80
+
+    def __init__(self):
+        self.cache_dir = Path(settings.MEDIA_STORAGE_PATH) / ".cache" / "images"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = settings.IMAGE_CACHE_MAX_BYTES
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._load()
+
+    @classmethod
+    def bucket_for(cls, width: int) -> int:
+        """Smallest bucket at least as wide as the request"""
+        for bucket in cls.WIDTH_BUCKETS:
+            if bucket >= width:
+                return bucket
+        return cls.WIDTH_BUCKETS[-1]
+
+    async def get(self, source: Path, width: int, fmt: str) -> Path:
+        """
+        Path of the derivative of source at the bucket for width, rendering it on a miss
+
+        Raises:
+            SchedulerBusy: If the thumbnail queue is full
+            OSError: If the source can't be read as an image
+        """
+        bucket = self.bucket_for(width)
+        key = self._key(source, bucket, fmt)
+        path = self._path(key, fmt)
+        if path.exists():
+            self._touch(path)
+            return path
+
+        # Single flight: concurrent misses share one render, which keeps
+        # going even if the request that started it disconnects
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._render_async(source, bucket, fmt, path))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _render_async(self, source: Path, width: int, fmt: str, path: Path) -> Path:
+        await asyncio.wrap_future(
+            media_scheduler.submit("thumbnail", self._render, source, width, fmt, path, priority=Priority.INTERACTIVE)
+        )
+        self._add(path)
+        return path
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _render(self, source: Path, width: int, fmt: str, output_path: Path):
+        pil_format = self.FORMATS[fmt][0]
+        with Image.open(source) as image:
+            # Let the JPEG decoder downscale while decoding (much cheaper than a full decode)
+            image.draft("RGB", (width, width * 4))
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+
+            if pil_format == "JPEG":
+                if image.mode in ("RGBA", "LA", "P"):
+                    image = image.convert("RGBA")
+                    background = Image.new("RGB", image.size, (255, 255, 255))
+                    background.paste(image, mask=image.getchannel("A"))
+                    image = background
+                elif image.mode != "RGB":
+                    image = image.convert("RGB")
+                options = {"quality": self.QUALITY, "optimize": True, "progressive": True}
+            else:
+                if image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+                options = {"quality": self.QUALITY, "method": 4}
+
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = output_path.with_name(f".{output_path.name}.tmp")
+            try:
+                image.save(temp_path, pil_format, **options)
+                os.replace(temp_path, output_path)
+            finally:
+                if temp_path.exists():
+                    temp_path.unlink()
+
+    def _key(self, source: Path, width: int, fmt: str) -> str:
+        # Content hash when the store knows it, otherwise the file identity
+        identity = media_store.sha256_for_path(source)
+        if identity is None:
+            stat = source.stat()
+            identity = f"{source.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+        material = f"{identity}:{width}:{fmt}:{self.QUALITY}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, fmt: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.FORMATS[fmt][2]}"
+
+    def _touch(self, path: Path):
+        with self._lock:
+            if str(path) in self._entries:
+                self._entries.move_to_end(str(path))
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _add(self, path: Path):
+        size = path.stat().st_size
+        with self._lock:
+            previous = self._entries.pop(str(path), None)
+            if previous is not None:
+                self.total_bytes -= previous
+            self._entries[str(path)] = size
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _load(self):
+        """Rebuild the LRU order from the cache directory (mtime = last use)"""
+        files = []
+        for path in self.cache_dir.glob("*/*"):
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, str(path), stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self.total_bytes += size
+
+
+# Shared instance so single-flight and the LRU index are process wide
+image_service = ImageDerivativeService()
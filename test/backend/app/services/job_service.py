@@ -0,0 +1,385 @@
+import asyncio
+import os
+import subprocess
+import threading
+import time
+import uuid
+import ffmpeg
+from collections import OrderedDict
+from concurrent.futures import Future, wait as wait_futures
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+from app.services.ffmpeg_progress import ProgressParser, expected_duration
+from app.services.media_scheduler import media_scheduler, Priority
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled"""
+
+
+class JobServiceClosed(Exception):
+    """Raised when submitting to a job service that is draining"""
+
+
+# Job currently executing on this worker thread (used by run_ffmpeg)
+_current = threading.local()
+
+
+def current_job() -> Optional["Job"]:
+    """Return the job running on the calling worker thread, if any"""
+    return getattr(_current, "job", None)
+
+
+class Job:
+    """A single media processing job and its lifecycle state"""
+
+    def __init__(
+        self,
+        operation: str,
+        error_detail: Optional[str] = None,
+        sid: Optional[str] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.error_detail = error_detail or f"Failed to run {operation}"
+        self.sid = sid  # Socket.io session of the requester, if any
+        self.status = JobStatus.QUEUED
+        self.progress: Optional[Dict[str, Optional[float]]] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._cancel_requested = False
+        self._publisher: Optional[Callable[["Job", str], None]] = None
+        self._watchers: List[asyncio.Queue] = []
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+    def attach_process(self, process: subprocess.Popen):
+        """Register the FFmpeg subprocess so it can be killed on cancel"""
+        with self._lock:
+            self._process = process
+            cancel = self._cancel_requested
+        if cancel:
+            process.kill()
+
+    def detach_process(self):
+        with self._lock:
+            self._process = None
+
+    def request_cancel(self):
+        """Flag the job as cancelled and kill its running subprocess"""
+        with self._lock:
+            self._cancel_requested = True
+            process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def report_progress(self, progress: Dict[str, Optional[float]]):
+        """Record an FFmpeg progress snapshot and push it to subscribers"""
+        self.progress = progress
+        self.publish("job_progress")
+
+    def publish(self, event: str):
+        if self._publisher is not None:
+            self._publisher(self, event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "operation": self.operation,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobService:
+    """Tracks media operations run off the event loop by the media scheduler"""
+
+    def __init__(self, history: Optional[int] = None):
+        self.history = history or settings.MEDIA_JOB_HISTORY
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._accepting = True
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sio = None
+
+    def attach_socketio(self, sio):
+        """Push job progress and status events through a socket.io AsyncServer"""
+        self._sio = sio
+
+    def submit(
+        self,
+        operation: str,
+        func: Callable[..., Any],
+        *args,
+        cleanup: Optional[Iterable[Any]] = None,
+        error_detail: Optional[str] = None,
+        sid: Optional[str] = None,
+        op_class: str = "video",
+        priority: int = Priority.INTERACTIVE,
+        **kwargs
+    ) -> Job:
+        """
+        Queue func(*args, **kwargs) on the media scheduler
+
+        Args:
+            operation: Name of the operation (shown in job status)
+            func: Blocking callable; a None return value counts as failure
+            cleanup: Paths removed once the job has finished
+            error_detail: Error message used when func fails
+            sid: Socket.io session id that should receive progress events
+            op_class: Scheduler operation class (video, audio, thumbnail)
+            priority: Priority.INTERACTIVE or Priority.BATCH
+
+        Returns:
+            The queued Job
+
+        Raises:
+            JobServiceClosed: If the service is draining
+            SchedulerBusy: If the operation class queue is full
+        """
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+
+        job = Job(operation, error_detail, sid)
+        job._publisher = self._publish
+        cleanup_paths = list(cleanup or [])
+        with self._lock:
+            if not self._accepting:
+                raise JobServiceClosed("Media job service is shutting down")
+            job.future = media_scheduler.submit(
+                op_class,
+                self._execute,
+                job, func, args, kwargs, cleanup_paths,
+                priority=priority
+            )
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; returns None if the job is unknown"""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.request_cancel()
+        return job
+
+    async def wait(self, job: Job) -> Job:
+        """Wait for a job without blocking the event loop"""
+        await asyncio.wrap_future(job.future)
+        return job
+
+    async def watch(
+        self,
+        job: Job,
+        heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[Tuple[str, Dict[str, Any]]]]:
+        """
+        Yield (event, job_dict) tuples until the job finishes
+
+        None is yielded every `heartbeat` seconds without events so that
+        streaming responses can send keep-alives.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        job._watchers.append(queue)
+        try:
+            yield ("job_update", job.to_dict())
+            while not job.finished:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item[0] == "job_update" and item[1]["status"] in JobStatus.FINISHED:
+                    break
+                yield item
+            yield ("job_update", job.to_dict())
+        finally:
+            job._watchers.remove(queue)
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Stop accepting jobs and drain the scheduler
+
+        Queued and running jobs are given `timeout` seconds to finish; anything
+        still running after that is cancelled and its FFmpeg process killed.
+        """
+        if timeout is None:
+            timeout = settings.MEDIA_JOB_DRAIN_TIMEOUT
+        with self._lock:
+            self._accepting = False
+            pending = [job for job in self._jobs.values() if not job.finished]
+
+        futures = [job.future for job in pending if job.future is not None]
+        _, not_done = wait_futures(futures, timeout=timeout)
+        if not_done:
+            print(f"Cancelling {len(not_done)} media jobs still running after drain timeout")
+            for job in pending:
+                if not job.finished:
+                    job.request_cancel()
+            wait_futures(not_done, timeout=10)
+        media_scheduler.shutdown(timeout=10)
+
+    def _execute(
+        self,
+        job: Job,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        cleanup: List[Any]
+    ):
+        """Worker-side wrapper: runs the job and records its outcome"""
+        _current.job = job
+        try:
+            if job.cancel_requested:
+                raise JobCancelled()
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            job.publish("job_update")
+
+            result = func(*args, **kwargs)
+
+            if job.cancel_requested:
+                raise JobCancelled()
+            if result is None:
+                job.error = job.error_detail
+                job.status = JobStatus.FAILED
+            else:
+                job.result = result
+                job.status = JobStatus.COMPLETED
+        except JobCancelled:
+            job.error = "Job cancelled"
+            job.status = JobStatus.CANCELLED
+        except Exception as e:
+            print(f"Error running job {job.id} ({job.operation}): {e}")
+            job.error = str(e) or job.error_detail
+            job.status = JobStatus.FAILED
+        finally:
+            _current.job = None
+            job.finished_at = time.time()
+            for path in cleanup:
+                try:
+                    if os.path.exists(path):
+                        os.unlink(path)
+                except OSError as e:
+                    print(f"Error removing temp file {path}: {e}")
+            job.publish("job_update")
+
+    def _publish(self, job: Job, event: str):
+        """Fan a job event out to SSE watchers and socket.io (thread-safe)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        payload = job.to_dict()
+        for queue in list(job._watchers):
+            loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+
+        if self._sio is not None:
+            room = f"job_{job.id}"
+            asyncio.run_coroutine_threadsafe(
+                self._sio.emit(event, payload, room=room, skip_sid=job.sid),
+                loop
+            )
+            if job.sid:
+                asyncio.run_coroutine_threadsafe(
+                    self._sio.emit(event, payload, room=job.sid),
+                    loop
+                )
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond the history limit"""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:excess]:
+            del self._jobs[job_id]
+
+
+def run_ffmpeg(stream_spec, duration: Optional[float] = None) -> None:
+    """
+    Run an ffmpeg-python stream as a cancellable subprocess
+
+    Drop-in replacement for `.run(quiet=True, capture_stdout=True,
+    capture_stderr=True)`: raises ffmpeg.Error on a non-zero exit code. When
+    called from a job worker the process is registered with the job so that
+    cancellation kills it, and FFmpeg's `-progress` output is parsed into
+    progress events for the job.
+
+    Args:
+        stream_spec: ffmpeg-python output stream
+        duration: Expected output duration in seconds (probed if omitted)
+    """
+    job = current_job()
+    if job is not None and job.cancel_requested:
+        raise JobCancelled()
+
+    args = ffmpeg.compile(stream_spec)
+    if job is None:
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = process.communicate()
+        if process.returncode != 0:
+            raise ffmpeg.Error('ffmpeg', out, err)
+        return
+
+    # Machine-readable progress on stdout; stderr is drained on a thread so
+    # a chatty FFmpeg cannot fill the pipe and stall
+    args = [args[0], '-progress', 'pipe:1', '-nostats'] + args[1:]
+    parser = ProgressParser(duration if duration is not None else expected_duration(args))
+
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    job.attach_process(process)
+    stderr_chunks: List[bytes] = []
+    stderr_reader = threading.Thread(
+        target=lambda: stderr_chunks.append(process.stderr.read()),
+        daemon=True
+    )
+    stderr_reader.start()
+    try:
+        for raw_line in process.stdout:
+            snapshot = parser.feed(raw_line.decode('utf-8', 'replace'))
+            if snapshot is not None:
+                job.report_progress(snapshot)
+        process.wait()
+        stderr_reader.join()
+    finally:
+        job.detach_process()
+
+    if job.cancel_requested:
+        raise JobCancelled()
+    if process.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', b'', b''.join(stderr_chunks))
+
+
+# Shared instance used by the editing routes and the app shutdown hook
+job_service = JobService()
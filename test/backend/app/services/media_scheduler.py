@@ -0,0 +1,202 @@
+import itertools
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+from app.config import settings
+
+
+class Priority:
+    """Scheduling lanes: lower values run first"""
+    INTERACTIVE = 0  # A client is waiting on the result (previews, sync edits)
+    BATCH = 1  # Background jobs and ingest work
+
+
+class SchedulerBusy(Exception):
+    """Raised when an operation class queue is full"""
+
+    def __init__(self, op_class: str, retry_after: int):
+        super().__init__(f"Media processing queue for {op_class} is full")
+        self.op_class = op_class
+        self.retry_after = retry_after
+
+
+class SchedulerClosed(RuntimeError):
+    """Raised when submitting to a scheduler that has been shut down"""
+
+
+# Operation class of the scheduler worker running on this thread, if any
+_worker = threading.local()
+
+# Sorts after every real priority so queued work drains before workers stop
+_STOP = 99
+
+
+class _OperationClass:
+    """Bounded priority queue plus a fixed set of worker threads"""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_batch_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_batch_queue = min(max_batch_queue, max_queue)
+        self.queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self.queued = 0
+        self.queued_batch = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.avg_runtime = 5.0  # Seconds, exponential moving average
+        self.threads: List[threading.Thread] = []
+
+
+class MediaScheduler:
+    """
+    Central admission control for CPU-heavy media processing
+
+    Work is split into operation classes (video, audio, thumbnail), each with
+    a concurrency limit sized from the CPU count and a bounded queue.
+    Interactive work is dequeued ahead of batch work, and batch work may
+    only fill MEDIA_BATCH_QUEUE_SIZE of the queue, so a burst of ingest
+    work is deferred before it crowds out waiting clients. When a class
+    queue is full, submit raises SchedulerBusy with a Retry-After estimate so
+    HTTP callers can answer 429 instead of oversubscribing the cores.
+    """
+
+    def __init__(self):
+        cpus = os.cpu_count() or 2
+        limits = {
+            "video": settings.MEDIA_VIDEO_CONCURRENCY or max(1, cpus // 2),
+            "audio": settings.MEDIA_AUDIO_CONCURRENCY or max(1, cpus),
+            "thumbnail": settings.MEDIA_THUMBNAIL_CONCURRENCY or max(1, cpus // 4),
+        }
+        self._classes: Dict[str, _OperationClass] = {
+            name: _OperationClass(name, limit, settings.MEDIA_QUEUE_SIZE, settings.MEDIA_BATCH_QUEUE_SIZE)
+            for name, limit in limits.items()
+        }
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._stopped = False
+
+    def submit(
+        self,
+        op_class: str,
+        func: Callable[..., Any],
+        *args,
+        priority: int = Priority.INTERACTIVE,
+        **kwargs
+    ) -> Future:
+        """
+        Queue func(*args, **kwargs) in an operation class
+
+        Raises:
+            SchedulerBusy: If the class queue is full (for batch work: its
+                share of the queue)
+            SchedulerClosed: If the scheduler has been shut down
+        """
+        op = self._classes[op_class]
+        future: Future = Future()
+        with self._lock:
+            if self._stopped:
+                raise SchedulerClosed("Media scheduler is shut down")
+            batch = priority >= Priority.BATCH
+            if op.queued >= op.max_queue or (batch and op.queued_batch >= op.max_batch_queue):
+                op.rejected += 1
+                raise SchedulerBusy(op_class, self._retry_after(op))
+            op.queued += 1
+            if batch:
+                op.queued_batch += 1
+            self._ensure_workers(op)
+            op.queue.put((priority, next(self._sequence), future, func, args, kwargs))
+        return future
+
+    def run(self, op_class: str, func: Callable[..., Any], *args, priority: int = Priority.INTERACTIVE, **kwargs) -> Any:
+        """Blocking helper for sync callers: run func in its class and return the result"""
+        if getattr(_worker, "op_class", None) == op_class:
+            # Already holding a slot in this class; queueing again could deadlock
+            return func(*args, **kwargs)
+        return self.submit(op_class, func, *args, priority=priority, **kwargs).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    "concurrency": op.concurrency,
+                    "queued": op.queued,
+                    "queued_batch": op.queued_batch,
+                    "running": op.running,
+                    "completed": op.completed,
+                    "rejected": op.rejected,
+                    "max_queue": op.max_queue,
+                    "max_batch_queue": op.max_batch_queue,
+                    "avg_runtime": round(op.avg_runtime, 2),
+                }
+                for name, op in self._classes.items()
+            }
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """Let queued work drain, then stop the worker threads"""
+        with self._lock:
+            self._stopped = True
+            threads = []
+            for op in self._classes.values():
+                for _ in op.threads:
+                    op.queue.put((_STOP, next(self._sequence), None, None, (), {}))
+                threads.extend(op.threads)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in threads:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            thread.join(remaining)
+
+    def _ensure_workers(self, op: _OperationClass):
+        """Start the class's worker threads on first use (called under lock)"""
+        if op.threads:
+            return
+        for index in range(op.concurrency):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(op,),
+                name=f"media-{op.name}-{index}",
+                daemon=True
+            )
+            op.threads.append(thread)
+            thread.start()
+
+    def _worker_loop(self, op: _OperationClass):
+        _worker.op_class = op.name
+        while True:
+            priority, _, future, func, args, kwargs = op.queue.get()
+            if priority == _STOP:
+                return
+            with self._lock:
+                op.queued -= 1
+                if priority >= Priority.BATCH:
+                    op.queued_batch -= 1
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                op.running += 1
+            started = time.monotonic()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    op.running -= 1
+                    op.completed += 1
+                    op.avg_runtime = 0.8 * op.avg_runtime + 0.2 * elapsed
+
+    @staticmethod
+    def _retry_after(op: _OperationClass) -> int:
+        """Rough seconds until a queue slot frees up"""
+        return max(1, math.ceil(op.avg_runtime * max(op.queued, 1) / op.concurrency))
+
+
+# Shared instance for all media processing (edit jobs, thumbnails, ingest)
+media_scheduler = MediaScheduler()
@@ -0,0 +1,270 @@
+import mimetypes
+import os
+import stat as stat_module
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+import aiofiles
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.services.media_store import media_store
+
+
+# HLS segments and playlists (.ts is otherwise guessed as a Qt translation file)
+mimetypes.add_type("video/mp2t", ".ts")
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+
+CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16  # More ranges than this get the whole file (avoids range abuse)
+
+# Content-addressed names never change content, so clients may cache forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+# Not advertised by uvicorn (run.sh), which gets the chunked async reads
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a Range header into sorted, merged (start, end) byte spans (end inclusive)
+
+    Returns:
+        The spans, [] if none of them is satisfiable, or None if the header
+        is malformed or asks for too many ranges (serve the whole file)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    spans = []
+    parts = spec.split(",")
+    if len(parts) > MAX_RANGES:
+        return None
+    for part in parts:
+        start_text, sep, end_text = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start_text == "":
+                # Suffix range: the last N bytes
+                length = int(end_text)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(start_text)
+                # Open ended: through the last byte (unsatisfiable when start is past it)
+                end = int(end_text) if end_text else max(start, size - 1)
+        except ValueError:
+            return None
+        if start < 0 or end < start:
+            return None
+        if start >= size:
+            continue
+        spans.append((start, min(end, size - 1)))
+
+    # Merge overlapping and adjacent spans
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class MediaFileResponse(Response):
+    """
+    File response with byte ranges
+
+    The body is read with aiofiles in CHUNK_SIZE chunks. Only an ASGI server
+    that advertises the zerocopysend extension is handed the descriptor to
+    send itself; uvicorn does not, so under run.sh every byte goes through
+    Python. Put a reverse proxy in front to serve /media with sendfile.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        size: int,
+        ranges: Optional[List[Tuple[int, int]]],
+        headers: dict,
+        media_type: str,
+        send_body: bool = True,
+    ):
+        self.path = path
+        self.size = size
+        self.ranges = ranges
+        self.send_body = send_body
+        self.boundary = os.urandom(12).hex()
+        self.file_media_type = media_type
+
+        if ranges is None:
+            status_code, content_type = 200, media_type
+            length = size
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            status_code, content_type = 206, media_type
+            length = end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            status_code = 206
+            content_type = f"multipart/byteranges; boundary={self.boundary}"
+            length = sum(len(head) + (end - start + 1) for head, start, end in self._parts()) + len(self._closing())
+
+        super().__init__(status_code=status_code, headers=headers, media_type=content_type)
+        self.headers["Content-Length"] = str(length)
+
+    def _parts(self):
+        for start, end in self.ranges:
+            head = (
+                f"\r\n--{self.boundary}\r\n"
+                f"Content-Type: {self.file_media_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{self.size}\r\n\r\n"
+            ).encode("latin-1")
+            yield head, start, end
+
+    def _closing(self) -> bytes:
+        return f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        async with aiofiles.open(self.path, "rb") as f:
+            if self.ranges is None:
+                await self._send_span(f, 0, self.size - 1, send, zerocopy, more_body=False)
+            elif len(self.ranges) == 1:
+                start, end = self.ranges[0]
+                await self._send_span(f, start, end, send, zerocopy, more_body=False)
+            else:
+                for head, start, end in self._parts():
+                    await send({"type": "http.response.body", "body": head, "more_body": True})
+                    await self._send_span(f, start, end, send, zerocopy, more_body=True)
+                await send({"type": "http.response.body", "body": self._closing(), "more_body": False})
+
+    async def _send_span(self, f, start: int, end: int, send: Send, zerocopy: bool, more_body: bool):
+        count = end - start + 1
+        if count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": more_body})
+            return
+        if zerocopy:
+            # The server sendfile()s straight from the descriptor
+            await send({
+                "type": ZEROCOPY_EXTENSION,
+                "file": f.fileno(),
+                "offset": start,
+                "count": count,
+                "more_body": more_body,
+            })
+            return
+        await f.seek(start)
+        remaining = count
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": more_body or remaining > 0,
+            })
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as used for If-None-Match"""
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def media_response(request: Request, path: Path, url: str) -> Response:
+    """
+    Serve a media file with validators, conditional requests and ranges
+
+    Files in the content-addressed store get their SHA-256 as a strong ETag
+    and an immutable Cache-Control; other files get a weak size/mtime ETag.
+    """
+    file_stat = path.stat()
+    if not stat_module.S_ISREG(file_stat.st_mode):
+        return Response(status_code=404)
+
+    sha256 = media_store.sha256_for(url)
+    # Not immutable while a faststart remux may still replace the content
+    if sha256 and media_store.flags(url).get("faststart") is not False:
+        etag = f'"{sha256}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        etag = f'W/"{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}"'
+        cache_control = DEFAULT_CACHE_CONTROL
+    last_modified = formatdate(file_stat.st_mtime, usegmt=True)
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request.headers.get("if-modified-since"), file_stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    size = file_stat.st_size
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if range_header and _if_range_allows(request.headers.get("if-range"), etag, last_modified):
+        ranges = parse_range(range_header, size)
+        if ranges == []:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+
+    return MediaFileResponse(
+        path,
+        size,
+        ranges,
+        headers,
+        media_type,
+        send_body=request.method != "HEAD",
+    )
+
+
+def _if_range_allows(if_range: Optional[str], etag: str, last_modified: str) -> bool:
+    """A range is only served if If-Range (when present) still matches; strong comparison"""
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return not etag.startswith("W/") and if_range == etag
+    return if_range == last_modified
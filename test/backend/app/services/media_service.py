@@ -1,9 +1,80 @@
-import os
+import hashlib
+import aiofiles
 import ffmpeg
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
 from fastapi import UploadFile
 from app.config import settings
+from app.services.job_service import run_ffmpeg
+from app.services.media_scheduler import media_scheduler, Priority
+from app.services.faststart_service import faststart_service
+from app.services.hls_service import hls_service
+from app.services.media_store import media_store
+from app.services.placeholder_service import placeholder_service
+from app.services.probe_cache import probe_cache
+from app.services.waveform_service import waveform_service
+from app.services.preview_service import preview_service
+
+
+# Per-kind upload size limits, read lazily so settings overrides apply
+UPLOAD_LIMITS = {
+    "audio": lambda: settings.MAX_AUDIO_UPLOAD_BYTES,
+    "video": lambda: settings.MAX_VIDEO_UPLOAD_BYTES,
+    "images": lambda: settings.MAX_IMAGE_UPLOAD_BYTES,
+}
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the size limit for its media kind"""
+    
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the maximum upload size of {limit} bytes")
+        self.limit = limit
+
+
+async def stream_upload(file: UploadFile, destination: Path, limit: int) -> Tuple[int, str]:
+    """
+    Copy an upload to destination in fixed-size chunks with async file I/O
+    
+    The SHA-256 and byte count are computed during the copy. destination is
+    removed if the copy fails.
+    
+    Returns:
+        (size in bytes, hex SHA-256)
+        
+    Raises:
+        UploadTooLarge: If the upload exceeds limit bytes
+    """
+    # Reject early when the client declared the size up front
+    if file.size is not None and file.size > limit:
+        raise UploadTooLarge(limit)
+    
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(destination, "wb") as out:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge(limit)
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        if destination.exists():
+            destination.unlink()
+        raise
+    return size, digest.hexdigest()
+
+
+def process_video_ingest(url: str):
+    """Ingest stages that read the final (faststart) video, in one background task"""
+    preview_service.generate(url)
+    hls_service.ingest(url)
 
 
 class MediaService:
@@ -20,67 +91,132 @@ class MediaService:
         self.video_dir.mkdir(parents=True, exist_ok=True)
         self.images_dir.mkdir(parents=True, exist_ok=True)
     
-    async def save_audio_file(self, file: UploadFile, filename: str) -> str:
-        """Save audio file and return the relative path"""
-        file_path = self.audio_dir / filename
+    async def save_upload(self, file: UploadFile, kind: str, filename: str) -> Dict[str, Any]:
+        """
+        Stream an upload into media/<kind> without holding it in memory
         
-        # Save file
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        Args:
+            file: Uploaded file
+            kind: Media directory (audio, video, images)
+            filename: Name of the stored file
+            
+        Returns:
+            Dict with url, path, size (bytes), sha256 and deduplicated
+            
+        Raises:
+            UploadTooLarge: If the upload exceeds the limit for its kind
+        """
+        # Written to a hidden .part file so a partial upload is never served
+        part_path = self._dirs()[kind] / f".{filename}.part"
+        size, sha256 = await stream_upload(file, part_path, UPLOAD_LIMITS[kind]())
+        return self.finalize_upload(part_path, kind, filename, size, sha256)
+    
+    def finalize_upload(self, source: Path, kind: str, filename: str, size: int, sha256: str) -> Dict[str, Any]:
+        """
+        Move a fully received upload into media/<kind>
+        
+        Shared by direct and resumable uploads. The file goes into the
+        content-addressed media store: content that is already stored is
+        linked to the existing blob instead of being kept twice. source must
+        be on the same filesystem as the media directory; it is renamed or
+        deleted, never copied. In the background, videos are remuxed to
+        faststart and get their poster, scrub sprites and HLS package; audio
+        gets its waveform peaks and HLS package, images their placeholders.
         
-        return f"/media/audio/{filename}"
+        Returns:
+            Dict with url, path, size (bytes), sha256 and deduplicated
+        """
+        file_path = self._dirs()[kind] / filename
+        stored = media_store.ingest(source, kind, filename, sha256)
+        url = f"/media/{kind}/{filename}"
+        if kind == "video":
+            faststart_service.schedule(url, then=process_video_ingest)
+        elif kind == "audio":
+            waveform_service.schedule(url, file_path)
+            hls_service.schedule(url, str(file_path))
+        elif kind == "images":
+            placeholder_service.schedule(url, file_path)
+        return {
+            "url": url,
+            "path": str(file_path),
+            "size": size,
+            "sha256": sha256,
+            "deduplicated": stored["deduplicated"],
+        }
+    
+    async def save_audio_file(self, file: UploadFile, filename: str) -> str:
+        """Save audio file and return the relative path"""
+        return (await self.save_upload(file, "audio", filename))["url"]
     
     async def save_video_file(self, file: UploadFile, filename: str) -> str:
         """Save video file and return the relative path"""
-        file_path = self.video_dir / filename
-        
-        # Save file
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        return f"/media/video/{filename}"
+        return (await self.save_upload(file, "video", filename))["url"]
     
     async def save_image_file(self, file: UploadFile, filename: str) -> str:
         """Save image file and return the relative path"""
-        file_path = self.images_dir / filename
+        return (await self.save_upload(file, "images", filename))["url"]
+    
+    def _dirs(self) -> Dict[str, Path]:
+        return {
+            "audio": self.audio_dir,
+            "video": self.video_dir,
+            "images": self.images_dir,
+        }
+    
+    def resolve_media_path(self, media_path: str, kind: str) -> Optional[Path]:
+        """
+        Resolve a reference to already stored media to a file on disk
+        
+        Args:
+            media_path: Public URL (/media/video/x.mp4), path relative to the
+                media root (video/x.mp4) or bare filename/id (x.mp4)
+            kind: Media directory the file must live in (audio, video, images)
+            
+        Returns:
+            Absolute path to the file, or None if it does not exist or points
+            outside the media directory
+        """
+        base_dir = self._dirs()[kind].resolve()
+        
+        ref = media_path.strip()
+        if "://" in ref:
+            ref = urlparse(ref).path
+        ref = ref.lstrip("/")
+        if ref.startswith("media/"):
+            ref = ref[len("media/"):]
+        if not ref:
+            return None
         
-        # Save file
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        candidate = self.media_dir / ref if "/" in ref else base_dir / ref
+        resolved = candidate.resolve()
         
-        return f"/media/images/{filename}"
+        # Only serve files from this kind's directory, never in-flight temp files
+        if base_dir not in resolved.parents or resolved.name.startswith("temp_"):
+            return None
+        if not resolved.is_file():
+            return None
+        return resolved
     
     def get_duration(self, file_path: Path) -> Optional[int]:
-        """Get media file duration in seconds using FFprobe"""
+        """Get media file duration in seconds using FFprobe (cached per file version)"""
         try:
-            probe = ffmpeg.probe(str(file_path))
-            # Try to get duration from format first (more reliable)
-            if 'format' in probe and 'duration' in probe['format']:
-                duration = float(probe['format']['duration'])
-                return int(duration)
-            # Fallback to streams
-            for stream in probe.get('streams', []):
-                if 'duration' in stream:
-                    duration = float(stream['duration'])
-                    if duration > 0:
-                        return int(duration)
-            return None
+            duration = probe_cache.duration(file_path)
+            return int(duration) if duration is not None else None
         except Exception as e:
             print(f"Error getting duration: {e}")
             return None
     
     def generate_thumbnail(self, video_path: Path, output_path: Path) -> bool:
-        """Generate thumbnail from video file using FFmpeg"""
+        """Generate thumbnail from video file using FFmpeg (runs in the scheduler's thumbnail class)"""
         try:
-            (
+            media_scheduler.run(
+                "thumbnail",
+                run_ffmpeg,
                 ffmpeg
                 .input(str(video_path), ss='00:00:01')
                 .output(str(output_path), vframes=1)
-                .overwrite_output()
-                .run(quiet=True)
+                .overwrite_output(),
+                priority=Priority.BATCH
             )
             return True
         except Exception as e:
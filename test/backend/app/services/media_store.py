@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from app.config import settings
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaStore:
+    """
+    Content-addressed, reference-counted storage for media files
+
+    File data lives once under media/blobs/<sha[:2]>/<sha>. The public files
+    in media/audio, media/video and media/images are hard links to their
+    blob, so existing /media/... URLs (and StaticFiles) keep working while
+    identical content takes the disk space of a single copy. An index maps
+    each public name ("video/<file>") to its hash and counts the names that
+    reference every blob; a blob is deleted with its last name. Per-name
+    flags (e.g. faststart) record processing done on the stored file.
+
+    Files that predate the store, or live on a filesystem without hard link
+    support, are left as plain files and simply are not deduplicated.
+    """
+
+    def __init__(self):
+        self.media_dir = Path(settings.MEDIA_STORAGE_PATH)
+        self.blob_dir = self.media_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        cache_dir = self.media_dir / ".cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = cache_dir / "media_store.json"
+
+        self._lock = threading.RLock()
+        self._blobs: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._flags: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def ingest(self, source: Path, kind: str, filename: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store a new file under media/<kind>/<filename>
+
+        source is consumed: it becomes the blob, or is deleted when a blob
+        with the same content already exists.
+
+        Returns:
+            Dict with sha256, size and deduplicated (True when the content
+            was already stored)
+        """
+        sha256 = sha256 or sha256_file(source)
+        return self._link(Path(source), f"{kind}/{filename}", sha256)
+
+    def adopt(self, url: Optional[str]) -> Optional[str]:
+        """
+        Move an already written /media/... file (e.g. an edit output) into
+        the store, replacing it with a link to an existing blob if the same
+        content is stored. Returns the URL unchanged.
+        """
+        alias = self._alias_for(url)
+        if alias is None:
+            return url
+        with self._lock:
+            if alias in self._aliases:
+                return url
+        path = self.media_dir / alias
+        if not path.is_file():
+            return url
+        try:
+            self._link(path, alias, sha256_file(path))
+        except OSError as e:
+            print(f"Error adding {url} to media store: {e}")
+        return url
+
+    def release(self, url: str):
+        """Delete a public file, and its blob once nothing references it"""
+        alias = self._alias_for(url)
+        if alias is None:
+            return
+        with self._lock:
+            (self.media_dir / alias).unlink(missing_ok=True)
+            self._flags.pop(alias, None)
+            sha256 = self._aliases.pop(alias, None)
+            if sha256 is None:
+                self._save()
+                return
+            self._unref(sha256)
+            self._save()
+
+    def sha256_for(self, url: str) -> Optional[str]:
+        """Content hash of a stored /media/... file, if it is in the store"""
+        alias = self._alias_for(url)
+        if alias is None:
+            return None
+        with self._lock:
+            return self._aliases.get(alias)
+
+    def set_flag(self, url: str, name: str, value: Any):
+        """Record a processing flag on a stored /media/... file"""
+        alias = self._alias_for(url)
+        if alias is None:
+            return
+        with self._lock:
+            self._flags.setdefault(alias, {})[name] = value
+            self._save()
+
+    def flags(self, url: str) -> Dict[str, Any]:
+        alias = self._alias_for(url)
+        if alias is None:
+            return {}
+        with self._lock:
+            return dict(self._flags.get(alias, {}))
+
+    def urls_with_flag(self, name: str, value: Any) -> List[str]:
+        """/media/... URLs of the stored files whose flag name equals value"""
+        with self._lock:
+            return [f"/media/{alias}" for alias, flags in self._flags.items() if flags.get(name, ...) == value]
+
+    def blob_hashes(self) -> Set[str]:
+        """Content hashes of every stored blob"""
+        with self._lock:
+            return set(self._blobs)
+
+    def sha256_for_path(self, path: Path) -> Optional[str]:
+        """Content hash for a file under the media directory, if known"""
+        try:
+            relative = Path(path).resolve().relative_to(self.media_dir.resolve())
+        except ValueError:
+            return None
+        with self._lock:
+            return self._aliases.get(relative.as_posix())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = sum(blob["size"] for blob in self._blobs.values())
+            logical = sum(blob["size"] * blob["refs"] for blob in self._blobs.values())
+            return {
+                "blobs": len(self._blobs),
+                "aliases": len(self._aliases),
+                "stored_bytes": stored,
+                "saved_bytes": logical - stored,
+            }
+
+    def _link(self, source: Path, alias: str, sha256: str) -> Dict[str, Any]:
+        public_path = self.media_dir / alias
+        blob_path = self._blob_path(sha256)
+        with self._lock:
+            deduplicated = blob_path.exists()
+            if deduplicated:
+                if source != public_path:
+                    source.unlink()
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, blob_path)
+
+            size = blob_path.stat().st_size
+            temp_link = public_path.with_name(f".{public_path.name}.link")
+            try:
+                os.link(blob_path, temp_link)
+                os.replace(temp_link, public_path)
+            except OSError:
+                # No hard links here: keep a plain file outside the store
+                if not deduplicated:
+                    os.replace(blob_path, public_path)
+                else:
+                    shutil.copyfile(blob_path, public_path)
+                return {"sha256": sha256, "size": size, "deduplicated": False}
+
+            if alias in self._aliases:
+                self._unref(self._aliases[alias])
+            blob = self._blobs.setdefault(sha256, {"size": size, "refs": 0})
+            blob["refs"] += 1
+            self._aliases[alias] = sha256
+            self._save()
+            return {"sha256": sha256, "size": size, "deduplicated": deduplicated}
+
+    def _unref(self, sha256: str):
+        blob = self._blobs.get(sha256)
+        if blob is None:
+            return
+        blob["refs"] -= 1
+        if blob["refs"] <= 0:
+            del self._blobs[sha256]
+            self._blob_path(sha256).unlink(missing_ok=True)
+
+    def _alias_for(self, url: Optional[str]) -> Optional[str]:
+        if not url or not url.startswith("/media/"):
+            return None
+        alias = url[len("/media/"):]
+        if alias.startswith("blobs/") or ".." in alias.split("/"):
+            return None
+        return alias
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.blob_dir / sha256[:2] / sha256
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading media store index: {e}")
+            return
+        self._blobs = index.get("blobs", {})
+        self._aliases = index.get("aliases", {})
+        self._flags = index.get("flags", {})
+
+    def _save(self):
+        temp_path = self.index_path.with_suffix(".tmp")
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({"blobs": self._blobs, "aliases": self._aliases, "flags": self._flags}, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Error saving media store index: {e}")
+
+
+# Shared instance behind MediaService and the editing services
+media_store = MediaStore()
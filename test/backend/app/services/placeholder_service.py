@@ -0,0 +1,164 @@
+import asyncio
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from app.services.media_scheduler import media_scheduler, Priority, SchedulerBusy
+from app.services.media_store import media_store
+
+
+BASE83_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+# Blurhash is computed on a small copy; more pixels don't change the result visibly
+SAMPLE_SIZE = 32
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(
+        BASE83_CHARS[(value // (83 ** (length - i))) % 83]
+        for i in range(1, length + 1)
+    )
+
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash_encode(image: Image.Image, x_components: int = 4, y_components: int = 3) -> str:
+    """
+    Encode an RGB image as a blurhash string (https://blurha.sh)
+
+    Pure Python; pass a small image (see SAMPLE_SIZE), the cost is
+    width * height * x_components * y_components.
+    """
+    width, height = image.size
+    pixels = [
+        (_srgb_to_linear(r), _srgb_to_linear(g), _srgb_to_linear(b))
+        for r, g, b in image.getdata()
+    ]
+
+    # Cosine basis tables, shared by every component
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors: List[Tuple[float, float, float]] = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                basis_y = cos_y[j][y]
+                for x in range(width):
+                    basis = cos_x[i][x] * basis_y
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = int(max(0, min(82, math.floor(actual_max * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _base83(0, 1)
+
+    result += _base83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]),
+        4
+    )
+    for factor in ac:
+        quantised = [
+            int(max(0, min(18, math.floor(_sign_pow(v / maximum, 0.5) * 9 + 9.5))))
+            for v in factor
+        ]
+        result += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
+
+
+def dominant_color(image: Image.Image) -> str:
+    """Most common color of a 5-color median cut palette, as #rrggbb"""
+    quantized = image.quantize(colors=5)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def compute_placeholders(path: Path) -> Dict[str, str]:
+    """Blurhash and dominant color of an image file"""
+    with Image.open(path) as image:
+        image.draft("RGB", (SAMPLE_SIZE * 4, SAMPLE_SIZE * 4))
+        image = image.convert("RGB")
+        image.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE))
+        return {
+            "blurhash": blurhash_encode(image),
+            "color": dominant_color(image),
+        }
+
+
+class PlaceholderService:
+    """
+    Image placeholders (blurhash + dominant color) for instant tile painting
+
+    Computed once per stored image, at ingest, and kept as flags on the
+    image's media store record. Records that reference an image copy them
+    into their own columns so list responses need no extra lookups.
+    """
+
+    def schedule(self, url: str, path: Path):
+        """Compute placeholders for a newly stored image in the background"""
+        try:
+            media_scheduler.submit("thumbnail", self.ensure, url, path, priority=Priority.BATCH)
+        except (SchedulerBusy, RuntimeError) as e:
+            # Computed on demand when a record first references the image
+            print(f"Deferring placeholders for {url}: {e}")
+
+    def ensure(self, url: str, path: Path) -> Optional[Dict[str, str]]:
+        """Stored placeholders for an image, computing them if needed (blocking)"""
+        flags = media_store.flags(url)
+        if flags.get("blurhash"):
+            return {"blurhash": flags["blurhash"], "color": flags.get("color")}
+        try:
+            placeholders = compute_placeholders(path)
+        except Exception as e:
+            print(f"Error computing placeholders for {url}: {e}")
+            return None
+        media_store.set_flag(url, "blurhash", placeholders["blurhash"])
+        media_store.set_flag(url, "color", placeholders["color"])
+        return placeholders
+
+    async def get(self, url: str, path: Path) -> Optional[Dict[str, str]]:
+        """Placeholders for an image without blocking the event loop"""
+        flags = media_store.flags(url)
+        if flags.get("blurhash"):
+            return {"blurhash": flags["blurhash"], "color": flags.get("color")}
+        try:
+            return await asyncio.wrap_future(
+                media_scheduler.submit("thumbnail", self.ensure, url, path, priority=Priority.INTERACTIVE)
+            )
+        except SchedulerBusy:
+            return None
+
+
+# Shared instance for the upload path and the routes creating records
+placeholder_service = PlaceholderService()
@@ -0,0 +1,148 @@
+import ffmpeg
+import math
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+from app.config import settings
+from app.services.job_service import run_ffmpeg
+from app.services.media_store import media_store, sha256_file
+from app.services.probe_cache import probe_cache
+from app.services.placeholder_service import placeholder_service
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+
+class PreviewService:
+    """
+    Poster frame and scrub sprites for videos, from a single decode
+
+    One FFmpeg pass splits the decoded video: one branch picks the poster
+    frame, the other samples a frame every few seconds and tiles them into
+    sprite sheets. A WebVTT file maps each time range to its tile
+    (sprite_001.jpg#xywh=x,y,w,h) for seek previews.
+    """
+
+    THUMB_WIDTH = 160
+    TILE_COLUMNS = 10
+    TILE_ROWS = 10
+    MIN_INTERVAL = 5  # Seconds between sprite frames
+    MAX_THUMBS = 300  # Longer videos sample less often
+
+    def __init__(self):
+        self.media_dir = Path(settings.MEDIA_STORAGE_PATH)
+        self.previews_dir = self.media_dir / "previews"
+        self.previews_dir.mkdir(parents=True, exist_ok=True)
+        self.images_dir = self.media_dir / "images"
+
+    def generate(self, url: str, input_path: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """
+        Generate (or reuse) the poster and sprite sheets of a stored video
+
+        The poster is stored as a regular image under /media/images with its
+        placeholders, so it can be used as a cover image.
+
+        Args:
+            url: /media/video/... URL of the video (results are recorded as
+                flags on its media store record)
+            input_path: Path to the video, derived from url if omitted
+
+        Returns:
+            Dict with poster and preview_vtt URLs plus the poster's blurhash
+            and color, or None on error
+        """
+        try:
+            source = Path(input_path) if input_path else self.media_dir / url[len("/media/"):]
+            key = media_store.sha256_for_path(source) or sha256_file(source)
+            final_dir = self.previews_dir / key
+            poster_name = f"poster_{key[:24]}.jpg"
+            result = {
+                "poster": f"/media/images/{poster_name}",
+                "preview_vtt": f"/media/previews/{key}/previews.vtt",
+            }
+
+            if not (final_dir / "previews.vtt").exists() or not (self.images_dir / poster_name).exists():
+                self._render(source, final_dir, poster_name)
+
+            placeholders = placeholder_service.ensure(result["poster"], self.images_dir / poster_name) or {}
+            result["blurhash"] = placeholders.get("blurhash")
+            result["color"] = placeholders.get("color")
+
+            media_store.set_flag(url, "poster", result["poster"])
+            media_store.set_flag(url, "preview_vtt", result["preview_vtt"])
+            return result
+        except Exception as e:
+            print(f"Error generating previews: {e}")
+            return None
+
+    def _render(self, source: Path, final_dir: Path, poster_name: str):
+        probe = probe_cache.probe(source)
+        video_stream = next(s for s in probe['streams'] if s.get('codec_type') == 'video')
+        duration = float(probe['format']['duration'])
+
+        width = int(video_stream['width'])
+        height = int(video_stream['height'])
+        thumb_height = max(2, round(self.THUMB_WIDTH * height / width / 2) * 2)
+        interval = max(self.MIN_INTERVAL, math.ceil(duration / self.MAX_THUMBS))
+        poster_time = min(1.0, duration / 2)
+
+        work_dir = self.previews_dir / f".{final_dir.name}.{uuid.uuid4().hex[:8]}"
+        work_dir.mkdir(parents=True)
+        try:
+            split = ffmpeg.input(str(source)).video.filter_multi_output('split', 2)
+            poster = ffmpeg.output(
+                split[0].filter('select', f'gte(t,{poster_time})'),
+                str(work_dir / 'poster.jpg'),
+                vframes=1,
+                **{'q:v': 3}
+            )
+            sprites = ffmpeg.output(
+                split[1]
+                .filter('fps', fps=f'1/{interval}')
+                .filter('scale', self.THUMB_WIDTH, thumb_height)
+                .filter('tile', f'{self.TILE_COLUMNS}x{self.TILE_ROWS}'),
+                str(work_dir / 'sprite_%03d.jpg'),
+                **{'q:v': 5}
+            )
+
+            # FFmpeg command: -i INPUT -filter_complex "split[p][s];[p]select..;[s]fps,scale,tile" POSTER SPRITES
+            run_ffmpeg(ffmpeg.merge_outputs(poster, sprites).overwrite_output(), duration=duration)
+
+            self._write_vtt(work_dir, duration, interval, thumb_height)
+
+            poster_path = work_dir / 'poster.jpg'
+            if poster_path.exists():
+                media_store.ingest(poster_path, "images", poster_name)
+
+            try:
+                os.replace(work_dir, final_dir)
+            except OSError:
+                # Already generated by a concurrent job
+                if not (final_dir / "previews.vtt").exists():
+                    raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _write_vtt(self, work_dir: Path, duration: float, interval: int, thumb_height: int):
+        per_sheet = self.TILE_COLUMNS * self.TILE_ROWS
+        count = max(1, math.ceil(duration / interval))
+        lines = ["WEBVTT", ""]
+        for index in range(count):
+            start = index * interval
+            end = min(duration, start + interval)
+            sheet, cell = divmod(index, per_sheet)
+            x = (cell % self.TILE_COLUMNS) * self.THUMB_WIDTH
+            y = (cell // self.TILE_COLUMNS) * thumb_height
+            lines.append(f"{_vtt_timestamp(start)} --> {_vtt_timestamp(end)}")
+            lines.append(f"sprite_{sheet + 1:03d}.jpg#xywh={x},{y},{self.THUMB_WIDTH},{thumb_height}")
+            lines.append("")
+        (work_dir / "previews.vtt").write_text("\n".join(lines))
+
+
+# Shared instance for the ingest pipeline and podcast jobs
+preview_service = PreviewService()
@@ -0,0 +1,129 @@
+import ffmpeg
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from app.config import settings
+
+
+class ProbeCache:
+    """
+    Persistent cache of ffprobe results, shared by every media service
+
+    Entries are keyed by the file's absolute path and are valid while its
+    size and mtime are unchanged, so a replaced or re-encoded file is probed
+    again. Results (format and streams, without tags) are kept in
+    media/.cache/probe_cache.json across restarts; a hit costs a stat call
+    and a dictionary lookup instead of an ffprobe process. New results are
+    written at most every SAVE_INTERVAL seconds and by flush() at shutdown.
+    """
+
+    MAX_ENTRIES = 5000
+    # Seconds between index writes caused by new results
+    SAVE_INTERVAL = 30
+
+    def __init__(self):
+        cache_dir = Path(settings.MEDIA_STORAGE_PATH) / ".cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = cache_dir / "probe_cache.json"
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._load()
+
+    def probe(self, path: Any) -> Dict[str, Any]:
+        """
+        ffprobe output (format and streams) of a media file
+
+        Raises:
+            ffmpeg.Error: If ffprobe can't read the file (failures are not cached)
+            OSError: If the file doesn't exist
+        """
+        key = str(Path(path).resolve())
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["probe"]
+            self.misses += 1
+
+        result = ffmpeg.probe(key)
+        probe = {
+            "format": {k: v for k, v in result.get("format", {}).items() if k != "tags"},
+            "streams": [
+                {k: v for k, v in stream.items() if k != "tags"}
+                for stream in result.get("streams", [])
+            ],
+        }
+        with self._lock:
+            self._entries[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "probe": probe}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            due = time.monotonic() - self._saved_at > self.SAVE_INTERVAL
+        if due:
+            self._save()
+        return probe
+
+    def duration(self, path: Any) -> Optional[float]:
+        """Duration in seconds from the container, falling back to the streams"""
+        probe = self.probe(path)
+        duration = probe["format"].get("duration")
+        if duration not in (None, "N/A"):
+            return float(duration)
+        for stream in probe["streams"]:
+            if stream.get("duration") not in (None, "N/A") and float(stream["duration"]) > 0:
+                return float(stream["duration"])
+        return None
+
+    def flush(self):
+        """Write the index if new results were added since the last save"""
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self._save()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path) as f:
+                self._entries = OrderedDict(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Error loading probe cache: {e}")
+
+    def _save(self):
+        # Serialized outside the entry lock so probes are not held up by the write
+        with self._save_lock:
+            with self._lock:
+                entries = json.dumps(self._entries)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            temp_path = self.index_path.with_suffix(".tmp")
+            try:
+                with open(temp_path, "w") as f:
+                    f.write(entries)
+                os.replace(temp_path, self.index_path)
+            except OSError as e:
+                with self._lock:
+                    self._dirty = True
+                print(f"Error saving probe cache: {e}")
+
+
+# Shared instance so every service hits the same cache
+probe_cache = ProbeCache()
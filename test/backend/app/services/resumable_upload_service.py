@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+import aiofiles
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+from app.config import settings
+from app.services.media_service import MediaService, UploadTooLarge, UPLOAD_LIMITS
+
+
+class UploadNotFound(Exception):
+    """Raised for an unknown (or already finished) upload id"""
+
+
+class UploadOffsetMismatch(Exception):
+    """Raised when a chunk does not start at the current upload offset"""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload-Offset does not match the current offset {offset}")
+        self.offset = offset
+
+
+class UploadInProgress(Exception):
+    """Raised when another request is already appending to the upload"""
+
+
+class ResumableUploadService:
+    """
+    Offset-based resumable uploads (tus-style create / HEAD / PATCH)
+
+    Each upload is a .part file plus a JSON metadata file in
+    media/.uploads. Chunks are appended at the current offset as they
+    arrive, so bytes received before a dropped connection are kept and the
+    client resumes from the offset reported by HEAD. The SHA-256 is updated
+    incrementally; after a restart it is rebuilt from the part file once.
+    When the last byte arrives the part file is handed to
+    MediaService.finalize_upload, which renames it into place.
+    """
+
+    def __init__(self, media_service: Optional[MediaService] = None):
+        self.media_service = media_service or MediaService()
+        self.upload_dir = Path(settings.MEDIA_STORAGE_PATH) / ".uploads"
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self._digests: Dict[str, Any] = {}
+        self._active: Set[str] = set()  # Uploads with a PATCH in flight
+
+    def create(self, kind: str, length: int, filename: str, content_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start an upload of `length` bytes
+
+        Raises:
+            UploadTooLarge: If length exceeds the limit for kind
+        """
+        limit = UPLOAD_LIMITS[kind]()
+        if length > limit:
+            raise UploadTooLarge(limit)
+
+        upload_id = uuid.uuid4().hex
+        now = time.time()
+        meta = {
+            "id": upload_id,
+            "kind": kind,
+            "filename": filename,
+            "content_type": content_type,
+            "length": length,
+            "offset": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._part_path(upload_id).touch()
+        self._digests[upload_id] = hashlib.sha256()
+        self._save_meta(meta)
+        return meta
+
+    def get(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Current metadata for an upload
+
+        Raises:
+            UploadNotFound: If the upload does not exist
+        """
+        meta_path = self._meta_path(upload_id)
+        part_path = self._part_path(upload_id)
+        if not upload_id.isalnum() or not meta_path.exists() or not part_path.exists():
+            raise UploadNotFound(upload_id)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        # The part file is the source of truth if a write outlived its metadata update
+        meta["offset"] = min(part_path.stat().st_size, meta["length"])
+        return meta
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Append a chunk stream starting at offset
+
+        Returns:
+            Upload metadata; once complete it also holds the stored file
+            (url, path, size, sha256) under "result"
+
+        Raises:
+            UploadNotFound, UploadOffsetMismatch, UploadInProgress,
+            UploadTooLarge: If the chunk runs past the declared length
+        """
+        self.get(upload_id)
+        if upload_id in self._active:
+            raise UploadInProgress(upload_id)
+
+        self._active.add(upload_id)
+        try:
+            meta = self.get(upload_id)
+            if offset != meta["offset"]:
+                raise UploadOffsetMismatch(meta["offset"])
+
+            part_path = self._part_path(upload_id)
+            digest = await self._digest(upload_id, part_path, meta["offset"])
+            try:
+                async with aiofiles.open(part_path, "ab") as out:
+                    async for chunk in chunks:
+                        if not chunk:
+                            continue
+                        if meta["offset"] + len(chunk) > meta["length"]:
+                            raise UploadTooLarge(meta["length"])
+                        await out.write(chunk)
+                        digest.update(chunk)
+                        meta["offset"] += len(chunk)
+            except BaseException:
+                # The hash no longer matches what reached the disk; rebuild it on resume
+                self._digests.pop(upload_id, None)
+                raise
+            finally:
+                meta["updated_at"] = time.time()
+                self._save_meta(meta)
+
+            if meta["offset"] == meta["length"]:
+                meta["result"] = self._finish(meta, digest.hexdigest())
+        finally:
+            self._active.discard(upload_id)
+        return meta
+
+    def abort(self, upload_id: str):
+        """Discard an upload and its partial data"""
+        self.get(upload_id)
+        self._discard(upload_id)
+
+    def expire(self, max_age: float, dry_run: bool = False) -> Tuple[int, int]:
+        """
+        Discard uploads that received no data for max_age seconds
+
+        Returns:
+            (uploads discarded, bytes reclaimed)
+        """
+        cutoff = time.time() - max_age
+        count = reclaimed = 0
+        for part_path in self.upload_dir.glob("*.part"):
+            upload_id = part_path.stem
+            if upload_id in self._active:
+                continue
+            try:
+                stat = part_path.stat()
+            except OSError:
+                continue
+            if stat.st_mtime > cutoff:
+                continue
+            count += 1
+            reclaimed += stat.st_size
+            if not dry_run:
+                self._discard(upload_id)
+        return count, reclaimed
+
+    def _finish(self, meta: Dict[str, Any], sha256: str) -> Dict[str, Any]:
+        stored = self.media_service.finalize_upload(
+            self._part_path(meta["id"]),
+            meta["kind"],
+            meta["filename"],
+            meta["length"],
+            sha256
+        )
+        self._discard(meta["id"])
+        return stored
+
+    async def _digest(self, upload_id: str, part_path: Path, offset: int):
+        digest = self._digests.get(upload_id)
+        if digest is None:
+            digest = await asyncio.get_running_loop().run_in_executor(None, self._hash_part, part_path, offset)
+            self._digests[upload_id] = digest
+        return digest
+
+    @staticmethod
+    def _hash_part(part_path: Path, offset: int):
+        digest = hashlib.sha256()
+        remaining = offset
+        with open(part_path, "rb") as f:
+            while remaining > 0:
+                chunk = f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest
+
+    def _discard(self, upload_id: str):
+        self._digests.pop(upload_id, None)
+        for path in (self._part_path(upload_id), self._meta_path(upload_id)):
+            if path.exists():
+                path.unlink()
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.upload_dir / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.upload_dir / f"{upload_id}.json"
+
+    def _save_meta(self, meta: Dict[str, Any]):
+        meta_path = self._meta_path(meta["id"])
+        temp_path = meta_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump({k: v for k, v in meta.items() if k != "result"}, f)
+        os.replace(temp_path, meta_path)
+
+
+# Shared instance so in-progress hashes survive between requests
+resumable_upload_service = ResumableUploadService()
@@ -0,0 +1,380 @@
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from sqlalchemy import select
+from app.config import settings
+from app.database.connection import AsyncSessionLocal
+from app.models import BibleStory, CommunityPost, LiveStream, MusicTrack, Playlist, Podcast, User
+from app.services.faststart_service import faststart_service
+from app.services.media_store import media_store
+from app.services.resumable_upload_service import resumable_upload_service
+from app.services.waveform_service import VERSION as PEAKS_VERSION, waveform_service
+
+
+# Columns that hold media references (/media/... URLs, absolute URLs or
+# paths relative to the media directory); a file referenced here is never collected
+REFERENCE_COLUMNS = (
+    Podcast.audio_url, Podcast.video_url, Podcast.hls_url, Podcast.preview_vtt_url, Podcast.cover_image,
+    MusicTrack.audio_url, MusicTrack.cover_image,
+    BibleStory.audio_url, BibleStory.cover_image,
+    Playlist.cover_image,
+    CommunityPost.image_url,
+    User.avatar,
+    LiveStream.thumbnail,
+)
+
+# Scratch files of the editing services and upload paths
+TEMP_PREFIXES = ("temp_", "concat_", "segment_")
+
+# Directories of stored files and of per-content output directories
+FILE_DIRS = ("audio", "video", "images")
+OUTPUT_DIRS = ("hls", "previews")
+
+# Names of the editing services' outputs and of generated posters; with the
+# output directories, these are the only files evicted for the disk budget
+# (uploads are only collected as orphans, after MEDIA_ORPHAN_GRACE)
+DERIVED_PREFIXES = {
+    "audio": ("trimmed_", "merged_", "fadein_", "fadeout_", "fadeinout_"),
+    "video": ("trimmed_", "no_audio_", "with_audio_", "replaced_audio_", "filtered_", "rendered_"),
+    "images": ("poster_",),
+}
+
+# Recently written or used files are never evicted for the budget (jobs may still be using them)
+MIN_EVICTION_AGE = 10 * 60
+
+
+def is_derived(relative: str) -> bool:
+    """Whether a stored entry (path relative to the media directory) can be regenerated or re-rendered"""
+    directory, _, name = relative.partition("/")
+    return directory in OUTPUT_DIRS or name.startswith(DERIVED_PREFIXES.get(directory, ()))
+
+
+def media_reference_paths(reference: str) -> List[str]:
+    """
+    Paths relative to the media directory that a stored reference may point at
+
+    References are normalised like MediaService.resolve_media_path: the scheme
+    and host of an absolute URL, a leading "/" and an optional "media/" are
+    dropped. A bare filename could be in any stored file directory, so it
+    protects its name in all of them.
+    """
+    ref = reference.strip()
+    if "://" in ref:
+        ref = urlparse(ref).path
+    ref = ref.lstrip("/")
+    if ref.startswith("media/"):
+        ref = ref[len("media/"):]
+    if not ref:
+        return []
+    if "/" not in ref:
+        return [f"{directory}/{ref}" for directory in FILE_DIRS]
+    return [ref]
+
+
+class StorageJanitor:
+    """
+    Garbage collection and disk budget for the media directory
+
+    A sweep:
+      1. deletes scratch files (temp_*, concat_*.txt, segment_*, hidden
+         .part/.tmp files and abandoned work directories) older than
+         MEDIA_TEMP_MAX_AGE, and resumable uploads idle for MEDIA_UPLOAD_EXPIRY
+      2. deletes stored files, HLS packages and preview sets that no database
+         row references and that were not used for MEDIA_ORPHAN_GRACE, and
+         waveform peaks older than that whose audio is no longer in the media
+         store (peaks of audio outside the store are rebuilt on demand)
+      3. if the media directory is still above MEDIA_DISK_BUDGET_BYTES, evicts
+         unreferenced derived files (edit results, HLS packages, previews and
+         posters) least recently used first; uploads and the outputs
+         generated for them are left to the orphan grace period
+      4. queues again the faststart remuxes that could not be queued
+
+    Last use is the later of the file's mtime and the last time it was served
+    or used as an edit input (see touch), persisted between sweeps. Files in
+    the media store are released through it so their blob goes with the last
+    name; hard-linked bytes are only counted as reclaimed when freed.
+    """
+
+    def __init__(self):
+        self.media_dir = Path(settings.MEDIA_STORAGE_PATH)
+        cache_dir = self.media_dir / ".cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = cache_dir / "janitor.json"
+
+        self._lock = threading.Lock()
+        self._access: Dict[str, float] = {}
+        self._sweep_lock = asyncio.Lock()
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._load()
+
+    def touch(self, path: Path):
+        """Record a use of a stored file (serving it or editing from it)"""
+        try:
+            relative = Path(path).resolve().relative_to(self.media_dir.resolve()).as_posix()
+        except ValueError:
+            return
+        with self._lock:
+            self._access[relative] = time.time()
+
+    async def sweep(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Run one collection pass; with dry_run nothing is deleted"""
+        async with self._sweep_lock:
+            referenced = await self._referenced()
+            report = await asyncio.get_running_loop().run_in_executor(None, self._sweep, referenced, dry_run)
+            if not dry_run:
+                # Ingest work skipped while the scheduler was full
+                report["faststart_retried"] = faststart_service.retry_deferred()
+                self.last_report = report
+            return report
+
+    async def run_periodically(self):
+        """Sweep every MEDIA_JANITOR_INTERVAL seconds until cancelled"""
+        while True:
+            await asyncio.sleep(settings.MEDIA_JANITOR_INTERVAL)
+            try:
+                report = await self.sweep()
+                print(f"Storage janitor reclaimed {report['reclaimed_bytes']} bytes")
+            except Exception as e:
+                print(f"Error sweeping media storage: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budget_bytes": settings.MEDIA_DISK_BUDGET_BYTES,
+            "interval": settings.MEDIA_JANITOR_INTERVAL,
+            "last_sweep": self.last_report,
+        }
+
+    async def _referenced(self) -> Set[str]:
+        """Relative paths (files and output directories) referenced by the database"""
+        urls: Set[str] = set()
+        async with AsyncSessionLocal() as session:
+            for column in REFERENCE_COLUMNS:
+                result = await session.execute(select(column).where(column.isnot(None)))
+                urls.update(value for value in result.scalars() if value)
+
+        referenced: Set[str] = set()
+        for url in urls:
+            for relative in media_reference_paths(url):
+                referenced.add(relative)
+                parts = relative.split("/")
+                if parts[0] in OUTPUT_DIRS and len(parts) > 1:
+                    referenced.add(f"{parts[0]}/{parts[1]}")
+                # Previews and HLS packages generated for referenced media
+                referenced.update(self._generated_for(relative))
+        return referenced
+
+    @staticmethod
+    def _generated_for(relative: str) -> Set[str]:
+        """Relative paths of the poster, previews and HLS package generated for a stored file"""
+        paths: Set[str] = set()
+        flags = media_store.flags("/media/" + relative)
+        for name in ("poster", "preview_vtt", "hls"):
+            if flags.get(name):
+                derived = flags[name][len("/media/"):]
+                paths.add(derived)
+                paths.add("/".join(derived.split("/")[:2]))
+        return paths
+
+    def _sweep(self, referenced: Set[str], dry_run: bool) -> Dict[str, Any]:
+        now = time.time()
+        report: Dict[str, Any] = {"dry_run": dry_run}
+
+        removed = [self._remove(path, dry_run) for path in self._temp_files(now)]
+        report["temp_files"] = {"count": len(removed), "bytes": sum(removed)}
+
+        count, size = resumable_upload_service.expire(settings.MEDIA_UPLOAD_EXPIRY, dry_run)
+        report["stale_uploads"] = {"count": count, "bytes": size}
+
+        candidates = [
+            (self._last_access(path, relative), path, relative)
+            for path, relative in self._stored_entries()
+            if relative not in referenced
+        ]
+        orphan_cutoff = now - settings.MEDIA_ORPHAN_GRACE
+        removed = [self._remove(path, dry_run) for used, path, _ in candidates if used < orphan_cutoff]
+        report["orphans"] = {"count": len(removed), "bytes": sum(removed)}
+
+        removed = [self._remove(path, dry_run) for path in self._stale_peaks(orphan_cutoff)]
+        report["stale_peaks"] = {"count": len(removed), "bytes": sum(removed)}
+
+        disk_bytes = self._disk_usage()
+        budget = settings.MEDIA_DISK_BUDGET_BYTES
+        evicted: List[int] = []
+        if not dry_run and disk_bytes > budget:
+            eviction_cutoff = now - MIN_EVICTION_AGE
+            # Outputs of uploads still waiting for their row stay with the upload
+            pending: Set[str] = set()
+            for _, path, relative in candidates:
+                if not is_derived(relative) and path.exists():
+                    pending.update(self._generated_for(relative))
+            for used, path, relative in sorted(candidates):
+                if disk_bytes <= budget:
+                    break
+                if not is_derived(relative) or relative in pending:
+                    continue
+                if used >= eviction_cutoff or not path.exists():
+                    continue
+                freed = self._remove(path, dry_run)
+                evicted.append(freed)
+                disk_bytes -= freed
+        report["evicted"] = {"count": len(evicted), "bytes": sum(evicted)}
+
+        report["reclaimed_bytes"] = (
+            report["temp_files"]["bytes"] + report["stale_uploads"]["bytes"]
+            + report["orphans"]["bytes"] + report["stale_peaks"]["bytes"] + report["evicted"]["bytes"]
+        )
+        report["disk_bytes"] = disk_bytes if not dry_run else disk_bytes - report["reclaimed_bytes"]
+        report["budget_bytes"] = budget
+        report["finished_at"] = time.time()
+
+        if not dry_run:
+            with self._lock:
+                self._access = {
+                    relative: used for relative, used in self._access.items()
+                    if (self.media_dir / relative).exists()
+                }
+            self._save()
+        return report
+
+    def _temp_files(self, now: float) -> Iterator[Path]:
+        cutoff = now - settings.MEDIA_TEMP_MAX_AGE
+        for directory in FILE_DIRS + OUTPUT_DIRS:
+            for entry in self._scan(self.media_dir / directory):
+                name = entry.name
+                if not (name.startswith(".") or name.startswith(TEMP_PREFIXES)):
+                    continue
+                try:
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        yield Path(entry.path)
+                except OSError:
+                    continue
+        for entry in self._scan(self.media_dir / ".cache", recursive=True):
+            if entry.name.startswith(".") and entry.name.endswith(".tmp"):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        yield Path(entry.path)
+                except OSError:
+                    continue
+
+    def _stored_entries(self) -> Iterator[Tuple[Path, str]]:
+        """Stored files and output directories, as (path, path relative to the media directory)"""
+        for directory in FILE_DIRS + OUTPUT_DIRS:
+            for entry in self._scan(self.media_dir / directory):
+                if entry.name.startswith(".") or entry.name.startswith(TEMP_PREFIXES):
+                    continue
+                yield Path(entry.path), f"{directory}/{entry.name}"
+
+    def _stale_peaks(self, cutoff: float) -> Iterator[Path]:
+        """Peaks files not modified since cutoff whose content hash is not a stored blob"""
+        stored = media_store.blob_hashes()
+        suffix = f".v{PEAKS_VERSION}.peaks"
+        for entry in self._scan(waveform_service.peaks_dir):
+            name = entry.name
+            if name.startswith(".") or not name.endswith(".peaks"):
+                continue
+            if name.endswith(suffix) and name[:-len(suffix)] in stored:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    yield Path(entry.path)
+            except OSError:
+                continue
+
+    def _last_access(self, path: Path, relative: str) -> float:
+        try:
+            stat = path.stat()
+        except OSError:
+            return 0.0
+        modified = stat.st_mtime
+        if path.is_dir():
+            # Output directories are renamed into place when complete
+            modified = max(modified, stat.st_ctime)
+        with self._lock:
+            return max(modified, self._access.get(relative, 0.0))
+
+    def _remove(self, path: Path, dry_run: bool) -> int:
+        """Delete a file or directory, returning the bytes actually freed"""
+        try:
+            if path.is_dir():
+                freed = sum(
+                    entry.stat().st_size for entry in self._scan(path, recursive=True)
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_nlink == 1
+                )
+                if not dry_run:
+                    shutil.rmtree(path, ignore_errors=True)
+                return freed
+
+            stat = path.stat()
+            url = "/media/" + path.relative_to(self.media_dir).as_posix()
+            if media_store.sha256_for(url):
+                # The blob is the other link; it goes with its last name
+                freed = stat.st_size if stat.st_nlink <= 2 else 0
+                if not dry_run:
+                    media_store.release(url)
+            else:
+                freed = stat.st_size if stat.st_nlink == 1 else 0
+                if not dry_run:
+                    path.unlink()
+            return freed
+        except OSError as e:
+            print(f"Error removing {path}: {e}")
+            return 0
+
+    def _disk_usage(self) -> int:
+        """Bytes used under the media directory, counting hard-linked files once"""
+        seen: Set[Tuple[int, int]] = set()
+        total = 0
+        for entry in self._scan(self.media_dir, recursive=True):
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            identity = (stat.st_dev, stat.st_ino)
+            if identity in seen:
+                continue
+            seen.add(identity)
+            total += stat.st_size
+        return total
+
+    @classmethod
+    def _scan(cls, directory: Path, recursive: bool = False) -> Iterator[os.DirEntry]:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            yield entry
+            if recursive and entry.is_dir(follow_symlinks=False):
+                yield from cls._scan(Path(entry.path), recursive=True)
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path) as f:
+                self._access = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading janitor index: {e}")
+
+    def _save(self):
+        temp_path = self.index_path.with_suffix(".tmp")
+        try:
+            with self._lock:
+                access = dict(self._access)
+            with open(temp_path, "w") as f:
+                json.dump(access, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Error saving janitor index: {e}")
+
+
+# Shared instance for the media routes, the sweep endpoint and the periodic task
+storage_janitor = StorageJanitor()
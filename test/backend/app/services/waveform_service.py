@@ -0,0 +1,193 @@
+import asyncio
+import ffmpeg
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from app.config import settings
+from app.services.media_scheduler import media_scheduler, Priority, SchedulerBusy
+from app.services.media_store import media_store, sha256_file
+
+
+# Peaks file layout (little endian):
+#   header  "PEAK", version u8, sample_rate u32, samples_per_peak u32, levels u16
+#   counts  one u32 per level (number of min/max pairs)
+#   data    per level, interleaved int8 min/max pairs
+# Level 0 has one pair per samples_per_peak samples; each next level halves it.
+MAGIC = b"PEAK"
+VERSION = 2  # Version 1 stored value counts instead of pair counts
+HEADER = struct.Struct("<4sBIIH")
+
+
+class WaveformDecodeError(Exception):
+    """Raised when FFmpeg cannot decode the audio (fully) for peaks"""
+
+
+class WaveformService:
+    """
+    Multi-resolution waveform peaks for the audio editor
+
+    Each audio file is decoded once through an FFmpeg PCM pipe (mono, low
+    sample rate) and reduced with NumPy to min/max pairs; coarser levels are
+    built by merging neighbouring pairs. Files are keyed by content hash in
+    media/.cache/peaks and read back with a memory map, so serving a zoom
+    level is a slice.
+    """
+
+    SAMPLE_RATE = 8000
+    SAMPLES_PER_PEAK = 64  # Level 0: 125 peaks per second
+    MIN_LEVEL_PEAKS = 512  # Stop adding levels below this many peaks
+    READ_SIZE = 1024 * 1024
+
+    def __init__(self):
+        self.peaks_dir = Path(settings.MEDIA_STORAGE_PATH) / ".cache" / "peaks"
+        self.peaks_dir.mkdir(parents=True, exist_ok=True)
+
+    def schedule(self, url: str, path: Path):
+        """Compute peaks for a new audio file in the background"""
+        try:
+            media_scheduler.submit("audio", self.ensure, path, priority=Priority.BATCH)
+        except (SchedulerBusy, RuntimeError) as e:
+            # Computed on demand when the editor first asks for them
+            print(f"Deferring waveform peaks for {url}: {e}")
+
+    def ensure(self, path: Path) -> Path:
+        """Path of the peaks file for an audio file, extracting it if needed (blocking)"""
+        peaks_path = self._peaks_path(path)
+        if peaks_path.exists():
+            return peaks_path
+
+        levels = self._build_levels(self._extract(path))
+        # Unique per call: a background job and an editor request may build the same file
+        fd, temp_name = tempfile.mkstemp(prefix=f".{peaks_path.name}.", suffix=".tmp", dir=self.peaks_dir)
+        temp_path = Path(temp_name)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, self.SAMPLE_RATE, self.SAMPLES_PER_PEAK, len(levels)))
+                f.write(struct.pack(f"<{len(levels)}I", *(len(level) // 2 for level in levels)))
+                for level in levels:
+                    f.write(level.tobytes())
+            os.replace(temp_path, peaks_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        return peaks_path
+
+    async def get(self, path: Path, start: float, end: Optional[float], width: int) -> Dict:
+        """
+        Peaks covering [start, end) seconds at the coarsest level with at least `width` pairs
+
+        Raises:
+            SchedulerBusy: If the peaks must be extracted and the audio queue is full
+            SchedulerClosed: If the peaks must be extracted during shutdown
+            WaveformDecodeError: If the file is not readable audio
+        """
+        # Hashes files outside the media store, so kept off the event loop
+        peaks_path = await asyncio.get_running_loop().run_in_executor(None, self._peaks_path, path)
+        if not peaks_path.exists():
+            await asyncio.wrap_future(
+                media_scheduler.submit("audio", self.ensure, path, priority=Priority.INTERACTIVE)
+            )
+        return self.read(peaks_path, start, end, width)
+
+    def read(self, peaks_path: Path, start: float, end: Optional[float], width: int) -> Dict:
+        with open(peaks_path, "rb") as f:
+            magic, version, sample_rate, samples_per_peak, level_count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Unsupported peaks file")
+            counts = struct.unpack(f"<{level_count}I", f.read(4 * level_count))
+
+        data = np.memmap(peaks_path, dtype=np.int8, mode="r", offset=HEADER.size + 4 * level_count)
+        base_rate = sample_rate / samples_per_peak  # Level 0 pairs per second
+        duration = counts[0] / base_rate
+        end = duration if end is None else min(end, duration)
+        start = max(0.0, min(start, end))
+
+        # Coarsest level that still gives the client `width` pairs for the range
+        level = 0
+        for candidate in range(level_count):
+            if (end - start) * base_rate / (2 ** candidate) >= width:
+                level = candidate
+            else:
+                break
+
+        offset = sum(counts[:level]) * 2
+        rate = base_rate / (2 ** level)
+        first = int(start * rate)
+        last = min(counts[level], int(np.ceil(end * rate)))
+        peaks = np.array(data[offset + first * 2:offset + last * 2])
+        return {
+            "level": level,
+            "peaks_per_second": rate,
+            "start": first / rate,
+            "duration": duration,
+            "peaks": peaks,  # Interleaved int8 min/max pairs
+        }
+
+    def _extract(self, path: Path) -> np.ndarray:
+        """Decode once to 16-bit mono PCM and reduce to level 0 min/max pairs"""
+        process = (
+            ffmpeg
+            .input(str(path))
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=self.SAMPLE_RATE)
+            .global_args('-loglevel', 'error', '-nostdin')
+            .run_async(pipe_stdout=True)
+        )
+        block = 2 * self.SAMPLES_PER_PEAK
+        buffer = b""
+        mins: List[np.ndarray] = []
+        maxs: List[np.ndarray] = []
+        try:
+            while True:
+                data = process.stdout.read(self.READ_SIZE)
+                if data:
+                    buffer += data
+                usable = len(buffer) if not data else len(buffer) - len(buffer) % block
+                usable -= usable % 2
+                if usable:
+                    samples = np.frombuffer(buffer[:usable], dtype="<i2")
+                    buffer = buffer[usable:]
+                    whole = len(samples) - len(samples) % self.SAMPLES_PER_PEAK
+                    if whole:
+                        bins = samples[:whole].reshape(-1, self.SAMPLES_PER_PEAK)
+                        mins.append(bins.min(axis=1))
+                        maxs.append(bins.max(axis=1))
+                    if whole < len(samples):
+                        # Trailing partial bin at end of stream
+                        mins.append(samples[whole:].min(keepdims=True))
+                        maxs.append(samples[whole:].max(keepdims=True))
+                if not data:
+                    break
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        # A partial decode must not be cached: peaks files are keyed by content
+        if returncode != 0:
+            raise WaveformDecodeError(f"FFmpeg could not decode {path} (exit code {returncode})")
+
+        if not mins:
+            return np.zeros((0, 2), dtype=np.int16)
+        return np.stack([np.concatenate(mins), np.concatenate(maxs)], axis=1)
+
+    def _build_levels(self, pairs: np.ndarray) -> List[np.ndarray]:
+        """Level 0 plus successively halved levels, quantized to int8"""
+        levels = [pairs]
+        current = pairs
+        while len(current) > self.MIN_LEVEL_PEAKS:
+            if len(current) % 2:
+                current = np.concatenate([current, current[-1:]])
+            merged = current.reshape(-1, 2, 2)
+            current = np.stack([merged[:, :, 0].min(axis=1), merged[:, :, 1].max(axis=1)], axis=1)
+            levels.append(current)
+        return [(level >> 8).astype(np.int8).reshape(-1) for level in levels]
+
+    def _peaks_path(self, path: Path) -> Path:
+        key = media_store.sha256_for_path(path) or sha256_file(path)
+        # The version in the name makes files of an older layout get rebuilt
+        return self.peaks_dir / f"{key}.v{VERSION}.peaks"
+
+
+# Shared instance for the upload path, editing jobs and the peaks endpoint
+waveform_service = WaveformService()
@@ -41,6 +41,21 @@ class SocketIOHandler:
                 room_name = f"stream_{stream_id}"
                 await self.sio.leave_room(sid, room_name)
         
+        @self.sio.on('subscribe_job')
+        async def subscribe_job(sid: str, data: dict):
+            """Receive progress events for a media processing job"""
+            job_id = data.get('job_id')
+            if job_id:
+                await self.sio.enter_room(sid, f"job_{job_id}")
+                await self.sio.emit('subscribed_job', {'job_id': job_id}, room=sid)
+        
+        @self.sio.on('unsubscribe_job')
+        async def unsubscribe_job(sid: str, data: dict):
+            """Stop receiving progress events for a media processing job"""
+            job_id = data.get('job_id')
+            if job_id:
+                await self.sio.leave_room(sid, f"job_{job_id}")
+        
         @self.sio.on('chat_message')
         async def chat_message(sid: str, data: dict):
             """Handle chat message"""
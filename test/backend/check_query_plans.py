@@ -0,0 +1,190 @@
+"""Check the query plans of the hot route queries against a large seeded database
+
+Creates the schema from the models (with their indexes) in a temporary
+SQLite file, seeds it with a large dataset, runs ANALYZE and then
+EXPLAIN QUERY PLAN for every list and lookup query the routes run. Exits
+with status 1 when a query scans a whole table, so it can run in CI.
+
+Usage: python check_query_plans.py [--rows N]
+"""
+import argparse
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Tuple
+from sqlalchemy import create_engine, select, and_, text
+from app.database import Base
+from app.models import (
+    BibleStory, Category, Comment, CommunityPost, Like, LiveStream,
+    MusicTrack, Playlist, PlaylistItem, Podcast, User,
+)
+
+# Plan lines that read a whole table (SCAN without USING INDEX)
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+GENRES = ["Worship", "Gospel", "Hymns", "Choir", "Instrumental"]
+CATEGORIES = ["testimony", "prayer_request", "question", "announcement", "general"]
+STATUSES = ["scheduled", "live", "ended"]
+
+
+def route_queries():
+    """
+    (name, statement, allow_scan) for the queries the routes run
+
+    allow_scan marks unfiltered pages where reading rows in table order is
+    the plan; everything else must use an index. List queries come in the
+    shapes paginate() builds: a first page and a keyset page after a cursor.
+    """
+    return [
+        ("list_podcasts", select(Podcast).order_by(Podcast.id).limit(101), True),
+        ("list_podcasts cursor", select(Podcast).where(Podcast.id > 42).order_by(Podcast.id).limit(101), False),
+        ("get_podcast", select(Podcast).where(Podcast.id == 42), False),
+        ("list_music_tracks", select(MusicTrack).order_by(MusicTrack.id).limit(101), True),
+        ("list_music_tracks cursor", select(MusicTrack).where(MusicTrack.id > 42)
+            .order_by(MusicTrack.id).limit(101), False),
+        ("list_music_tracks genre", select(MusicTrack).where(MusicTrack.genre == "Gospel")
+            .order_by(MusicTrack.id).limit(101), False),
+        ("list_music_tracks genre cursor", select(MusicTrack).where(MusicTrack.genre == "Gospel", MusicTrack.id > 42)
+            .order_by(MusicTrack.id).limit(101), False),
+        ("list_music_tracks artist", select(MusicTrack).where(MusicTrack.artist == "Artist 7")
+            .order_by(MusicTrack.id).limit(101), False),
+        ("list_music_tracks genre+artist", select(MusicTrack).where(
+            MusicTrack.genre == "Gospel", MusicTrack.artist == "Artist 7").order_by(MusicTrack.id).limit(101), False),
+        ("get_music_track", select(MusicTrack).where(MusicTrack.id == 42), False),
+        ("list_playlists", select(Playlist).order_by(Playlist.id).limit(101), True),
+        ("list_playlists cursor", select(Playlist).where(Playlist.id > 42).order_by(Playlist.id).limit(101), False),
+        ("get_playlist", select(Playlist).where(Playlist.id == 42), False),
+        ("playlist items", select(PlaylistItem).where(PlaylistItem.playlist_id == 42)
+            .order_by(PlaylistItem.position), False),
+        ("list_bible_stories", select(BibleStory).order_by(BibleStory.id).limit(101), True),
+        ("list_bible_stories cursor", select(BibleStory).where(BibleStory.id > 42)
+            .order_by(BibleStory.id).limit(101), False),
+        ("get_bible_story", select(BibleStory).where(BibleStory.id == 42), False),
+        ("list_categories", select(Category), True),
+        ("list_posts", select(CommunityPost).order_by(CommunityPost.id.desc()).limit(101), True),
+        ("list_posts cursor", select(CommunityPost).where(CommunityPost.id < 42)
+            .order_by(CommunityPost.id.desc()).limit(101), False),
+        ("list_posts category", select(CommunityPost).where(CommunityPost.category == "testimony")
+            .order_by(CommunityPost.id.desc()).limit(101), False),
+        ("list_posts category cursor", select(CommunityPost).where(
+            CommunityPost.category == "testimony", CommunityPost.id < 42)
+            .order_by(CommunityPost.id.desc()).limit(101), False),
+        ("post authors", select(User).where(User.id.in_([1, 2, 3, 4, 5])), False),
+        ("post liked by user", select(Like).where(and_(Like.post_id == 42, Like.user_id == 1)), False),
+        ("list_comments", select(Comment).where(Comment.post_id == 42).order_by(Comment.created_at.asc()), False),
+        ("list_streams", select(LiveStream).order_by(LiveStream.id.desc()).limit(101), True),
+        ("list_streams cursor", select(LiveStream).where(LiveStream.id < 42)
+            .order_by(LiveStream.id.desc()).limit(101), False),
+        ("list_streams status", select(LiveStream).where(LiveStream.status == "live")
+            .order_by(LiveStream.id.desc()).limit(101), False),
+        ("list_streams status cursor", select(LiveStream).where(LiveStream.status == "live", LiveStream.id < 42)
+            .order_by(LiveStream.id.desc()).limit(101), False),
+        ("stream by room", select(LiveStream).where(LiveStream.room_name == "room-42"), False),
+    ]
+
+
+def seed(conn, rows: int):
+    random.seed(0)
+    start = datetime(2024, 1, 1)
+    users = max(100, rows // 20)
+
+    def when(i: int) -> datetime:
+        return start + timedelta(minutes=i * 7 + random.randint(0, 6))
+
+    conn.execute(User.__table__.insert(), [
+        {"id": i, "name": f"User {i}", "email": f"user{i}@example.com"} for i in range(1, users + 1)
+    ])
+    conn.execute(Category.__table__.insert(), [
+        {"id": i, "name": f"Category {i}", "type": "podcast"} for i in range(1, 11)
+    ])
+    conn.execute(Podcast.__table__.insert(), [
+        {"id": i, "title": f"Podcast {i}", "category_id": random.randint(1, 10),
+         "status": "approved", "created_at": when(i)}
+        for i in range(1, rows + 1)
+    ])
+    conn.execute(MusicTrack.__table__.insert(), [
+        {"id": i, "title": f"Track {i}", "artist": f"Artist {random.randint(1, 500)}",
+         "genre": random.choice(GENRES), "audio_url": f"/media/audio/{i}.mp3", "created_at": when(i)}
+        for i in range(1, rows + 1)
+    ])
+    conn.execute(BibleStory.__table__.insert(), [
+        {"id": i, "title": f"Story {i}", "scripture_reference": "John 3:16", "content": "...", "created_at": when(i)}
+        for i in range(1, rows + 1)
+    ])
+    conn.execute(Playlist.__table__.insert(), [
+        {"id": i, "user_id": random.randint(1, users), "name": f"Playlist {i}", "created_at": when(i)}
+        for i in range(1, rows // 10 + 1)
+    ])
+    conn.execute(PlaylistItem.__table__.insert(), [
+        {"id": i, "playlist_id": random.randint(1, rows // 10), "content_type": "music",
+         "content_id": random.randint(1, rows), "position": i % 50}
+        for i in range(1, rows * 2 + 1)
+    ])
+    conn.execute(CommunityPost.__table__.insert(), [
+        {"id": i, "user_id": random.randint(1, users), "title": f"Post {i}", "content": "...",
+         "category": random.choice(CATEGORIES), "likes_count": 0, "comments_count": 0, "created_at": when(i)}
+        for i in range(1, rows + 1)
+    ])
+    conn.execute(Comment.__table__.insert(), [
+        {"id": i, "post_id": random.randint(1, rows), "user_id": random.randint(1, users),
+         "content": "...", "created_at": when(i)}
+        for i in range(1, rows * 3 + 1)
+    ])
+    conn.execute(Like.__table__.insert(), [
+        {"id": i, "post_id": random.randint(1, rows), "user_id": random.randint(1, users), "created_at": when(i)}
+        for i in range(1, rows * 5 + 1)
+    ])
+    conn.execute(LiveStream.__table__.insert(), [
+        {"id": i, "host_id": random.randint(1, users), "title": f"Stream {i}", "room_name": f"room-{i}",
+         "status": random.choices(STATUSES, weights=[5, 1, 94])[0], "created_at": when(i)}
+        for i in range(1, rows // 4 + 1)
+    ])
+    conn.execute(text("ANALYZE"))
+
+
+def explain_route_queries(rows: int) -> List[Tuple[str, List[str], bool]]:
+    """
+    (name, plan lines, failed) for every route query against a seeded database
+
+    A query fails when its plan scans a whole table and allow_scan is not set.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'plans.sqlite'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            seed(conn, rows)
+
+        with engine.connect() as conn:
+            for name, statement, allow_scan in route_queries():
+                sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+                plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+                failed = not allow_scan and any(FULL_SCAN.match(line) for line in plan)
+                results.append((name, plan, failed))
+        engine.dispose()
+    return results
+
+
+def check(rows: int) -> int:
+    results = explain_route_queries(rows)
+    failures = 0
+    for name, plan, failed in results:
+        failures += failed
+        print(f"{'FAIL' if failed else 'ok  '} {name}")
+        for line in plan:
+            marker = "!" if FULL_SCAN.match(line) or TEMP_SORT in line else " "
+            print(f"     {marker} {line}")
+
+    print(f"\n{failures} of {len(results)} queries scan a whole table" if failures
+          else "\nNo full table scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per main table (default 20000)")
+    sys.exit(check(parser.parse_args().rows))
@@ -7,6 +7,10 @@ from app.models.category import Category
 from app.models.user import User
 from app.models.music import MusicTrack
 from app.services.media_service import MediaService
+from app.services.media_store import media_store
+from app.services.placeholder_service import placeholder_service
+from app.services.preview_service import preview_service
+from app.services.probe_cache import probe_cache
 import json
 from pathlib import Path
 import random
@@ -89,6 +93,7 @@ async def init_db():
                 'description': f'A podcast episode about {title.lower()}',
                 'audio_url': f'audio/{audio_file.name}',
                 'video_url': None,
+                'hls_url': media_store.flags(f'/media/audio/{audio_file.name}').get('hls'),
                 'cover_image': None,
                 'creator_id': 1,
                 'category_id': random.choice(categories),
@@ -100,8 +105,8 @@ async def init_db():
             await conn.execute(
                 text("""
                     INSERT INTO podcasts 
-                    (title, description, audio_url, video_url, cover_image, creator_id, category_id, duration, status, plays_count)
-                    VALUES (:title, :description, :audio_url, :video_url, :cover_image, :creator_id, :category_id, :duration, :status, :plays_count)
+                    (title, description, audio_url, video_url, hls_url, cover_image, creator_id, category_id, duration, status, plays_count)
+                    VALUES (:title, :description, :audio_url, :video_url, :hls_url, :cover_image, :creator_id, :category_id, :duration, :status, :plays_count)
                 """),
                 podcast_data
             )
@@ -120,12 +125,19 @@ async def init_db():
             if duration is None:
                 duration = random.randint(600, 3600)  # 10-60 minutes fallback
             
+            # Poster (as cover image) and scrub sprites, ready before the first viewer
+            previews = preview_service.generate(f"/media/video/{video_file.name}", str(video_file)) or {}
+            
             podcast_data = {
                 'title': title,
                 'description': f'Animated Bible story: {title.lower()}',
                 'audio_url': None,
                 'video_url': f'video/{video_file.name}',
-                'cover_image': None,
+                'hls_url': media_store.flags(f'/media/video/{video_file.name}').get('hls'),
+                'cover_image': previews.get('poster'),
+                'cover_blurhash': previews.get('blurhash'),
+                'cover_color': previews.get('color'),
+                'preview_vtt_url': previews.get('preview_vtt'),
                 'creator_id': 1,
                 'category_id': random.choice(categories),
                 'duration': duration,
@@ -136,8 +148,8 @@ async def init_db():
             await conn.execute(
                 text("""
                     INSERT INTO podcasts 
-                    (title, description, audio_url, video_url, cover_image, creator_id, category_id, duration, status, plays_count)
-                    VALUES (:title, :description, :audio_url, :video_url, :cover_image, :creator_id, :category_id, :duration, :status, :plays_count)
+                    (title, description, audio_url, video_url, hls_url, cover_image, cover_blurhash, cover_color, preview_vtt_url, creator_id, category_id, duration, status, plays_count)
+                    VALUES (:title, :description, :audio_url, :video_url, :hls_url, :cover_image, :cover_blurhash, :cover_color, :preview_vtt_url, :creator_id, :category_id, :duration, :status, :plays_count)
                 """),
                 podcast_data
             )
@@ -231,12 +243,21 @@ async def init_db():
         ]
         
         # Insert community posts
+        images_dir = Path(__file__).parent / "media" / "images"
         for post_data in community_posts:
+            # Blurhash / dominant color so the feed can paint before images load
+            image_name = Path(post_data['image_url']).name
+            placeholders = None
+            if (images_dir / image_name).exists():
+                placeholders = placeholder_service.ensure(f"/media/images/{image_name}", images_dir / image_name)
+            post_data['image_blurhash'] = placeholders["blurhash"] if placeholders else None
+            post_data['image_color'] = placeholders["color"] if placeholders else None
+            
             await conn.execute(
                 text("""
                     INSERT INTO community_posts 
-                    (user_id, title, content, image_url, category, likes_count, comments_count)
-                    VALUES (:user_id, :title, :content, :image_url, :category, :likes_count, :comments_count)
+                    (user_id, title, content, image_url, image_blurhash, image_color, category, likes_count, comments_count)
+                    VALUES (:user_id, :title, :content, :image_url, :image_blurhash, :image_color, :category, :likes_count, :comments_count)
                 """),
                 post_data
             )
@@ -304,4 +325,6 @@ async def init_db():
 
 if __name__ == "__main__":
     asyncio.run(init_db())
+    # Probe results are written in batches; save the ones seeding added
+    probe_cache.flush()
 
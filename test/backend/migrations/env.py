@@ -15,8 +15,11 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# Set sqlalchemy.url from settings
-config.set_main_option('sqlalchemy.url', settings.DATABASE_URL)
+# Set sqlalchemy.url from settings (migrations run on the sync driver)
+config.set_main_option(
+    'sqlalchemy.url',
+    settings.DATABASE_URL.replace('+aiosqlite', '').replace('+asyncpg', '+psycopg')
+)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
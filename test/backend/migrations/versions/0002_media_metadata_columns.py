@@ -0,0 +1,39 @@
+"""Media metadata columns
+
+Revision ID: 0002_media_metadata_columns
+Revises: 0001_baseline
+Create Date: 2026-10-18 12:01:00.000000
+
+HLS and scrub preview URLs for podcasts, and image placeholders (blurhash
+and dominant color) for podcast and track covers and post images.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_media_metadata_columns'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = {
+    'podcasts': ('hls_url', 'preview_vtt_url', 'cover_blurhash', 'cover_color'),
+    'music_tracks': ('cover_blurhash', 'cover_color'),
+    'community_posts': ('image_blurhash', 'image_color'),
+}
+
+
+def upgrade() -> None:
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.add_column(sa.Column(column, sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in reversed(columns):
+                batch_op.drop_column(column)
@@ -0,0 +1,40 @@
+"""Indexes for the hot list and lookup queries
+
+Revision ID: 0003_hot_query_indexes
+Revises: 0002_media_metadata_columns
+Create Date: 2026-10-18 12:02:00.000000
+
+Community feed by category and date, likes by (post, user), comments by
+post, tracks by genre and artist, streams by status and playlist items by
+playlist. Check the plans with check_query_plans.py.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hot_query_indexes'
+down_revision = '0002_media_metadata_columns'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_community_posts_category_created_at', 'community_posts', ['category', 'created_at', 'id']),
+    ('ix_community_posts_created_at', 'community_posts', ['created_at', 'id']),
+    ('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at']),
+    ('ix_likes_post_id_user_id', 'likes', ['post_id', 'user_id']),
+    ('ix_music_tracks_genre', 'music_tracks', ['genre', 'id']),
+    ('ix_music_tracks_artist', 'music_tracks', ['artist', 'id']),
+    ('ix_live_streams_status', 'live_streams', ['status', 'id']),
+    ('ix_playlist_items_playlist_id', 'playlist_items', ['playlist_id', 'position']),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,29 @@
+"""Order the community feed by id
+
+Revision ID: 0004_post_feed_by_id
+Revises: 0003_hot_query_indexes
+Create Date: 2026-10-18 16:40:00.000000
+
+The feed pages by id instead of (created_at, id), so the category filter
+needs (category, id) and the created_at indexes go.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_post_feed_by_id'
+down_revision = '0003_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_community_posts_category', 'community_posts', ['category', 'id'])
+    op.drop_index('ix_community_posts_category_created_at', table_name='community_posts')
+    op.drop_index('ix_community_posts_created_at', table_name='community_posts')
+
+
+def downgrade() -> None:
+    op.create_index('ix_community_posts_created_at', 'community_posts', ['created_at', 'id'])
+    op.create_index('ix_community_posts_category_created_at', 'community_posts', ['category', 'created_at', 'id'])
+    op.drop_index('ix_community_posts_category', table_name='community_posts')
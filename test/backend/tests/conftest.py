@@ -0,0 +1,15 @@
+import os
+import shutil
+import tempfile
+
+# Settings are read when app.config is first imported, and the services
+# create their directories on import: point the media directory and the
+# database at a scratch location before any test module imports the app
+_scratch = tempfile.mkdtemp(prefix="cnt-tests-")
+os.environ["MEDIA_STORAGE_PATH"] = os.path.join(_scratch, "media")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_scratch, 'test.sqlite')}"
+os.environ["MEDIA_JANITOR_INTERVAL"] = "0"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
@@ -0,0 +1,53 @@
+from app.services.ffmpeg_progress import ProgressParser, expected_duration
+
+
+def feed_block(parser, **values):
+    snapshot = None
+    for key, value in values.items():
+        snapshot = parser.feed(f"{key}={value}\n")
+    return snapshot
+
+
+def test_snapshot_only_at_the_end_of_a_block():
+    parser = ProgressParser(total_duration=10)
+    assert parser.feed("frame=10") is None
+    assert parser.feed("out_time_us=2500000") is None
+    assert parser.feed("not a key value line") is None
+    assert parser.feed("progress=continue") is not None
+
+
+def test_percent_and_eta_from_speed():
+    parser = ProgressParser(total_duration=10)
+    snapshot = feed_block(parser, fps="25.0", out_time_us="2500000", speed="2.5x", progress="continue")
+    assert snapshot == {"percent": 25.0, "fps": 25.0, "speed": 2.5, "out_time": 2.5, "eta": 3.0}
+
+
+def test_out_time_ms_is_in_microseconds():
+    parser = ProgressParser(total_duration=4)
+    snapshot = feed_block(parser, out_time_ms="1000000", progress="continue")
+    assert snapshot["out_time"] == 1.0
+    assert snapshot["percent"] == 25.0
+
+
+def test_unknown_values_and_duration():
+    parser = ProgressParser()
+    snapshot = feed_block(parser, fps="N/A", out_time_us="N/A", speed="N/A", progress="continue")
+    assert snapshot == {"percent": None, "fps": None, "speed": None, "out_time": None, "eta": None}
+
+
+def test_end_block_is_complete():
+    parser = ProgressParser(total_duration=10)
+    snapshot = feed_block(parser, out_time_us="9000000", progress="end")
+    assert snapshot["percent"] == 100.0
+    assert snapshot["eta"] == 0.0
+
+
+def test_percent_never_exceeds_100():
+    parser = ProgressParser(total_duration=1)
+    snapshot = feed_block(parser, out_time_us="1500000", progress="continue")
+    assert snapshot["percent"] == 100.0
+
+
+def test_expected_duration_from_output_option():
+    assert expected_duration(["ffmpeg", "-ss", "3", "-i", "in.mp4", "-t", "12.5", "out.mp4"]) == 12.5
+    assert expected_duration(["ffmpeg", "-i", "/does/not/exist.mp4", "out.mp4"]) is None
@@ -0,0 +1,52 @@
+import threading
+import pytest
+from app.services.media_scheduler import MediaScheduler, Priority, SchedulerBusy, _OperationClass
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = MediaScheduler()
+    # One worker, four queue slots of which batch work may take two
+    scheduler._classes = {"video": _OperationClass("video", 1, 4, 2)}
+    yield scheduler
+    scheduler.shutdown(timeout=5)
+
+
+def _occupy_worker(scheduler, release: threading.Event):
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    future = scheduler.submit("video", hold, priority=Priority.BATCH)
+    assert started.wait(5)
+    return future
+
+
+def test_batch_queue_full_still_admits_interactive(scheduler):
+    release = threading.Event()
+    _occupy_worker(scheduler, release)
+    try:
+        batch = [scheduler.submit("video", lambda: "batch", priority=Priority.BATCH) for _ in range(2)]
+        with pytest.raises(SchedulerBusy):
+            scheduler.submit("video", lambda: "batch", priority=Priority.BATCH)
+
+        interactive = scheduler.submit("video", lambda: "interactive", priority=Priority.INTERACTIVE)
+    finally:
+        release.set()
+    assert interactive.result(5) == "interactive"
+    assert [future.result(5) for future in batch] == ["batch", "batch"]
+    assert scheduler.stats()["video"]["queued_batch"] == 0
+
+
+def test_interactive_work_is_bounded_by_the_whole_queue(scheduler):
+    release = threading.Event()
+    _occupy_worker(scheduler, release)
+    try:
+        for _ in range(4):
+            scheduler.submit("video", lambda: None)
+        with pytest.raises(SchedulerBusy):
+            scheduler.submit("video", lambda: None)
+    finally:
+        release.set()
@@ -0,0 +1,34 @@
+from app.services.media_server import MAX_RANGES, parse_range
+
+
+def test_single_ranges():
+    assert parse_range("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_range("bytes=500-", 1000) == [(500, 999)]
+    assert parse_range("bytes=-100", 1000) == [(900, 999)]
+
+
+def test_end_is_clamped_to_the_file():
+    assert parse_range("bytes=900-5000", 1000) == [(900, 999)]
+    assert parse_range("bytes=-5000", 1000) == [(0, 999)]
+
+
+def test_overlapping_and_adjacent_ranges_are_merged():
+    assert parse_range("bytes=500-599, 0-99, 100-199, 550-700", 1000) == [(0, 199), (500, 700)]
+
+
+def test_unsatisfiable_ranges_are_dropped():
+    assert parse_range("bytes=1000-1100", 1000) == []
+    assert parse_range("bytes=-0", 1000) == []
+    assert parse_range("bytes=2000-2100, 0-9", 1000) == [(0, 9)]
+    assert parse_range("bytes=2000-", 1000) == []
+    assert parse_range("bytes=2000-, 0-9", 1000) == [(0, 9)]
+
+
+def test_malformed_headers_serve_the_whole_file():
+    for header in ("items=0-9", "bytes=", "bytes=abc", "bytes=5-1", "bytes=x-9", "bytes=0-9;1-2"):
+        assert parse_range(header, 1000) is None, header
+
+
+def test_too_many_ranges_serve_the_whole_file():
+    header = "bytes=" + ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+    assert parse_range(header, 10000) is None
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.database import Base
+from app.models import CommunityPost, User
+from app.routes.community import list_posts
+from app.routes.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    when = datetime(2024, 3, 1, 12, 30, 5, 250000, tzinfo=timezone.utc)
+    cursor = encode_cursor([when, 42])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, [CommunityPost.created_at, CommunityPost.id]) == [when, 42]
+
+
+def test_cursor_keeps_plain_values():
+    assert decode_cursor(encode_cursor(["testimony", 7]), [CommunityPost.category, CommunityPost.id]) == ["testimony", 7]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "bm90IGpzb24",  # base64 of "not json"
+    encode_cursor([1, 2]),  # two values for one column
+    encode_cursor(["yesterday"])[:-1],
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, [CommunityPost.created_at])
+    assert error.value.status_code == 400
+
+
+def test_datetime_cursor_must_be_a_timestamp():
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor(["yesterday"]), [CommunityPost.created_at])
+
+
+async def _page_through_posts(database_url: str, count: int, limit: int, category=None):
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User).values(id=1, name="Tester", email="tester@example.com"))
+            # One statement: every row gets the same CURRENT_TIMESTAMP
+            await conn.execute(insert(CommunityPost), [
+                {"user_id": 1, "title": f"Post {i}", "content": "...",
+                 "category": "testimony" if i % 2 else "general"}
+                for i in range(count)
+            ])
+
+        seen, created, cursor, pages = [], set(), None, 0
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            while True:
+                response = Response()
+                posts = await list_posts(
+                    response, skip=0, limit=limit, category=category, current_user_id=1,
+                    cursor=cursor, include_total=False, db=db,
+                )
+                seen.extend(post.id for post in posts)
+                created.update(post.created_at for post in posts)
+                pages += 1
+                cursor = response.headers.get("x-next-cursor")
+                if not cursor or pages > count:
+                    return seen, created
+    finally:
+        await engine.dispose()
+
+
+def test_post_pages_with_tied_timestamps_do_not_repeat(tmp_path):
+    seen, created = asyncio.run(_page_through_posts(f"sqlite+aiosqlite:///{tmp_path / 'feed.sqlite'}", 25, 7))
+    assert len(created) == 1
+    assert seen == list(range(25, 0, -1))
+
+
+def test_post_pages_by_category(tmp_path):
+    seen, _ = asyncio.run(
+        _page_through_posts(f"sqlite+aiosqlite:///{tmp_path / 'feed.sqlite'}", 25, 4, category="testimony")
+    )
+    assert seen == [i + 1 for i in range(24, -1, -1) if i % 2]
@@ -0,0 +1,48 @@
+from PIL import Image
+from app.services.placeholder_service import BASE83_CHARS, blurhash_encode, compute_placeholders, dominant_color
+
+
+def decode_base83(text):
+    value = 0
+    for char in text:
+        value = value * 83 + BASE83_CHARS.index(char)
+    return value
+
+
+def test_blurhash_layout():
+    image = Image.new("RGB", (16, 12), (200, 30, 90))
+    blurhash = blurhash_encode(image, x_components=4, y_components=3)
+    # size flag + max AC + 4-char DC + 2 chars per AC component
+    assert len(blurhash) == 1 + 1 + 4 + 2 * (4 * 3 - 1)
+    assert decode_base83(blurhash[0]) == (4 - 1) + (3 - 1) * 9
+
+
+def test_blurhash_keeps_the_average_color():
+    blurhash = blurhash_encode(Image.new("RGB", (8, 8), (200, 30, 90)))
+    # The DC component round-trips exactly through linear RGB
+    assert decode_base83(blurhash[2:6]) == (200 << 16) + (30 << 8) + 90
+
+
+def test_blurhash_picks_up_a_horizontal_gradient():
+    image = Image.new("RGB", (16, 16))
+    image.putdata([(x * 16, x * 16, x * 16) for _ in range(16) for x in range(16)])
+    blurhash = blurhash_encode(image, x_components=2, y_components=1)
+    assert len(blurhash) == 8
+    ac = decode_base83(blurhash[6:8])
+    red, green, blue = ac // (19 * 19), ac // 19 % 19, ac % 19
+    # Dark on the left, light on the right: the first horizontal cosine is negative
+    assert red == green == blue < 9
+
+
+def test_dominant_color():
+    image = Image.new("RGB", (10, 10), (0, 0, 255))
+    image.paste((255, 255, 0), (0, 0, 10, 3))
+    assert dominant_color(image) == "#0000ff"
+
+
+def test_compute_placeholders(tmp_path):
+    path = tmp_path / "cover.jpg"
+    Image.new("RGB", (320, 200), (20, 120, 60)).save(path, quality=95)
+    placeholders = compute_placeholders(path)
+    assert len(placeholders["blurhash"]) == 28
+    assert placeholders["color"].startswith("#") and len(placeholders["color"]) == 7
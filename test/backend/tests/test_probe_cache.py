@@ -0,0 +1,50 @@
+import json
+import pytest
+from app.services import probe_cache as probe_cache_module
+from app.services.probe_cache import ProbeCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ProbeCache()
+    cache.index_path = tmp_path / "probe_cache.json"
+    cache._entries.clear()
+    # Stands in for ffprobe
+    monkeypatch.setattr(
+        probe_cache_module.ffmpeg, "probe",
+        lambda path: {"format": {"duration": "12.5", "tags": {"title": "x"}}, "streams": []}
+    )
+    return cache
+
+
+def _media(tmp_path, count):
+    paths = []
+    for index in range(count):
+        path = tmp_path / f"clip_{index}.mp3"
+        path.write_bytes(b"audio")
+        paths.append(path)
+    return paths
+
+
+def test_misses_are_saved_in_batches(cache, tmp_path):
+    for path in _media(tmp_path, 20):
+        assert cache.duration(path) == 12.5
+    assert not cache.index_path.exists()
+
+    cache.flush()
+    saved = json.loads(cache.index_path.read_text())
+    assert len(saved) == 20
+    assert all("tags" not in entry["probe"]["format"] for entry in saved.values())
+
+
+def test_save_is_due_after_the_interval(cache, tmp_path, monkeypatch):
+    first, second = _media(tmp_path, 2)
+    cache.probe(first)
+    monkeypatch.setattr(cache, "_saved_at", cache._saved_at - cache.SAVE_INTERVAL - 1)
+    cache.probe(second)
+    assert len(json.loads(cache.index_path.read_text())) == 2
+
+
+def test_flush_without_changes_writes_nothing(cache):
+    cache.flush()
+    assert not cache.index_path.exists()
@@ -0,0 +1,16 @@
+import pytest
+from check_query_plans import explain_route_queries, route_queries
+
+# Enough rows for ANALYZE to make the planner prefer the indexes
+ROWS = 5000
+
+
+@pytest.fixture(scope="module")
+def plans():
+    return {name: (plan, failed) for name, plan, failed in explain_route_queries(ROWS)}
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in route_queries()])
+def test_route_query_uses_an_index(plans, name):
+    plan, failed = plans[name]
+    assert not failed, "full table scan:\n" + "\n".join(plan)
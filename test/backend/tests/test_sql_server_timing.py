@@ -0,0 +1,60 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database.instrumentation import SQLServerTimingMiddleware, sql_instrumentation
+
+
+@pytest.fixture
+def client():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    sql_instrumentation.instrument(engine)
+    app = FastAPI()
+    app.add_middleware(SQLServerTimingMiddleware)
+
+    async def query(count: int):
+        async with engine.connect() as conn:
+            for _ in range(count):
+                await conn.execute(text("SELECT 1"))
+
+    @app.get("/queries")
+    async def queries(count: int = 2):
+        await query(count)
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        await query(1)
+
+        async def chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_counts_the_request_queries(client):
+    response = client.get("/queries", params={"count": 3})
+    assert response.json() == {"ok": True}
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="3 queries' in response.headers["server-timing"]
+
+
+def test_no_header_without_queries(client):
+    assert "server-timing" not in client.get("/queries", params={"count": 0}).headers
+
+
+def test_streaming_responses_pass_through(client):
+    response = client.get("/stream")
+    assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    assert 'desc="1 queries' in response.headers["server-timing"]
+
+
+def test_requests_do_not_share_totals(client):
+    client.get("/queries", params={"count": 5})
+    assert 'desc="1 queries' in client.get("/queries", params={"count": 1}).headers["server-timing"]
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+import pytest
+from sqlalchemy import delete, insert
+from app.config import settings
+from app.database import Base
+from app.database.connection import engine, reader_engine
+from app.models import Podcast
+from app.services.media_store import media_store
+from app.services.storage_janitor import is_derived, media_reference_paths, storage_janitor
+from app.services.waveform_service import VERSION as PEAKS_VERSION
+
+
+@pytest.mark.parametrize("reference, paths", [
+    ("/media/audio/a.mp3", ["audio/a.mp3"]),
+    ("https://cdn.example.com/media/video/b.mp4?x=1", ["video/b.mp4"]),
+    ("audio/a.mp3", ["audio/a.mp3"]),
+    ("media/images/c.jpg", ["images/c.jpg"]),
+    ("/hls/3/master.m3u8", ["hls/3/master.m3u8"]),
+    ("d.mp3", ["audio/d.mp3", "video/d.mp3", "images/d.mp3"]),
+    ("  ", []),
+    ("/media/", []),
+])
+def test_media_reference_paths(reference, paths):
+    assert media_reference_paths(reference) == paths
+
+
+@pytest.mark.parametrize("relative, derived", [
+    ("audio/trimmed_1a2b3c4d.mp3", True),
+    ("video/rendered_1a2b3c4d.mp4", True),
+    ("images/poster_0123456789abcdef01234567.jpg", True),
+    ("hls/0123abcd", True),
+    ("previews/0123abcd", True),
+    ("audio/5f0c1e9e-upload.mp3", False),
+    ("video/trimmed.mp4", False),
+    ("images/cover.jpg", False),
+])
+def test_is_derived(relative, derived):
+    assert is_derived(relative) == derived
+
+
+def _stored_file(relative: str, age: float):
+    path = storage_janitor.media_dir / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"media")
+    old = time.time() - age
+    os.utime(path, (old, old))
+    return path
+
+
+async def _sweep_with_podcast(**columns):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(Podcast))
+        await conn.execute(insert(Podcast).values(title="Episode", **columns))
+    try:
+        return await storage_janitor.sweep()
+    finally:
+        await engine.dispose()
+        if reader_engine is not None:
+            await reader_engine.dispose()
+
+
+def test_sweep_keeps_relatively_referenced_files(monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ORPHAN_GRACE", 60)
+    old = 3600
+    kept = [
+        _stored_file("audio/relative.mp3", old),
+        _stored_file("video/absolute.mp4", old),
+        _stored_file("images/bare.jpg", old),
+    ]
+    orphan = _stored_file("audio/orphan.mp3", old)
+    recent = _stored_file("audio/recent.mp3", 0)
+
+    report = asyncio.run(_sweep_with_podcast(
+        audio_url="audio/relative.mp3",
+        video_url="http://localhost:8000/media/video/absolute.mp4",
+        cover_image="bare.jpg",
+    ))
+
+    assert all(path.exists() for path in kept)
+    assert recent.exists()
+    assert not orphan.exists()
+    assert report["orphans"]["count"] == 1
+
+
+def test_sweep_drops_peaks_of_audio_no_longer_stored(monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ORPHAN_GRACE", 60)
+    stored = "a" * 64
+    monkeypatch.setattr(media_store, "blob_hashes", lambda: {stored})
+    kept = _stored_file(f".cache/peaks/{stored}.v{PEAKS_VERSION}.peaks", 3600)
+    gone = _stored_file(f".cache/peaks/{'b' * 64}.v{PEAKS_VERSION}.peaks", 3600)
+    old_layout = _stored_file(f".cache/peaks/{stored}.v1.peaks", 3600)
+    recent = _stored_file(f".cache/peaks/{'c' * 64}.v{PEAKS_VERSION}.peaks", 0)
+
+    report = asyncio.run(_sweep_with_podcast())
+
+    assert kept.exists() and recent.exists()
+    assert not gone.exists() and not old_layout.exists()
+    assert report["stale_peaks"]["count"] == 2
+
+
+def test_over_budget_sweep_evicts_outputs_not_fresh_uploads(monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ORPHAN_GRACE", 7 * 24 * 3600)
+    monkeypatch.setattr(settings, "MEDIA_DISK_BUDGET_BYTES", 1)
+    # Uploaded 15 minutes ago; the client has not created its podcast yet
+    upload = _stored_file("audio/3f2a9c1e-upload.mp3", 15 * 60)
+    output = _stored_file("audio/trimmed_1a2b3c4d.mp3", 3600)
+
+    report = asyncio.run(_sweep_with_podcast())
+
+    assert upload.exists()
+    assert not output.exists()
+    assert report["evicted"]["count"] >= 1
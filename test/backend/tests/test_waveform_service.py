@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routes import audio_editing
+from app.services.media_scheduler import SchedulerClosed
+from app.services.waveform_service import WaveformDecodeError, WaveformService
+
+# Level 0 pairs per second: SAMPLE_RATE / SAMPLES_PER_PEAK
+RATE = 125
+
+
+def _pairs(count: int) -> np.ndarray:
+    """Level 0 min/max pairs whose values step by 256 (one int8 unit)"""
+    values = (np.arange(count) % 100) * 256
+    return np.stack([-values, values], axis=1).astype(np.int16)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    service = WaveformService()
+    service.peaks_dir = tmp_path / "peaks"
+    service.peaks_dir.mkdir()
+    # Stands in for the FFmpeg decode: 16 seconds of level 0 pairs
+    monkeypatch.setattr(service, "_extract", lambda path: _pairs(16 * RATE))
+    return service
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / "clip.mp3"
+    path.write_bytes(b"not really audio")
+    return path
+
+
+def test_levels_halve_until_the_minimum():
+    levels = WaveformService()._build_levels(_pairs(2000))
+    assert [len(level) // 2 for level in levels] == [2000, 1000, 500]
+    assert all(level.dtype == np.int8 for level in levels)
+    # Level 1 merges neighbours: min of the mins, max of the maxes
+    first, second = levels[0][:4].reshape(2, 2)
+    assert tuple(levels[1][:2]) == (min(first[0], second[0]), max(first[1], second[1]))
+
+
+def test_odd_level_repeats_its_last_pair():
+    levels = WaveformService()._build_levels(_pairs(1001))
+    assert [len(level) // 2 for level in levels] == [1001, 501]
+    assert tuple(levels[1][-2:]) == tuple(levels[0][-2:])
+
+
+def test_short_audio_has_one_level():
+    assert len(WaveformService()._build_levels(_pairs(100))) == 1
+
+
+@pytest.mark.parametrize("width, level", [(3000, 0), (2000, 0), (1000, 1), (800, 1), (400, 2), (10, 2)])
+def test_read_picks_the_coarsest_level_with_enough_peaks(service, audio, width, level):
+    peaks = service.read(service.ensure(audio), 0, None, width)
+    assert peaks["level"] == level
+    assert peaks["duration"] == 16
+    assert peaks["peaks_per_second"] == RATE / 2 ** level
+    assert len(peaks["peaks"]) == 2 * 16 * RATE // 2 ** level
+
+
+def test_read_slices_the_requested_range(service, audio):
+    peaks = service.read(service.ensure(audio), 4, 8, 250)
+    assert peaks["level"] == 1
+    assert peaks["start"] == 4
+    assert len(peaks["peaks"]) == 2 * 4 * RATE // 2
+    expected = service._build_levels(_pairs(16 * RATE))[1]
+    assert np.array_equal(peaks["peaks"], expected[2 * 250:2 * 500])
+
+
+def test_read_clamps_to_the_duration(service, audio):
+    peaks = service.read(service.ensure(audio), 20, 30, 100)
+    assert peaks["start"] == 16
+    assert len(peaks["peaks"]) == 0
+
+
+def test_concurrent_builds_of_one_file(service, audio):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(pool.map(lambda _: service.ensure(audio), range(8)))
+    assert len(set(paths)) == 1
+    assert [path.name for path in service.peaks_dir.iterdir()] == [paths[0].name]
+    assert service.read(paths[0], 0, None, 400)["level"] == 2
+
+
+def test_get_keys_the_file_off_the_event_loop(service, audio, monkeypatch):
+    loop_thread = threading.get_ident()
+    hashed_on = []
+    peaks_path = service._peaks_path
+
+    def record_thread(path):
+        hashed_on.append(threading.get_ident())
+        return peaks_path(path)
+
+    service.ensure(audio)
+    monkeypatch.setattr(service, "_peaks_path", record_thread)
+    peaks = asyncio.run(service.get(audio, 0, None, 100))
+    assert peaks["duration"] == 16
+    assert hashed_on and loop_thread not in hashed_on
+
+
+@pytest.mark.parametrize("error, status", [
+    (WaveformDecodeError("FFmpeg could not decode"), 415),
+    (SchedulerClosed("Media scheduler is shut down"), 503),
+])
+def test_peaks_endpoint_tells_bad_audio_from_shutdown(audio, monkeypatch, error, status):
+    async def fail(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(audio_editing.media_service, "resolve_media_path", lambda ref, kind: audio)
+    monkeypatch.setattr(audio_editing.waveform_service, "get", fail)
+    app = FastAPI()
+    app.include_router(audio_editing.router)
+    response = TestClient(app).get("/peaks", params={"audio_path": "/media/audio/clip.mp3"})
+    assert response.status_code == status